@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""t2p command extraction benchmark.
+
+Compares the previous extraction (five uncompiled regexes run over the
+complete output) with the single-pass extractor, on complete outputs and on
+outputs fed token by token. Also reports how far into a streamed response
+the command becomes available.
+
+Usage:
+    python benchmarks/bench_command_extraction.py --count 20000
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from agents_system.integrations.command_extractor import CommandStreamExtractor, extract_commands
+
+LEGACY_PATTERNS = [
+    r"You can use the command:\s*`(t2p .+?)`",
+    r"Run\s*`(t2p .+?)`",
+    r"Execute\s*`(t2p .+?)`",
+    r"Command:\s*`(t2p .+?)`",
+    r"t2p command:\s*`(t2p .+?)`",
+]
+
+SENTENCES = [
+    "The deployment pipeline has three stages and each one reports its status.",
+    "Blocked tasks usually wait on a review or an external dependency.",
+    "Horizon H1 covers the work planned for the current cycle.",
+    "Tags make it easier to filter related items later on.",
+    "Notes can be linked to todos so context stays in one place.",
+]
+
+COMMANDS = [
+    "t2p todo list --status blocked",
+    't2p todo add --title "Review release notes" --priority 2 --horizon H1',
+    't2p note new "Retro" --content "What went well" --tags "team"',
+]
+
+def legacy_extract(ai_output):
+    """The previous extract_command_from_ai_output implementation."""
+    for pattern in LEGACY_PATTERNS:
+        matches = re.search(pattern, ai_output, re.IGNORECASE)
+        if matches:
+            command = matches.group(1).strip()
+            if command.startswith("t2p "):
+                return command
+    return None
+
+def make_output(rng: random.Random) -> str:
+    """Build a response with a command after a few sentences of prose."""
+    before = [rng.choice(SENTENCES) for _ in range(rng.randint(1, 4))]
+    after = [rng.choice(SENTENCES) for _ in range(rng.randint(4, 12))]
+    lead_in = rng.choice(["You can use the command:", "Run", "Command:"])
+    return " ".join(before + [f"{lead_in} `{rng.choice(COMMANDS)}`"] + after)
+
+def tokens(text: str):
+    """Split text into roughly token-sized chunks."""
+    return re.findall(r"\s*\S{1,4}", text)
+
+def timed(label: str, count: int, function) -> float:
+    """Run a function and print the throughput."""
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed:8.3f}s  {count / elapsed:10,.0f} outputs/s")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark t2p command extraction")
+    parser.add_argument("--count", type=int, default=20000, help="AI outputs to process")
+    parser.add_argument("--seed", type=int, default=5, help="Random seed")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    outputs = [make_output(rng) for _ in range(args.count)]
+    streams = [tokens(output) for output in outputs]
+
+    assert [legacy_extract(output) for output in outputs] == [extract_commands(output)[0] for output in outputs]
+
+    timed("legacy, complete output", args.count, lambda: [legacy_extract(output) for output in outputs])
+    timed("single pass, complete output", args.count, lambda: [extract_commands(output) for output in outputs])
+
+    def stream_all():
+        for chunks in streams:
+            extractor = CommandStreamExtractor()
+            for chunk in chunks:
+                extractor.feed(chunk)
+
+    timed("single pass, fed token by token", args.count, stream_all)
+
+    # Share of each response streamed before its command is available
+    available_at = []
+    for chunks in streams:
+        extractor = CommandStreamExtractor()
+        for index, chunk in enumerate(chunks, 1):
+            if extractor.feed(chunk):
+                available_at.append(index / len(chunks))
+                break
+    available_at.sort()
+    print(f"\ncommand available after {available_at[len(available_at) // 2]:.0%} of the response "
+          f"(median), {available_at[int(len(available_at) * 0.9)]:.0%} (p90)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+"""Learned intent classifier benchmark.
+
+Trains ``IntentClassifier`` on synthetic labelled requests, then compares it
+with the phrase-based ``IntentMatcher`` on held-out requests: accuracy, how
+many inputs each can handle without an LLM call, and batch throughput.
+Requests are scored separately for phrasings seen in training and for
+phrasings held out of it entirely.
+
+Usage:
+    python benchmarks/bench_intent_classifier.py --train 5000 --count 100000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from agents_system.integrations.intent_classifier import IntentClassifier
+from agents_system.integrations.intent_matcher import IntentMatcher
+
+INTENT_PATTERNS = {
+    "create_todo": ["create task", "add todo", "new task", "create todo", "add task"],
+    "list_todos": ["list tasks", "show todos", "display tasks", "get todos", "view tasks"],
+    "update_todo": ["update task", "change todo", "modify task", "edit todo"],
+    "create_note": ["create note", "add note", "new note", "write note"],
+    "create_ai_note": ["ai note", "generate note", "create ai note", "write content for me"],
+}
+
+# Phrasings users actually type, most of which contain no intent phrase
+TEMPLATES = {
+    "create_todo": [
+        "add task {topic}", "remind me to {topic}", "i need to {topic} by friday",
+        "put {topic} on my list", "create todo {topic} priority 2", "todo: {topic}",
+        "new task to {topic} #backend", "don't let me forget to {topic}",
+    ],
+    "list_todos": [
+        "show todos", "what's on my plate", "list tasks in progress",
+        "what do i have left for {topic}", "show me open items tagged {topic}",
+        "which tasks are blocked", "get todos for H1", "anything due on {topic}",
+    ],
+    "update_todo": [
+        "mark task 12 as done", "update task 7 status completed", "bump the priority of {topic}",
+        "change todo 3 to blocked", "move {topic} to H2", "set task 4 in-progress",
+        "edit todo 9 title {topic}", "close out the {topic} item",
+    ],
+    "create_note": [
+        "new note about {topic}", "jot down {topic}", "write note: {topic}",
+        "save this thought on {topic}", "take a note that {topic}", "record minutes for {topic}",
+        "add note {topic}", "keep a note of {topic}",
+    ],
+    "create_ai_note": [
+        "generate note summarizing {topic}", "write content for me about {topic}",
+        "draft an ai note on {topic}", "have the ai explain {topic}",
+        "ai note comparing {topic}", "let the model write up {topic}",
+        "auto-generate documentation for {topic}", "summarize {topic} into a note",
+    ],
+}
+
+TOPICS = [
+    "the deployment pipeline", "release notes", "vector database options", "fix the login bug",
+    "call the vendor", "quarterly planning", "refactor the cache layer", "onboarding docs",
+    "the ollama integration", "review pull requests", "benchmark results", "team offsite",
+]
+
+def make_examples(templates, count: int, rng: random.Random):
+    """Build labelled synthetic requests."""
+    intents = list(templates)
+    texts, labels = [], []
+    for _ in range(count):
+        intent = rng.choice(intents)
+        text = rng.choice(templates[intent]).format(topic=rng.choice(TOPICS))
+        texts.append(text.capitalize() if rng.random() < 0.5 else text)
+        labels.append(intent)
+    return texts, labels
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the learned intent classifier")
+    parser.add_argument("--train", type=int, default=5000, help="Training examples")
+    parser.add_argument("--count", type=int, default=100000, help="Held-out inputs to score")
+    parser.add_argument("--seed", type=int, default=3, help="Random seed")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # The last two phrasings of each intent are never trained on
+    seen = {intent: templates[:-2] for intent, templates in TEMPLATES.items()}
+    unseen = {intent: templates[-2:] for intent, templates in TEMPLATES.items()}
+    train_texts, train_labels = make_examples(seen, args.train, rng)
+
+    start = time.perf_counter()
+    classifier = IntentClassifier.train(train_texts, train_labels, intents=list(TEMPLATES))
+    print(f"trained on {args.train:,} examples in {time.perf_counter() - start:.2f}s, "
+          f"threshold {classifier.threshold:.3f}")
+
+    matcher = IntentMatcher(INTENT_PATTERNS)
+    for name, templates in (("seen phrasings", seen), ("unseen phrasings", unseen)):
+        texts, labels = make_examples(templates, args.count, rng)
+        print(f"{args.count:,} held-out inputs, {name}:")
+        run(texts, labels, "matcher", matcher.detect_many,
+            lambda predictions: [prediction if prediction[1] >= 0.6 else None for prediction in predictions])
+        run(texts, labels, "classifier", classifier.predict,
+            lambda predictions: classifier.classify(texts))
+
+def run(texts, labels, name, detect, trusted):
+    """Score inputs and print accuracy, LLM-free coverage and throughput."""
+    start = time.perf_counter()
+    predictions = detect(texts)
+    elapsed = time.perf_counter() - start
+
+    # Inputs the integration executes without an LLM call
+    handled = [(prediction[0], label) for prediction, label in zip(trusted(predictions), labels) if prediction]
+    accuracy = sum(intent == label for (intent, _), label in zip(predictions, labels)) / len(labels)
+    precision = f"{sum(intent == label for intent, label in handled) / len(handled):6.1%}" if handled else "   n/a"
+    print(f"  {name:<12} accuracy {accuracy:6.1%}  without LLM {len(handled) / len(labels):6.1%} "
+          f"(precision {precision})  {len(labels) / elapsed:10,.0f} inputs/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""Intent detection benchmark.
+
+Compares the Aho–Corasick ``IntentMatcher`` with the previous
+``detect_intent`` loop, which ran one substring check per pattern and stopped
+at the first hit. Runs with the default t2p intent patterns and with a large
+synthetic pattern set, and reports how often the two disagree.
+
+Usage:
+    python benchmarks/bench_intent_detection.py --count 1000000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from agents_system.integrations.intent_matcher import IntentMatcher
+
+DEFAULT_PATTERNS = {
+    "create_todo": ["create task", "add todo", "new task", "create todo", "add task"],
+    "list_todos": ["list tasks", "show todos", "display tasks", "get todos", "view tasks"],
+    "update_todo": ["update task", "change todo", "modify task", "edit todo"],
+    "create_note": ["create note", "add note", "new note", "write note"],
+    "create_ai_note": ["ai note", "generate note", "create ai note", "write content for me"],
+}
+
+FILLER = [
+    "please", "the", "deployment", "for", "tomorrow", "with", "priority 2", "H1",
+    "about", "release", "notes", "#backend", "quickly", "review", "meeting", "and",
+]
+
+def legacy_detect_intent(intent_patterns, user_input):
+    """The previous detect_intent implementation."""
+    user_input = user_input.lower()
+    for intent, patterns in intent_patterns.items():
+        for pattern in patterns:
+            if pattern in user_input:
+                confidence = len(pattern) / len(user_input)
+                return intent, min(confidence * 2, 0.95)
+    return None, 0.0
+
+def synthetic_patterns(intents: int, phrases: int, rng: random.Random):
+    """Build a large pattern set of two-word phrases."""
+    verbs = [f"verb{i}" for i in range(intents // 4 + 1)]
+    nouns = [f"noun{i}" for i in range(phrases * 4)]
+    return {
+        f"intent_{i}": [f"{rng.choice(verbs)} {rng.choice(nouns)}" for _ in range(phrases)]
+        for i in range(intents)
+    }
+
+def make_inputs(patterns, count: int, rng: random.Random):
+    """Build inputs that mostly contain one or two phrases among filler words."""
+    phrases = [phrase for values in patterns.values() for phrase in values]
+    inputs = []
+    for _ in range(count):
+        words = rng.sample(FILLER, rng.randint(2, 6))
+        for _ in range(rng.choice((0, 1, 1, 1, 2))):
+            words.insert(rng.randint(0, len(words)), rng.choice(phrases))
+        inputs.append(" ".join(words).capitalize())
+    return inputs
+
+def run(label: str, patterns, count: int, rng: random.Random) -> None:
+    """Time both implementations on the same inputs."""
+    inputs = make_inputs(patterns, count, rng)
+
+    start = time.perf_counter()
+    matcher = IntentMatcher(patterns)
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    legacy = [legacy_detect_intent(patterns, user_input) for user_input in inputs]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matched = matcher.detect_many(inputs)
+    matcher_time = time.perf_counter() - start
+
+    phrases = sum(len(values) for values in patterns.values())
+    changed = sum(1 for old, new in zip(legacy, matched) if old[0] != new[0])
+    print(f"{label}: {len(patterns)} intents, {phrases} phrases, {matcher.automaton.size} states, "
+          f"compiled in {compile_time * 1000:.1f}ms")
+    print(f"  {'substring loop':<16} {legacy_time:8.3f}s  {count / legacy_time:12,.0f} inputs/s")
+    print(f"  {'aho-corasick':<16} {matcher_time:8.3f}s  {count / matcher_time:12,.0f} inputs/s")
+    print(f"  best intent differs from first hit on {changed:,} inputs ({changed / count:.1%})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark intent detection")
+    parser.add_argument("--count", type=int, default=1000000, help="Inputs per run")
+    parser.add_argument("--intents", type=int, default=500, help="Intents in the large pattern set")
+    parser.add_argument("--phrases", type=int, default=10, help="Phrases per intent in the large set")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    run("default patterns", DEFAULT_PATTERNS, args.count, rng)
+    run("large pattern set", synthetic_patterns(args.intents, args.phrases, rng), args.count, rng)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""LLM response cache benchmark.
+
+Replays a stream of read-only requests, phrased with random casing,
+punctuation and filler words, through ``SemanticCache`` as the AI-T2P
+adapter uses it. Reports how many requests are answered at each cache level
+without an LLM call, how many semantic hits returned the command of a
+different request, and the lookup cost.
+
+Usage:
+    python benchmarks/bench_llm_response_cache.py --count 20000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from agents_system.utils.semantic_cache import SemanticCache
+
+# Requests and the command the LLM would answer with
+REQUESTS = {
+    "list my {horizon} tasks": "t2p todo list --horizon {horizon}",
+    "show blocked tasks": "t2p todo list --status blocked",
+    "show tasks in progress": "t2p todo list --status in-progress",
+    "list priority {priority} tasks": "t2p todo list --priority {priority}",
+    "show tasks tagged {tag}": 't2p todo list --tags "{tag}"',
+    "search tasks for {tag}": 't2p todo list --search "{tag}"',
+}
+
+HORIZONS = ["H1", "H2", "H3"]
+TAGS = ["backend", "frontend", "release", "docs", "infra", "ollama"]
+FILLERS = ["please", "can you", "now", "all", "me", "my", "the"]
+
+def make_request(rng: random.Random):
+    """Build a phrasing of a random request and its expected command."""
+    template = rng.choice(list(REQUESTS))
+    values = {"horizon": rng.choice(HORIZONS), "priority": rng.randint(1, 5), "tag": rng.choice(TAGS)}
+    words = template.format(**values).split()
+    for _ in range(rng.randint(0, 2)):
+        words.insert(rng.randint(0, len(words)), rng.choice(FILLERS))
+    text = " ".join(words)
+    if rng.random() < 0.5:
+        text = text.capitalize()
+    if rng.random() < 0.3:
+        text += rng.choice(["?", "!", "."])
+    return text, REQUESTS[template].format(**values)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the LLM response cache")
+    parser.add_argument("--count", type=int, default=20000, help="Requests to replay")
+    parser.add_argument("--max-entries", type=int, default=1024, help="Cache size")
+    parser.add_argument("--threshold", type=float, default=0.85, help="Semantic similarity threshold")
+    parser.add_argument("--seed", type=int, default=9, help="Random seed")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    requests = [make_request(rng) for _ in range(args.count)]
+    cache = SemanticCache(max_entries=args.max_entries, similarity_threshold=args.threshold)
+
+    levels = {"exact": 0, "semantic": 0, None: 0}
+    wrong = 0
+    start = time.perf_counter()
+    for text, command in requests:
+        cached = cache.lookup("command_generation", text)
+        if cached is None:
+            # The LLM would be called here
+            cache.set("command_generation", text, command)
+            levels[None] += 1
+            continue
+        levels[cached[1]] += 1
+        wrong += cached[0] != command
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.count:,} requests, {len(cache):,} cached responses, threshold {args.threshold}")
+    print(f"  exact hits    {levels['exact'] / args.count:6.1%}")
+    print(f"  semantic hits {levels['semantic'] / args.count:6.1%}  "
+          f"({wrong / max(levels['semantic'], 1):.2%} returned another request's command)")
+    print(f"  LLM calls     {levels[None] / args.count:6.1%}")
+    print(f"  {elapsed / args.count * 1e6:.1f}us per lookup and store")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""LLM strategy racing benchmark.
+
+Processes requests with ``AIT2PAdapter.process_user_input_with_llm`` against a
+simulated LLM with random latencies and failure rates, and compares the end
+to end latency with the previous sequential flow (direct command generation,
+then intent extraction, then pattern fallback). Commands run against the stub
+t2p worker.
+
+Usage:
+    python benchmarks/bench_llm_strategies.py --count 200
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from agents_system.integrations.t2p import T2PIntegration
+from agents_system.integrations.ai_t2p_adapter import AIT2PAdapter
+from agents_system.utils.semantic_cache import SemanticCache
+
+STUB_WORKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "t2p_stub_worker.py")
+
+REQUESTS = [
+    "what is on my plate today",
+    "which items are blocked",
+    "list tasks for the release",
+    "put the vendor call on my list",
+    "jot down the retro outcomes",
+]
+
+def make_llm(rng: random.Random, failure_rate: float):
+    """Build a simulated LLM call with random latency and failures."""
+    async def call(prompt: str) -> str:
+        await asyncio.sleep(rng.uniform(0.02, 0.12))
+        failed = rng.random() < failure_rate
+        if '"intent"' in prompt:
+            return json.dumps({"intent": "list_todos", "confidence": 0.3 if failed else 0.8, "parameters": {}})
+        return "I am not sure." if failed else "t2p todo list"
+    return call
+
+async def sequential(adapter: AIT2PAdapter, user_input: str, llm) -> dict:
+    """The previous strategy order: each strategy waits for the one before it."""
+    command_result = await adapter.generate_command_from_llm(user_input, llm)
+    if command_result["success"]:
+        return await adapter.t2p.execute_command_async(command_result["command"])
+    intent_result = await adapter.extract_intent_from_llm(user_input, llm)
+    if intent_result["success"] and intent_result["confidence"] >= 0.6:
+        command = adapter.t2p.generate_command(intent_result["intent"], intent_result["parameters"])
+        if command:
+            return await adapter.t2p.execute_command_async(command)
+    return await adapter.process_user_input_async(user_input)
+
+async def run(label: str, count: int, process) -> None:
+    """Process requests one after another and print latency percentiles."""
+    latencies = []
+    for index in range(count):
+        start = time.perf_counter()
+        await process(REQUESTS[index % len(REQUESTS)])
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    print(f"{label:<12} p50 {latencies[len(latencies) // 2] * 1000:7.1f}ms  "
+          f"p90 {latencies[int(len(latencies) * 0.9)] * 1000:7.1f}ms  "
+          f"mean {sum(latencies) / len(latencies) * 1000:7.1f}ms")
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark racing of LLM strategies")
+    parser.add_argument("--count", type=int, default=200, help="Requests to process")
+    parser.add_argument("--failure-rate", type=float, default=0.3, help="Share of failed LLM answers")
+    parser.add_argument("--seed", type=int, default=11, help="Random seed")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    # Caching would answer repeated requests without the simulated LLM
+    adapter = AIT2PAdapter(
+        T2PIntegration(t2p_path=STUB_WORKER, use_worker=True, result_cache_size=0),
+        response_cache=SemanticCache(max_entries=0)
+    )
+    try:
+        llm = make_llm(random.Random(args.seed), args.failure_rate)
+        await run("sequential", args.count, lambda user_input: sequential(adapter, user_input, llm))
+        llm = make_llm(random.Random(args.seed), args.failure_rate)
+        await run("raced", args.count, lambda user_input: adapter.process_user_input_with_llm(user_input, llm))
+        # Let cancelled strategies unwind before reading the counters
+        await asyncio.sleep(0)
+
+        print()
+        for name, stats in adapter.get_strategy_stats().items():
+            print(f"{name:<26} win rate {stats['win_rate']:6.1%}  cancelled {stats['cancelled']:4d}  "
+                  f"mean latency {stats['mean_latency'] * 1000:6.1f}ms")
+    finally:
+        adapter.t2p.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
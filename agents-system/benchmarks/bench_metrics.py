@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""Request metrics overhead benchmark.
+
+Compares the previous command history (a list prepended with ``insert(0)``
+and re-sliced past its limit) with the ring buffer, measures the cost of
+recording a request's phase times in ``LatencyHistogram``, and checks the
+histogram's percentile estimates against exact percentiles.
+
+Usage:
+    python benchmarks/bench_metrics.py --count 200000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from collections import deque
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from agents_system.utils.metrics import LatencyHistogram, request_timer, phase_timer
+
+def timed(label: str, count: int, function) -> None:
+    """Run a function and print the cost per operation."""
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<36} {elapsed / count * 1e9:8.0f}ns per request")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark request metrics overhead")
+    parser.add_argument("--count", type=int, default=200000, help="Requests to record")
+    parser.add_argument("--history", type=int, default=100, help="Command history size")
+    parser.add_argument("--seed", type=int, default=4, help="Random seed")
+    args = parser.parse_args()
+
+    entry = {"command": "t2p todo list", "success": True}
+
+    def list_history():
+        history = []
+        for _ in range(args.count):
+            history.insert(0, entry)
+            if len(history) > args.history:
+                history = history[:args.history]
+
+    def ring_history():
+        history = deque(maxlen=args.history)
+        for _ in range(args.count):
+            history.appendleft(entry)
+
+    timed("history, list insert and slice", args.count, list_history)
+    timed("history, ring buffer", args.count, ring_history)
+
+    rng = random.Random(args.seed)
+    # Log-normal latencies around 50ms with a long tail
+    durations = [rng.lognormvariate(-3, 0.8) for _ in range(args.count)]
+    histograms = {phase: LatencyHistogram() for phase in ("llm", "t2p", "total")}
+
+    def record():
+        for duration in durations:
+            for histogram in histograms.values():
+                histogram.record(duration)
+
+    def time_phases():
+        for _ in range(args.count):
+            with request_timer():
+                with phase_timer("llm"):
+                    pass
+
+    timed("record llm, t2p and total latency", args.count, record)
+    timed("request and phase timers", args.count, time_phases)
+
+    durations.sort()
+    histogram = histograms["total"]
+    print()
+    for percent in (50, 90, 99, 99.9):
+        exact = durations[min(len(durations) - 1, int(len(durations) * percent / 100))]
+        estimate = histogram.percentile(percent)
+        print(f"p{percent:<5} exact {exact * 1000:8.2f}ms  estimate {estimate * 1000:8.2f}ms  "
+              f"error {abs(estimate - exact) / exact:5.1%}")
+
+if __name__ == "__main__":
+    main()
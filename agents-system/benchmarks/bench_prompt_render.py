@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""Prompt rendering benchmark.
+
+Compares the previous render path (validate every variable, then
+``string.Template.substitute``) with the compiled ``PromptTemplate.render``
+and the ``render_many`` batch API.
+
+Usage:
+    python benchmarks/bench_prompt_render.py --count 50000
+"""
+
+import os
+import sys
+import time
+import argparse
+from string import Template
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from agents_system.utils.prompt_templates import get_template
+
+def legacy_render(template: Template, variables, **kwargs) -> str:
+    """Render the way PromptTemplate.render did before templates were compiled."""
+    for var in variables:
+        if var not in kwargs:
+            raise ValueError(f"Missing required variable '{var}' for prompt template")
+    return template.substitute(**kwargs)
+
+def timed(label: str, count: int, func) -> float:
+    """Run func once and print its throughput."""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.3f}s  {count / elapsed:12,.0f} prompts/s")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prompt rendering")
+    parser.add_argument("--count", type=int, default=50000, help="Prompts to render per run")
+    parser.add_argument("--template", default="task_planning", help="Template to render")
+    args = parser.parse_args()
+
+    template = get_template(args.template)
+    legacy_template = Template(template.template.template)
+    variable_sets = [
+        {var: f"{var} value {i}" for var in template.variables}
+        for i in range(args.count)
+    ]
+
+    # Both paths must produce identical prompts
+    assert legacy_render(legacy_template, template.variables, **variable_sets[0]) == \
+        template.render(**variable_sets[0])
+
+    print(f"Rendering {args.count:,} '{args.template}' prompts")
+    legacy = timed("Template.substitute", args.count, lambda: [
+        legacy_render(legacy_template, template.variables, **variables)
+        for variables in variable_sets
+    ])
+    compiled = timed("compiled render()", args.count, lambda: [
+        template.render(**variables) for variables in variable_sets
+    ])
+    batch = timed("render_many()", args.count, lambda: list(
+        template.render_many(variable_sets)
+    ))
+
+    print(f"\nrender() speedup:      {legacy / compiled:.1f}x")
+    print(f"render_many() speedup: {legacy / batch:.1f}x")
+
+if __name__ == "__main__":
+    main()
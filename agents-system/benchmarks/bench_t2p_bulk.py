@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""Bulk t2p write benchmark.
+
+Creates the same todos through ``T2PIntegration.execute_commands`` one
+command at a time and with bulk writes, which coalesces them into bulk
+imports (see ``t2p_batch``). Uses the stub in ``t2p_stub_worker.py``
+unless ``--t2p`` points at a real binary.
+
+Usage:
+    python benchmarks/bench_t2p_bulk.py --count 500
+"""
+
+import os
+import sys
+import time
+import argparse
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from agents_system.integrations.t2p import T2PIntegration
+
+STUB_WORKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "t2p_stub_worker.py")
+
+def timed(label: str, integration: T2PIntegration, commands) -> float:
+    """Execute the commands and print the throughput."""
+    start = time.perf_counter()
+    results = integration.execute_commands(commands)
+    elapsed = time.perf_counter() - start
+    integration.close()
+
+    failures = sum(1 for result in results if not result["success"])
+    batches = integration.write_coalescer.stats["batches"] if integration.write_coalescer else len(commands)
+    print(f"{label:<28} {elapsed:8.3f}s  {len(commands) / elapsed:10,.1f} todos/s  "
+          f"{batches:5} t2p calls  ({failures} failed)")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk t2p writes")
+    parser.add_argument("--count", type=int, default=500, help="Todos to create per run")
+    parser.add_argument("--batch-size", type=int, default=100, help="Maximum writes per bulk import")
+    parser.add_argument("--t2p", default=STUB_WORKER, help="t2p binary to run")
+    args = parser.parse_args()
+
+    commands = [
+        f't2p todo add --title "Step {i}" --description "Generated plan step" --priority 3 --horizon H1'
+        for i in range(args.count)
+    ]
+    print(f"Creating {args.count:,} todos with {args.t2p}")
+
+    timed("process per command", T2PIntegration(t2p_path=args.t2p, use_worker=False), commands)
+    timed("bulk import, no workers", T2PIntegration(
+        t2p_path=args.t2p, use_worker=False, bulk_writes=True, bulk_max_size=args.batch_size
+    ), commands)
+    timed("worker per command", T2PIntegration(t2p_path=args.t2p, use_worker=True), commands)
+    timed("bulk import, workers", T2PIntegration(
+        t2p_path=args.t2p, use_worker=True, bulk_writes=True, bulk_max_size=args.batch_size
+    ), commands)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""t2p command execution benchmark.
+
+Runs the same commands through ``T2PIntegration.execute_command`` with a new
+t2p process per command and with a pool of persistent workers, using the
+stub in ``t2p_stub_worker.py`` unless ``--t2p`` points at a real binary.
+
+Usage:
+    python benchmarks/bench_t2p_worker.py --count 200 --workers 4
+"""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from agents_system.integrations.t2p import T2PIntegration
+
+STUB_WORKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "t2p_stub_worker.py")
+
+def timed(label: str, integration: T2PIntegration, commands, threads: int) -> float:
+    """Execute the commands and print the throughput."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(integration.execute_command, commands))
+    elapsed = time.perf_counter() - start
+
+    failures = sum(1 for result in results if not result["success"])
+    print(f"{label:<24} {elapsed:8.3f}s  {len(commands) / elapsed:10,.1f} commands/s  ({failures} failed)")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark t2p command execution")
+    parser.add_argument("--count", type=int, default=200, help="Commands to execute per run")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes and client threads")
+    parser.add_argument("--t2p", default=STUB_WORKER, help="t2p binary to run")
+    args = parser.parse_args()
+
+    commands = [f't2p todo list --search "item {i}"' for i in range(args.count)]
+    print(f"Executing {args.count:,} commands with {args.t2p}")
+
+    one_shot = T2PIntegration(t2p_path=args.t2p, use_worker=False)
+    process = timed("process per command", one_shot, commands, args.workers)
+
+    pooled = T2PIntegration(t2p_path=args.t2p, use_worker=True, worker_pool_size=args.workers)
+    # Start the workers before timing
+    timed("worker warm-up", pooled, commands[:args.workers * 2], args.workers)
+    worker = timed("persistent workers", pooled, commands, args.workers)
+    pooled.close()
+
+    print(f"\nspeedup: {process / worker:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Stand-in for the t2p CLI, for benchmarking the t2p integration.
+
+Run with ``worker`` as the only argument to serve the JSON-lines worker
+protocol (see ``agents_system.integrations.t2p_worker``); run with any other
+arguments to behave like a one-shot t2p invocation. ``batch <file>`` and
+worker batch requests run every command of the batch (see
+``agents_system.integrations.t2p_batch``). Every command succeeds and echoes
+its arguments as JSON.
+"""
+
+import json
+import sys
+
+def run(argv):
+    """Execute one command, returning (exit_code, stdout, stderr)."""
+    return 0, json.dumps({"argv": argv, "success": True}), ""
+
+def run_batch(batch):
+    """Execute a batch of commands, returning one response per command."""
+    results = []
+    for argv in batch:
+        exit_code, stdout, stderr = run(argv)
+        results.append({"exit_code": exit_code, "stdout": stdout, "stderr": stderr})
+    return results
+
+def serve():
+    """Serve worker requests from stdin until it is closed."""
+    print(json.dumps({"ready": True}), flush=True)
+    for line in sys.stdin:
+        request = json.loads(line)
+        if "batch" in request:
+            print(json.dumps({"id": request["id"], "results": run_batch(request["batch"])}), flush=True)
+            continue
+        exit_code, stdout, stderr = run(request["argv"])
+        print(json.dumps({
+            "id": request["id"],
+            "exit_code": exit_code,
+            "stdout": stdout,
+            "stderr": stderr
+        }), flush=True)
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["worker"]:
+        serve()
+    elif sys.argv[1:2] == ["batch"]:
+        with open(sys.argv[2]) as f:
+            batch = [json.loads(line) for line in f if line.strip()]
+        print(json.dumps({"results": run_batch(batch)}))
+    else:
+        exit_code, stdout, stderr = run(sys.argv[1:])
+        sys.stdout.write(stdout)
+        sys.stderr.write(stderr)
+        sys.exit(exit_code)
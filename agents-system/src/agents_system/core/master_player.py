@@ -39,10 +39,12 @@ class MasterPlayer:
         # Initialize core components
         self.agent_manager = AgentManager()
         self.context_manager = ContextManager(
-            storage_dir=os.path.join(self.data_dir, "contexts")
+            storage_dir=os.path.join(self.data_dir, "contexts"),
+            event_log_options=self.config["event_log"]
         )
         self.prompt_engine = PromptEngine(
-            pattern_storage_path=os.path.join(self.data_dir, "prompt_patterns.json")
+            pattern_storage_path=os.path.join(self.data_dir, "prompt_patterns.json"),
+            templates_dir=self.config["prompt_templates_dir"]
         )
         
         # Ecosystem state
@@ -75,7 +77,12 @@ class MasterPlayer:
             "auto_takeover": True,
             "ownership_level": "complete",
             "prompt_templates_dir": os.path.join(self.data_dir, "templates"),
-            "logging_level": "INFO"
+            "logging_level": "INFO",
+            "event_log": {
+                "fsync": "interval",
+                "max_bytes": 64 * 1024 * 1024,
+                "compress": True
+            }
         }
         
         if not config_path or not os.path.exists(config_path):
@@ -146,6 +153,9 @@ class MasterPlayer:
             {"uptime_seconds": uptime}
         )
         
+        # Write out buffered events before giving up ownership
+        self.context_manager.close()
+        
         self.active = False
         logger.info(f"Master Player stopped. Uptime: {uptime:.2f} seconds")
     
@@ -1,13 +1,29 @@
 """Integration modules for the agent system."""
 
 from agents_system.integrations.t2p import T2PIntegration
-from agents_system.integrations.mcp import MCPIntegration
+from agents_system.integrations.t2p_worker import T2PWorkerPool
+from agents_system.integrations.t2p_batch import T2PWriteCoalescer
+from agents_system.integrations.intent_matcher import IntentMatcher
+from agents_system.integrations.intent_classifier import IntentClassifier
+from agents_system.integrations.command_extractor import CommandStreamExtractor
 from agents_system.integrations.ai_t2p_adapter import AIT2PAdapter
 from agents_system.integrations.model_context_provider import ModelContextProvider
 
 __all__ = [
     "T2PIntegration",
-    "MCPIntegration",
+    "T2PWorkerPool",
+    "T2PWriteCoalescer",
+    "IntentMatcher",
+    "IntentClassifier",
+    "CommandStreamExtractor",
     "AIT2PAdapter",
     "ModelContextProvider"
-] 
\ No newline at end of file
+]
+
+# The MCP module is not part of every checkout; the t2p integrations must
+# stay importable without it
+try:
+    from agents_system.integrations.mcp import MCPIntegration
+    __all__.append("MCPIntegration")
+except ImportError:
+    pass 
\ No newline at end of file
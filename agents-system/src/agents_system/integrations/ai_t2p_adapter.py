@@ -8,10 +8,19 @@ import os
 import re
 import json
 import time
+import shlex
+import asyncio
 import logging
-from typing import Dict, List, Optional, Any, Union, Tuple, Callable
+from typing import Dict, List, Optional, Any, Union, Tuple, Callable, AsyncIterable
 
 from agents_system.integrations.t2p import T2PIntegration
+from agents_system.utils.semantic_cache import SemanticCache, normalize_text
+from agents_system.utils.metrics import phase_timer
+from agents_system.integrations.command_extractor import (
+    COMMAND_LEAD_INS,
+    CommandStreamExtractor,
+    extract_commands
+)
 
 # Configure logging
 logging.basicConfig(
@@ -20,28 +29,30 @@ logging.basicConfig(
 )
 logger = logging.getLogger("ai-t2p-adapter")
 
+# Strategies raced by process_user_input_with_llm, in order of preference
+# when several are accepted at the same time
+LLM_STRATEGIES = ("pattern_match", "direct_command_generation", "intent_extraction")
+
 class AIT2PAdapter:
     """Adapter that connects AI models with the T2P integration."""
     
-    def __init__(self, t2p_integration: Optional[T2PIntegration] = None):
+    def __init__(self, t2p_integration: Optional[T2PIntegration] = None,
+                 response_cache: Optional[SemanticCache] = None):
         """Initialize the AI-T2P adapter.
         
         Args:
             t2p_integration: T2P integration instance. If None, creates a new one.
+            response_cache: Cache of LLM responses by user input. If None, an
+                            in-memory cache is created.
         """
         self.t2p = t2p_integration or T2PIntegration()
+        self.response_cache = response_cache if response_cache is not None else SemanticCache()
         
         # Confidence threshold for auto-execution
         self.auto_execution_threshold = 0.85
         
-        # Command suggestion patterns from AI outputs
-        self.command_suggestion_patterns = [
-            r"You can use the command:\s*`(t2p .+?)`",
-            r"Run\s*`(t2p .+?)`",
-            r"Execute\s*`(t2p .+?)`",
-            r"Command:\s*`(t2p .+?)`",
-            r"t2p command:\s*`(t2p .+?)`",
-        ]
+        # Phrases that introduce a backtick-quoted command in AI outputs
+        self.command_lead_ins = list(COMMAND_LEAD_INS)
         
         # LLM prompt templates for command generation
         self.prompt_templates = {
@@ -83,6 +94,17 @@ Respond with the JSON only, no explanation.
         # Tracking for recently suggested commands
         self.recent_suggestions = []
         self.max_suggestions_history = 10
+        
+        # Pattern matches at least this confident are used without waiting
+        # for the LLM strategies
+        self.pattern_win_threshold = 0.85
+        
+        # Outcomes and latencies of the strategies raced by
+        # process_user_input_with_llm
+        self.strategy_stats = {
+            name: {"runs": 0, "completed": 0, "accepted": 0, "wins": 0, "cancelled": 0, "total_latency": 0.0}
+            for name in LLM_STRATEGIES
+        }
     
     def extract_command_from_ai_output(self, ai_output: str) -> Optional[str]:
         """Extract T2P command from AI model output if present.
@@ -91,24 +113,28 @@ Respond with the JSON only, no explanation.
             ai_output: The output text from an AI model
             
         Returns:
-            Extracted command string or None if no command found
+            The first command in the output, or None if no command found
+        """
+        commands = extract_commands(ai_output, self.command_lead_ins)
+        return commands[0] if commands else None
+    
+    def create_command_extractor(self) -> CommandStreamExtractor:
+        """Create an extractor for commands in streamed AI output.
+        
+        Returns:
+            Extractor to feed output chunks to as they arrive
         """
-        # Check for command suggestions using regex patterns
-        for pattern in self.command_suggestion_patterns:
-            matches = re.search(pattern, ai_output, re.IGNORECASE)
-            if matches:
-                command = matches.group(1).strip()
-                # Verify it's a t2p command
-                if command.startswith("t2p "):
-                    return command
-        
-        return None
+        return CommandStreamExtractor(self.command_lead_ins)
     
     async def generate_command_from_llm(self, 
                                   user_input: str, 
                                   llm_call_function: Callable[[str], str]) -> Dict[str, Any]:
         """Generate a T2P command using an LLM for better intent understanding.
         
+        Responses are cached by user input. Responses to similar input are
+        only reused for read-only commands whose argument values all appear
+        in the input.
+        
         Args:
             user_input: Natural language input from the user
             llm_call_function: Async function that calls an LLM with a prompt and returns response
@@ -122,19 +148,28 @@ Respond with the JSON only, no explanation.
         )
         
         try:
-            # Call LLM
-            llm_response = await llm_call_function(prompt)
+            # Call LLM unless the response is cached
+            llm_response, cache_level = await self._call_llm_cached(
+                "command_generation", user_input, prompt, llm_call_function,
+                self._command_argument_values
+            )
             
             # Extract command
             command = llm_response.strip().replace('`', '').strip()
             
             # Check if it's a valid t2p command
             if command.startswith("t2p "):
+                if cache_level is None:
+                    self.response_cache.set(
+                        "command_generation", user_input, llm_response,
+                        reusable=self.t2p.is_read_only_command(command)
+                    )
                 return {
                     "success": True,
                     "command": command,
                     "source": "llm",
-                    "confidence": 0.9  # Assuming high confidence for LLM-generated commands
+                    "confidence": 0.9,  # Assuming high confidence for LLM-generated commands
+                    "cache": cache_level
                 }
             else:
                 return {
@@ -155,6 +190,10 @@ Respond with the JSON only, no explanation.
                                llm_call_function: Callable[[str], str]) -> Dict[str, Any]:
         """Extract intent and parameters using an LLM for better understanding.
         
+        Responses are cached by user input. Responses to similar input are
+        only reused if the extracted intent maps to a read-only command and
+        all parameter values appear in the input.
+        
         Args:
             user_input: Natural language input from the user
             llm_call_function: Async function that calls an LLM with a prompt and returns response
@@ -168,17 +207,29 @@ Respond with the JSON only, no explanation.
         )
         
         try:
-            # Call LLM
-            llm_response = await llm_call_function(prompt)
+            # Call LLM unless the response is cached
+            llm_response, cache_level = await self._call_llm_cached(
+                "intent_extraction", user_input, prompt, llm_call_function,
+                self._intent_argument_values
+            )
             
             # Parse JSON response
             try:
                 parsed = json.loads(llm_response.strip())
+                intent = parsed.get("intent")
+                parameters = parsed.get("parameters", {})
+                if cache_level is None:
+                    command = self.t2p.generate_command(intent, parameters) if intent else None
+                    self.response_cache.set(
+                        "intent_extraction", user_input, llm_response,
+                        reusable=bool(command) and self.t2p.is_read_only_command(command)
+                    )
                 return {
                     "success": True,
-                    "intent": parsed.get("intent"),
+                    "intent": intent,
                     "confidence": parsed.get("confidence", 0.0),
-                    "parameters": parsed.get("parameters", {})
+                    "parameters": parameters,
+                    "cache": cache_level
                 }
             except json.JSONDecodeError:
                 return {
@@ -194,6 +245,100 @@ Respond with the JSON only, no explanation.
                 "error": str(e)
             }
     
+    async def _call_llm_cached(self,
+                               prompt_name: str,
+                               user_input: str,
+                               prompt: str,
+                               llm_call_function: Callable[[str], str],
+                               argument_values: Callable[[str], Optional[List[str]]]) -> Tuple[str, Optional[str]]:
+        """Get the cached LLM response for user input, or call the LLM.
+        
+        A response cached for similar input is only reused if every argument
+        value in it appears in the input, so inputs that differ in a tag,
+        status or search term never share a response.
+        
+        Fresh responses are not cached here, since only the caller can
+        validate them. Time spent waiting for the LLM counts as "llm" time
+        of the request being timed.
+        
+        Args:
+            prompt_name: Name of the prompt template, used as cache namespace
+            user_input: Natural language input from the user
+            prompt: Prompt built from the template and user input
+            llm_call_function: Async function that calls an LLM with a prompt and returns response
+            argument_values: Function that returns the argument values of a
+                             response, or None if they cannot be determined
+            
+        Returns:
+            Tuple of (response, "exact" or "semantic" for cached responses,
+            otherwise None)
+        """
+        input_words = set(normalize_text(user_input).split())
+        
+        def fits_input(response: str) -> bool:
+            values = argument_values(response)
+            return values is not None and all(
+                set(normalize_text(value).split()) <= input_words for value in values
+            )
+        
+        cached = self.response_cache.lookup(prompt_name, user_input, accept=fits_input)
+        if cached is not None:
+            return cached
+        
+        # Calls cancelled by a faster strategy count up to cancellation
+        with phase_timer("llm"):
+            return await llm_call_function(prompt), None
+    
+    @staticmethod
+    def _command_argument_values(response: str) -> Optional[List[str]]:
+        """Get the argument values of a generated command.
+        
+        Args:
+            response: LLM response holding a t2p command
+            
+        Returns:
+            Values after the command and subcommand names, without option
+            names, or None if the command cannot be parsed
+        """
+        try:
+            words = shlex.split(response.strip().replace('`', '').strip())
+        except ValueError:
+            return None
+        # "t2p", the command group and the subcommand name the command
+        return [word for word in words[3:] if not word.startswith("-")]
+    
+    @staticmethod
+    def _intent_argument_values(response: str) -> Optional[List[str]]:
+        """Get the parameter values of an extracted intent.
+        
+        Args:
+            response: LLM response holding the intent as JSON
+            
+        Returns:
+            Parameter values as strings, without flags, or None if the
+            response cannot be parsed
+        """
+        try:
+            parameters = json.loads(response.strip()).get("parameters", {})
+            values = []
+            for value in parameters.values():
+                values.extend(value if isinstance(value, list) else [value])
+        except (ValueError, AttributeError):
+            return None
+        return [str(value) for value in values if value is not None and not isinstance(value, bool)]
+    
+    def get_response_cache_stats(self) -> Dict[str, Any]:
+        """Get LLM response cache statistics.
+        
+        Returns:
+            Dict with cache size, hit counters per level and hit rate
+        """
+        return self.response_cache.get_stats()
+    
+    def close(self) -> None:
+        """Save the LLM response cache."""
+        self.response_cache.close()
+    
     def process_user_input(self, user_input: str) -> Dict[str, Any]:
         """Process user input using pattern-based intent detection.
         
@@ -208,11 +353,30 @@ Respond with the JSON only, no explanation.
         """
         return self.t2p.process_natural_language(user_input)
     
+    async def process_user_input_async(self, user_input: str) -> Dict[str, Any]:
+        """Process user input using pattern-based intent detection, without
+        blocking the event loop.
+        
+        Args:
+            user_input: Natural language input from the user
+            
+        Returns:
+            Dict with processing result
+        """
+        return await self.t2p.process_natural_language_async(user_input)
+    
     async def process_user_input_with_llm(self, 
                                    user_input: str, 
                                    llm_call_function: Callable[[str], str]) -> Dict[str, Any]:
         """Process user input with LLM assistance for better intent understanding.
         
+        A confident classifier or pattern match is executed without calling
+        the LLM; the result of a classified command is returned even if it
+        failed. Otherwise direct command generation and intent extraction
+        run concurrently: the first plan that passes validation is executed
+        and the other strategy is cancelled. If neither succeeds, a less
+        confident pattern match is used as a fallback.
+        
         Args:
             user_input: Natural language input from the user
             llm_call_function: Async function that calls an LLM with a prompt and returns response
@@ -220,51 +384,63 @@ Respond with the JSON only, no explanation.
         Returns:
             Dict with processing result
         """
-        # First try direct command generation
-        command_result = await self.generate_command_from_llm(user_input, llm_call_function)
+        # Skip the LLM when the learned intent classifier is confident. Once
+        # its command has run, the result is final: retrying could repeat a
+        # failed write
+        if self.t2p.classify_intent(user_input) is not None:
+            classifier_result = await self.process_user_input_async(user_input)
+            if "command" in classifier_result:
+                return {
+                    **classifier_result,
+                    "method": "intent_classifier"
+                }
         
-        if command_result["success"]:
-            # Execute the generated command
-            execution_result = self.t2p.execute_command(command_result["command"])
-            
+        # The pattern path is cheap enough to finish before an LLM request
+        # could even be sent, so it runs first and only a confident match
+        # skips the LLM. The classifier has been consulted already
+        started = time.perf_counter()
+        pattern_plan = self.t2p.plan_natural_language(user_input, use_classifier=False)
+        pattern_accepted = (
+            "command" in pattern_plan and pattern_plan["confidence"] >= self.pattern_win_threshold
+        )
+        self._record_strategy("pattern_match", time.perf_counter() - started, pattern_accepted)
+        if pattern_accepted:
+            self.strategy_stats["pattern_match"]["wins"] += 1
+            execution_result = await self.t2p.execute_command_async(pattern_plan["command"])
+            return {
+                "success": execution_result.get("success", False),
+                **pattern_plan,
+                "result": execution_result,
+                "method": "pattern_match"
+            }
+        
+        # Race both LLM strategies; the first accepted plan is executed
+        winner = await self._race_strategies({
+            "direct_command_generation": self._plan_with_llm_command(user_input, llm_call_function),
+            "intent_extraction": self._plan_with_llm_intent(user_input, llm_call_function),
+        })
+        
+        if winner is not None:
+            method, plan = winner
+            execution_result = await self.t2p.execute_command_async(plan["command"])
             return {
                 "success": execution_result["success"],
-                "command": command_result["command"],
-                "command_source": "llm",
+                **plan,
                 "execution_result": execution_result,
-                "method": "direct_command_generation"
+                "method": method
             }
-            
-        # If direct command generation fails, try intent extraction
-        intent_result = await self.extract_intent_from_llm(user_input, llm_call_function)
         
-        if intent_result["success"] and intent_result["confidence"] >= 0.6:
-            # Generate command from extracted intent
-            command = self.t2p.generate_command(intent_result["intent"], intent_result["parameters"])
-            
-            if command:
-                # Execute the generated command
-                execution_result = self.t2p.execute_command(command)
-                
+        # If both approaches fail, fall back to the less confident pattern match
+        if "command" in pattern_plan:
+            execution_result = await self.t2p.execute_command_async(pattern_plan["command"])
+            if execution_result.get("success", False):
                 return {
-                    "success": execution_result["success"],
-                    "command": command,
-                    "intent": intent_result["intent"],
-                    "parameters": intent_result["parameters"],
-                    "confidence": intent_result["confidence"],
-                    "execution_result": execution_result,
-                    "method": "intent_extraction"
+                    "success": True,
+                    **pattern_plan,
+                    "result": execution_result,
+                    "method": "pattern_fallback"
                 }
         
-        # If both approaches fail, fall back to pattern-based processing
-        fallback_result = self.process_user_input(user_input)
-        
-        if fallback_result["success"]:
-            return {
-                **fallback_result,
-                "method": "pattern_fallback"
-            }
-        
         # If all approaches fail, return failure
         return {
             "success": False,
@@ -273,6 +449,120 @@ Respond with the JSON only, no explanation.
             "user_input": user_input
         }
     
+    async def _plan_with_llm_command(self,
+                                     user_input: str,
+                                     llm_call_function: Callable[[str], str]) -> Optional[Dict[str, Any]]:
+        """Plan a command by asking the LLM for it directly.
+        
+        Returns:
+            Dict with the command, or None if the LLM gave no valid command
+        """
+        command_result = await self.generate_command_from_llm(user_input, llm_call_function)
+        if not command_result["success"]:
+            return None
+        return {"command": command_result["command"], "command_source": "llm"}
+    
+    async def _plan_with_llm_intent(self,
+                                    user_input: str,
+                                    llm_call_function: Callable[[str], str]) -> Optional[Dict[str, Any]]:
+        """Plan a command from the intent and parameters extracted by the LLM.
+        
+        Returns:
+            Dict with the command, intent, parameters and confidence, or None
+            if the intent is uncertain or no command could be generated
+        """
+        intent_result = await self.extract_intent_from_llm(user_input, llm_call_function)
+        if not intent_result["success"] or intent_result["confidence"] < 0.6:
+            return None
+        
+        command = self.t2p.generate_command(intent_result["intent"], intent_result["parameters"])
+        if not command:
+            return None
+        
+        return {
+            "command": command,
+            "intent": intent_result["intent"],
+            "parameters": intent_result["parameters"],
+            "confidence": intent_result["confidence"]
+        }
+    
+    async def _race_strategies(self, strategies: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Run planning strategies concurrently and return the first accepted plan.
+        
+        Strategies still running when a plan is accepted are cancelled.
+        
+        Args:
+            strategies: Dict mapping strategy names to coroutines that return
+                        a plan, or None if the strategy failed
+            
+        Returns:
+            Tuple of (strategy name, plan), or None if no strategy succeeded
+        """
+        started = time.perf_counter()
+        tasks = {asyncio.ensure_future(coroutine): name for name, coroutine in strategies.items()}
+        pending = set(tasks)
+        
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                
+                accepted = []
+                for task in done:
+                    name = tasks[task]
+                    plan = None
+                    if task.exception() is not None:
+                        logger.error(f"Strategy {name} failed: {task.exception()}")
+                    else:
+                        plan = task.result()
+                    self._record_strategy(name, time.perf_counter() - started, plan is not None)
+                    if plan is not None:
+                        accepted.append((LLM_STRATEGIES.index(name), name, plan))
+                
+                if accepted:
+                    _, name, plan = min(accepted, key=lambda item: item[0])
+                    self.strategy_stats[name]["wins"] += 1
+                    return name, plan
+            
+            return None
+        
+        finally:
+            for task in pending:
+                task.cancel()
+                self.strategy_stats[tasks[task]]["runs"] += 1
+                self.strategy_stats[tasks[task]]["cancelled"] += 1
+    
+    def _record_strategy(self, name: str, latency: float, accepted: bool) -> None:
+        """Record a completed strategy run.
+        
+        Args:
+            name: Strategy name
+            latency: Seconds from the start of the race to completion
+            accepted: Whether the strategy produced an accepted plan
+        """
+        stats = self.strategy_stats[name]
+        stats["runs"] += 1
+        stats["completed"] += 1
+        stats["total_latency"] += latency
+        if accepted:
+            stats["accepted"] += 1
+    
+    def get_strategy_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get win rates and latencies of the strategies raced by
+        `process_user_input_with_llm`.
+        
+        Returns:
+            Dict mapping strategy names to their counters, win rate and mean
+            latency of completed runs
+        """
+        return {
+            name: {
+                **stats,
+                "win_rate": stats["wins"] / stats["runs"] if stats["runs"] else 0.0,
+                "mean_latency": stats["total_latency"] / stats["completed"] if stats["completed"] else 0.0
+            }
+            for name, stats in self.strategy_stats.items()
+        }
+    
     def process_ai_output(self, ai_output: str) -> Dict[str, Any]:
         """Process AI model output to extract and execute T2P commands.
         
@@ -305,6 +595,53 @@ Respond with the JSON only, no explanation.
             "ai_output": ai_output
         }
     
+    async def process_ai_stream(self, chunks: AsyncIterable[str]) -> Dict[str, Any]:
+        """Process streamed AI model output to extract and execute a T2P command.
+        
+        The first command is executed as soon as its closing backtick has
+        streamed in, while the rest of the output is still being consumed.
+        
+        Args:
+            chunks: Async iterable of output text chunks
+            
+        Returns:
+            Dict with processing result, like `process_ai_output`
+        """
+        extractor = self.create_command_extractor()
+        parts = []
+        execution = None
+        
+        try:
+            async for chunk in chunks:
+                parts.append(chunk)
+                if extractor.feed(chunk) and execution is None:
+                    self._add_suggestion(extractor.first_command)
+                    execution = asyncio.ensure_future(
+                        self.t2p.execute_command_async(extractor.first_command)
+                    )
+        except Exception:
+            # A started command is not undone by the stream failing; wait
+            # for it before reporting the failure
+            if execution is not None:
+                await execution
+            raise
+        
+        ai_output = "".join(parts)
+        if execution is None:
+            return {
+                "success": False,
+                "error": "No T2P command found in AI output",
+                "ai_output": ai_output
+            }
+        
+        result = await execution
+        return {
+            "success": result["success"],
+            "command": extractor.first_command,
+            "execution_result": result,
+            "ai_output": ai_output
+        }
+    
     def suggest_commands(self, user_input: str, max_suggestions: int = 3) -> List[Dict[str, Any]]:
         """Generate command suggestions based on user input without executing them.
         
@@ -315,12 +652,12 @@ Respond with the JSON only, no explanation.
         Returns:
             List of command suggestion objects
         """
-        # Process the input to get intent and parameters
-        process_result = self.t2p.process_natural_language(user_input)
+        # Plan the input to get intent and parameters; nothing is executed
+        process_result = self.t2p.plan_natural_language(user_input)
         
         suggestions = []
         
-        if process_result["success"]:
+        if "command" in process_result:
             # Add the main suggestion
             main_suggestion = {
                 "command": process_result["command"],
@@ -0,0 +1,122 @@
+"""Extraction of t2p commands from AI model output.
+
+A command is a backtick-quoted ``t2p ...`` string on one line that follows a
+lead-in such as "Run" or "Command:" (case-insensitive, optionally followed by
+whitespace). Output is scanned for the literal opening "`t2p " and only those
+candidates are checked for a lead-in, so a single pass finds the commands
+for all lead-ins. Output can be fed in chunks as it streams from the model:
+each command is reported as soon as its closing backtick arrives.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+# Phrases that introduce a suggested command, matched case-insensitively
+COMMAND_LEAD_INS = (
+    "You can use the command:",
+    "t2p command:",
+    "Command:",
+    "Run",
+    "Execute",
+)
+
+_OPENING = "`t2p "
+
+def _scan(text: str, lead_ins: Tuple[str, ...], lead_in_length: int) -> Tuple[List[str], int, Optional[int]]:
+    """Find the complete commands in a text.
+    
+    Args:
+        text: Text to scan.
+        lead_ins: Lowercase lead-in phrases.
+        lead_in_length: Length of the longest lead-in.
+    
+    Returns:
+        Tuple of (commands, end of the last command, start of the lead-in of
+        a command that is still open at the end of the text, or None)
+    """
+    commands = []
+    consumed = 0
+    position = 0
+    while True:
+        start = text.find(_OPENING, position)
+        if start < 0:
+            return commands, consumed, None
+        position = start + 1
+        
+        # The lead-in ends where the whitespace before the backtick begins
+        lead_in_end = start
+        while lead_in_end > consumed and text[lead_in_end - 1].isspace():
+            lead_in_end -= 1
+        preceding = text[max(consumed, lead_in_end - lead_in_length):lead_in_end].lower()
+        if not preceding.endswith(lead_ins):
+            continue
+        
+        end = text.find("`", start + len(_OPENING))
+        line_end = text.find("\n", start + len(_OPENING), end if end >= 0 else len(text))
+        if line_end >= 0:
+            continue
+        if end < 0:
+            return commands, consumed, max(consumed, lead_in_end - lead_in_length)
+        
+        command = text[start + 1:end].strip()
+        if end > start + len(_OPENING) and command.startswith("t2p "):
+            commands.append(command)
+            consumed = position = end + 1
+
+class CommandStreamExtractor:
+    """Finds t2p commands in AI output fed chunk by chunk."""
+    
+    def __init__(self, lead_ins: Sequence[str] = COMMAND_LEAD_INS):
+        """Initialize the extractor.
+        
+        Args:
+            lead_ins: Phrases that introduce a command.
+        """
+        self._lead_ins = tuple(lead_in.lower() for lead_in in lead_ins)
+        self._lead_in_length = max(len(lead_in) for lead_in in lead_ins)
+        # Output after the last command that a later chunk may complete
+        # into a command
+        self._buffer = ""
+        self.commands: List[str] = []
+    
+    def feed(self, chunk: str) -> List[str]:
+        """Consume the next chunk of output.
+        
+        Args:
+            chunk: Output text following the previous chunk.
+        
+        Returns:
+            Commands completed by this chunk, in order of appearance.
+        """
+        buffer = self._buffer + chunk
+        found, consumed, open_start = _scan(buffer, self._lead_ins, self._lead_in_length)
+        
+        # Keep a possibly split opening and enough text before it for its
+        # lead-in, or all of a command that is still open
+        keep_from = len(buffer) - len(_OPENING) + 1
+        while keep_from > 0 and buffer[keep_from - 1].isspace():
+            keep_from -= 1
+        keep_from = max(consumed, keep_from - self._lead_in_length)
+        if open_start is not None:
+            keep_from = min(keep_from, open_start)
+        self._buffer = buffer[keep_from:]
+        
+        self.commands.extend(found)
+        return found
+    
+    @property
+    def first_command(self) -> Optional[str]:
+        """The first command found so far, if any."""
+        return self.commands[0] if self.commands else None
+
+def extract_commands(text: str, lead_ins: Sequence[str] = COMMAND_LEAD_INS) -> List[str]:
+    """Find every t2p command in a complete AI output.
+    
+    Args:
+        text: AI model output.
+        lead_ins: Phrases that introduce a command.
+    
+    Returns:
+        Commands in order of appearance.
+    """
+    lead_ins = tuple(lead_in.lower() for lead_in in lead_ins)
+    return _scan(text, lead_ins, max(len(lead_in) for lead_in in lead_ins))[0]
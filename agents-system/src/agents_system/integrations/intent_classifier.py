@@ -0,0 +1,409 @@
+"""Learned intent classifier for natural language t2p input.
+
+A multinomial logistic regression over hashed word and character n-grams,
+trained from labelled examples and from the command history of
+`ModelContextProvider`. Inputs are featurized into sparse hashed indices,
+so scoring a batch is a single sparse-by-dense matrix product with the
+weight matrix. A confidence threshold is calibrated on held-out examples,
+so callers know when a prediction can be trusted and when an LLM should
+be asked instead. Predictions for inputs made mostly of n-grams never seen
+in training are not trusted either, since a linear model can be confidently
+wrong on phrasing unlike anything it learned from.
+
+Requires NumPy.
+"""
+
+import json
+import logging
+import random
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple, Any, Iterable, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger("intent-classifier")
+
+_WORD_PATTERN = re.compile(r"[a-z0-9#]+")
+
+# Leading command arguments and the intent they implement
+COMMAND_INTENTS = (
+    (("note", "new", "--ai"), "create_ai_note"),
+    (("todo", "add"), "create_todo"),
+    (("todo", "list"), "list_todos"),
+    (("todo", "update"), "update_todo"),
+    (("note", "new"), "create_note"),
+)
+
+def intent_from_command(command: str) -> Optional[str]:
+    """Infer the intent a t2p command implements.
+    
+    Args:
+        command: Command string, e.g. ``t2p todo add --title "..."``
+    
+    Returns:
+        Intent name, or None if the command matches no known intent
+    """
+    words = command.split()
+    if words and words[0] == "t2p":
+        words = words[1:]
+    
+    for prefix, intent in COMMAND_INTENTS:
+        if tuple(words[:2]) == prefix[:2] and all(arg in words for arg in prefix[2:]):
+            return intent
+    return None
+
+class IntentClassifier:
+    """Hashed n-gram linear intent classifier."""
+    
+    def __init__(self, intents: Sequence[str], n_features: int = 2 ** 15,
+                 char_ngram: int = 3, threshold: float = 0.9, min_coverage: float = 0.7):
+        """Initialize an untrained classifier.
+        
+        Args:
+            intents: Intent names (class labels).
+            n_features: Size of the hashed feature space.
+            char_ngram: Length of the character n-grams taken from each word.
+                        0 disables character features.
+            threshold: Confidence at or above which a prediction is trusted.
+                       Replaced by `calibrate`.
+            min_coverage: Fraction of an input's features that must have
+                          been seen in training for its prediction to be trusted.
+        
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        if np is None:
+            raise ImportError("IntentClassifier requires numpy")
+        
+        self.intents = list(intents)
+        self._intent_index = {intent: index for index, intent in enumerate(self.intents)}
+        self.n_features = n_features
+        self.char_ngram = char_ngram
+        self.threshold = threshold
+        self.min_coverage = min_coverage
+        # Feature 0 is a bias feature present in every input
+        self.weights = np.zeros((n_features, len(self.intents)), dtype=np.float32)
+        self.known = np.zeros(n_features, dtype=bool)
+        self.known[0] = True
+    
+    def featurize(self, text: str) -> List[int]:
+        """Hash the n-grams of a text into feature indices.
+        
+        Args:
+            text: Input text.
+        
+        Returns:
+            Sorted, unique feature indices, starting with the bias feature 0
+        """
+        words = _WORD_PATTERN.findall(text.lower())
+        grams = [f"w:{word}" for word in words]
+        grams.extend(f"b:{first} {second}" for first, second in zip(words, words[1:]))
+        
+        size = self.char_ngram
+        if size:
+            for word in words:
+                padded = f" {word} "
+                grams.extend(f"c:{padded[i:i + size]}" for i in range(len(padded) - size + 1))
+        
+        buckets = self.n_features - 1
+        indices = {1 + zlib.crc32(gram.encode("utf-8")) % buckets for gram in grams}
+        return [0] + sorted(indices)
+    
+    def _encode(self, texts: Iterable[str]) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Featurize texts into a sparse (CSR-style) batch.
+        
+        Returns:
+            Flat feature indices of all texts, and the offset of each text's
+            first index
+        """
+        features = [self.featurize(text) for text in texts]
+        offsets = np.zeros(len(features), dtype=np.int64)
+        if features:
+            offsets[1:] = np.cumsum([len(indices) for indices in features[:-1]])
+        flat = np.fromiter((index for indices in features for index in indices), dtype=np.int64)
+        return flat, offsets
+    
+    def _logits(self, flat: "np.ndarray", offsets: "np.ndarray") -> "np.ndarray":
+        """Multiply a sparse batch by the weight matrix."""
+        if not len(offsets):
+            return np.zeros((0, len(self.intents)), dtype=np.float32)
+        return np.add.reduceat(self.weights[flat], offsets, axis=0)
+    
+    @staticmethod
+    def _softmax(logits: "np.ndarray") -> "np.ndarray":
+        """Row-wise softmax."""
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return exp / exp.sum(axis=1, keepdims=True)
+    
+    def _score(self, texts: Sequence[str], batch_size: int) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Compute intent probabilities and feature coverage of texts."""
+        probabilities = []
+        coverage = []
+        for start in range(0, len(texts), batch_size):
+            flat, offsets = self._encode(texts[start:start + batch_size])
+            probabilities.append(self._softmax(self._logits(flat, offsets)))
+            
+            # Share of non-bias features seen in training
+            lengths = np.diff(np.append(offsets, len(flat)))
+            seen = np.add.reduceat(self.known[flat].astype(np.float32), offsets)
+            coverage.append(np.where(lengths > 1, (seen - 1) / np.maximum(lengths - 1, 1), 0.0))
+        
+        if not probabilities:
+            return np.zeros((0, len(self.intents)), dtype=np.float32), np.zeros(0)
+        return np.concatenate(probabilities), np.concatenate(coverage)
+    
+    def predict_proba(self, texts: Sequence[str], batch_size: int = 8192) -> "np.ndarray":
+        """Score texts against every intent.
+        
+        Args:
+            texts: Input texts.
+            batch_size: Texts scored per matrix product, bounding memory use.
+        
+        Returns:
+            Array of shape (len(texts), len(intents)) with intent probabilities
+        """
+        return self._score(texts, batch_size)[0]
+    
+    def _best(self, probabilities: "np.ndarray") -> List[Tuple[str, float]]:
+        """Pick the most likely intent of each row of probabilities."""
+        best = probabilities.argmax(axis=1)
+        confidences = probabilities[np.arange(len(best)), best]
+        return [(self.intents[index], float(confidence)) for index, confidence in zip(best, confidences)]
+    
+    def predict(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        """Predict the most likely intent of each text.
+        
+        Args:
+            texts: Input texts.
+        
+        Returns:
+            List of (intent_name, confidence_score), in input order
+        """
+        return self._best(self.predict_proba(texts))
+    
+    def predict_one(self, text: str) -> Tuple[str, float]:
+        """Predict the most likely intent of a single text.
+        
+        Args:
+            text: Input text.
+        
+        Returns:
+            Tuple of (intent_name, confidence_score)
+        """
+        return self.predict([text])[0]
+    
+    def classify(self, texts: Sequence[str]) -> List[Optional[Tuple[str, float]]]:
+        """Predict intents, keeping only predictions that can be trusted.
+        
+        A prediction is trusted if its confidence reaches `threshold` and at
+        least `min_coverage` of the input's features were seen in training.
+        
+        Args:
+            texts: Input texts.
+        
+        Returns:
+            List of (intent_name, confidence_score), or None where the
+            prediction is not trusted, in input order
+        """
+        probabilities, coverage = self._score(texts, 8192)
+        return [
+            prediction if prediction[1] >= self.threshold and covered >= self.min_coverage else None
+            for prediction, covered in zip(self._best(probabilities), coverage)
+        ]
+    
+    def fit(self, texts: Sequence[str], labels: Sequence[str], epochs: int = 30,
+            learning_rate: float = 0.5, l2: float = 1e-5, batch_size: int = 64,
+            seed: int = 0) -> "IntentClassifier":
+        """Train the classifier with mini-batch gradient descent.
+        
+        Args:
+            texts: Training inputs.
+            labels: Intent of each input; unknown intents are skipped.
+            epochs: Passes over the training data.
+            learning_rate: Gradient step size.
+            l2: L2 regularization strength.
+            batch_size: Examples per gradient step.
+            seed: Seed for shuffling the examples.
+        
+        Returns:
+            The classifier itself.
+        """
+        examples = [
+            (self.featurize(text), self._intent_index[label])
+            for text, label in zip(texts, labels) if label in self._intent_index
+        ]
+        if not examples:
+            logger.warning("No labelled examples of known intents to train on")
+            return self
+        
+        for indices, _ in examples:
+            self.known[indices] = True
+        
+        rng = random.Random(seed)
+        identity = np.eye(len(self.intents), dtype=np.float32)
+        for _ in range(epochs):
+            rng.shuffle(examples)
+            for start in range(0, len(examples), batch_size):
+                batch = examples[start:start + batch_size]
+                lengths = np.array([len(indices) for indices, _ in batch])
+                flat = np.fromiter((index for indices, _ in batch for index in indices), dtype=np.int64)
+                offsets = np.zeros(len(batch), dtype=np.int64)
+                offsets[1:] = np.cumsum(lengths[:-1])
+                
+                # Cross-entropy gradient: X^T (P - Y), scattered back onto
+                # the rows of the features present in the batch
+                error = self._softmax(self._logits(flat, offsets))
+                error -= identity[[label for _, label in batch]]
+                self.weights *= 1 - learning_rate * l2
+                np.add.at(self.weights, flat, np.repeat(error, lengths, axis=0) * (-learning_rate / len(batch)))
+        
+        return self
+    
+    def calibrate(self, texts: Sequence[str], labels: Sequence[str],
+                  target_precision: float = 0.95) -> float:
+        """Set the confidence threshold from held-out examples.
+        
+        The threshold is the lowest confidence at which predictions at or
+        above it are correct at least `target_precision` of the time. If no
+        threshold reaches that precision it is set above 1.0, so no
+        prediction is trusted. Inputs below `min_coverage` are left out,
+        since their predictions are never trusted.
+        
+        Args:
+            texts: Held-out inputs not used for training.
+            labels: Intent of each input.
+            target_precision: Required precision of trusted predictions.
+        
+        Returns:
+            The new threshold.
+        """
+        probabilities, coverage = self._score(texts, 8192)
+        predictions = sorted(
+            ((confidence, intent == label) for (intent, confidence), covered, label
+             in zip(self._best(probabilities), coverage, labels) if covered >= self.min_coverage),
+            reverse=True
+        )
+        
+        threshold = 1.01
+        correct = 0
+        for count, (confidence, is_correct) in enumerate(predictions, 1):
+            correct += is_correct
+            if correct / count >= target_precision:
+                threshold = confidence
+        
+        self.threshold = threshold
+        return threshold
+    
+    @classmethod
+    def train(cls, texts: Sequence[str], labels: Sequence[str],
+              intents: Optional[Sequence[str]] = None, holdout: float = 0.2,
+              target_precision: float = 0.95, seed: int = 0,
+              **kwargs) -> "IntentClassifier":
+        """Train and calibrate a classifier on labelled examples.
+        
+        A `holdout` fraction of the examples is kept out of training and used
+        for calibration.
+        
+        Args:
+            texts: Inputs.
+            labels: Intent of each input.
+            intents: Intent names. Defaults to the distinct labels.
+            holdout: Fraction of examples used for calibration.
+            target_precision: Required precision of trusted predictions.
+            seed: Seed for the split and shuffling.
+            **kwargs: Options passed to the constructor and `fit`.
+        
+        Returns:
+            Trained classifier.
+        """
+        init_options = {
+            key: kwargs.pop(key) for key in ("n_features", "char_ngram", "min_coverage") if key in kwargs
+        }
+        classifier = cls(intents or sorted(set(labels)), **init_options)
+        
+        examples = list(zip(texts, labels))
+        random.Random(seed).shuffle(examples)
+        split = int(len(examples) * (1 - holdout))
+        train_set, calibration_set = examples[:split], examples[split:]
+        if not calibration_set:
+            logger.warning("Too few examples to hold out; calibrating on training data")
+            calibration_set = train_set
+        
+        classifier.fit([text for text, _ in train_set], [label for _, label in train_set],
+                       seed=seed, **kwargs)
+        classifier.calibrate([text for text, _ in calibration_set],
+                             [label for _, label in calibration_set], target_precision)
+        logger.info(f"Trained intent classifier on {len(train_set)} examples, "
+                    f"confidence threshold {classifier.threshold:.3f}")
+        return classifier
+    
+    @staticmethod
+    def examples_from_history(history: Iterable[Dict[str, Any]]) -> Tuple[List[str], List[str]]:
+        """Extract labelled examples from command history entries.
+        
+        Only successful entries with the user's input are used. The label is
+        the entry's intent, or else the intent implemented by its command.
+        
+        Args:
+            history: Entries of `ModelContextProvider.command_history`.
+        
+        Returns:
+            Tuple of (texts, labels)
+        """
+        texts, labels = [], []
+        for entry in history:
+            if not entry.get("success") or not entry.get("user_input"):
+                continue
+            label = entry.get("intent") or intent_from_command(entry.get("command", ""))
+            if label:
+                texts.append(entry["user_input"])
+                labels.append(label)
+        return texts, labels
+    
+    def save(self, path: str) -> None:
+        """Save the classifier to a ``.npz`` file.
+        
+        Args:
+            path: File path.
+        """
+        config = {
+            "intents": self.intents,
+            "n_features": self.n_features,
+            "char_ngram": self.char_ngram,
+            "threshold": self.threshold,
+            "min_coverage": self.min_coverage
+        }
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f, weights=self.weights, known=self.known, config=np.array(json.dumps(config))
+            )
+    
+    @classmethod
+    def load(cls, path: str) -> "IntentClassifier":
+        """Load a classifier saved with `save`.
+        
+        Args:
+            path: File path.
+        
+        Returns:
+            The loaded classifier.
+        """
+        if np is None:
+            raise ImportError("IntentClassifier requires numpy")
+        
+        with np.load(path) as data:
+            config = json.loads(str(data["config"]))
+            classifier = cls(
+                config["intents"],
+                n_features=config["n_features"],
+                char_ngram=config["char_ngram"],
+                threshold=config["threshold"],
+                min_coverage=config["min_coverage"]
+            )
+            classifier.weights = data["weights"].astype(np.float32)
+            classifier.known = data["known"].astype(bool)
+        return classifier
@@ -0,0 +1,99 @@
+"""Phrase-based intent matching for natural language t2p input.
+
+All intent phrases are compiled into one Aho–Corasick automaton, so an input
+is scanned once no matter how many phrases are configured, and every intent
+that matches is scored instead of stopping at the first hit.
+"""
+
+from typing import Dict, List, Optional, Tuple, Iterable
+
+from agents_system.utils.aho_corasick import AhoCorasick
+
+# Confidence is capped below 1.0 since phrase matching can never be certain
+MAX_CONFIDENCE = 0.95
+
+class IntentMatcher:
+    """Scores intents by the phrases they match in an input."""
+    
+    def __init__(self, intent_patterns: Dict[str, List[str]]):
+        """Compile the intent phrases.
+        
+        Args:
+            intent_patterns: Dict mapping intent names to trigger phrases.
+                             Phrases are matched case-insensitively.
+        """
+        self.intents = list(intent_patterns)
+        self._rank = {intent: rank for rank, intent in enumerate(self.intents)}
+        self.automaton = AhoCorasick(
+            (pattern.lower(), intent)
+            for intent, patterns in intent_patterns.items()
+            for pattern in patterns
+        )
+    
+    def score(self, user_input: str) -> Dict[str, Tuple[float, int]]:
+        """Score every intent that matches an input.
+        
+        An intent's confidence is twice the fraction of the input covered by
+        its matched phrases (overlaps counted once), capped at 0.95.
+        
+        Args:
+            user_input: The natural language input from the user
+        
+        Returns:
+            Dict mapping matched intents to (confidence, longest match length)
+        """
+        text = user_input.lower()
+        if not text:
+            return {}
+        
+        # Matches arrive ordered by end offset, so coverage is accumulated
+        # as a running union of spans per intent
+        spans: Dict[str, List[int]] = {}
+        for start, end, intent in self.automaton.iter_matches(text):
+            span = spans.get(intent)
+            if span is None:
+                # [covered, covered_until, longest]
+                spans[intent] = [end - start, end, end - start]
+                continue
+            span[0] += end - max(start, span[1])
+            span[1] = end
+            if end - start > span[2]:
+                span[2] = end - start
+        
+        length = len(text)
+        return {
+            intent: (min(2 * covered / length, MAX_CONFIDENCE), longest)
+            for intent, (covered, _, longest) in spans.items()
+        }
+    
+    def detect(self, user_input: str) -> Tuple[Optional[str], float]:
+        """Detect the best matching intent of an input.
+        
+        Intents are ranked by confidence, then by their longest matched
+        phrase, then by the order they were configured in.
+        
+        Args:
+            user_input: The natural language input from the user
+        
+        Returns:
+            A tuple of (intent_name, confidence_score) or (None, 0.0) if no intent matched
+        """
+        scores = self.score(user_input)
+        if not scores:
+            return None, 0.0
+        
+        rank = self._rank
+        intent = max(scores, key=lambda name: (scores[name][0], scores[name][1], -rank[name]))
+        return intent, scores[intent][0]
+    
+    def detect_many(self, user_inputs: Iterable[str]) -> List[Tuple[Optional[str], float]]:
+        """Detect the best matching intent of many inputs.
+        
+        Args:
+            user_inputs: Natural language inputs
+        
+        Returns:
+            List of (intent_name, confidence_score), in input order
+        """
+        detect = self.detect
+        return [detect(user_input) for user_input in user_inputs]
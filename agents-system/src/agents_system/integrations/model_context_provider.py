@@ -9,10 +9,15 @@ import json
 import time
 import logging
 import asyncio
-from typing import Dict, List, Optional, Any, Union, Callable
+from collections import deque
+from itertools import islice
+from typing import Dict, List, Optional, Any, Union, Callable, Tuple, AsyncIterable
 
 from agents_system.integrations.t2p import T2PIntegration
 from agents_system.integrations.ai_t2p_adapter import AIT2PAdapter
+from agents_system.integrations.intent_classifier import IntentClassifier
+from agents_system.utils.semantic_cache import SemanticCache
+from agents_system.utils.metrics import LatencyHistogram, request_timer
 
 # Configure logging
 logging.basicConfig(
@@ -21,13 +26,32 @@ logging.basicConfig(
 )
 logger = logging.getLogger("model-context-provider")
 
+# Request phases with a latency histogram per processing method
+LATENCY_PHASES = ("llm", "t2p", "total")
+
 class ModelContextProvider:
     """Provider for AI model context integration with T2P."""
     
-    def __init__(self):
-        """Initialize the model context provider."""
+    def __init__(self,
+                 response_cache_path: Optional[str] = None,
+                 metrics_path: Optional[str] = None,
+                 metrics_interval: float = 60.0):
+        """Initialize the model context provider.
+        
+        Args:
+            response_cache_path: JSON-lines file that persists the LLM
+                                 response cache across runs. If None, the
+                                 cache is kept in memory only.
+            metrics_path: JSON-lines file that request rates and latency
+                          percentiles are appended to, one line per window.
+                          If None, metrics are kept in memory only.
+            metrics_interval: Length of a metrics window in seconds
+        """
         self.t2p_integration = T2PIntegration()
-        self.ai_adapter = AIT2PAdapter(self.t2p_integration)
+        self.ai_adapter = AIT2PAdapter(
+            self.t2p_integration,
+            response_cache=SemanticCache(path=response_cache_path)
+        )
         
         # LLM call handler (to be set by user)
         self.llm_call_handler = None
@@ -37,20 +61,33 @@ class ModelContextProvider:
         self.context_ttl = 3600  # 1 hour in seconds
         
         # Performance tracking
-        self.command_history = []
         self.max_history_size = 100
+        self.command_history = deque(maxlen=self.max_history_size)
         self.success_counts = {
+            "intent_classifier": 0,
+            "pattern_match": 0,
             "direct_command_generation": 0,
             "intent_extraction": 0,
             "pattern_fallback": 0,
             "ai_output_extraction": 0
         }
         self.total_attempts = {
+            "intent_classifier": 0,
+            "pattern_match": 0,
             "direct_command_generation": 0,
             "intent_extraction": 0,
             "pattern_fallback": 0,
             "ai_output_extraction": 0
         }
+        
+        # Latency histograms by method and phase, since startup and for the
+        # current metrics window
+        self.latency: Dict[str, Dict[str, LatencyHistogram]] = {}
+        self.metrics_path = metrics_path
+        self.metrics_interval = metrics_interval
+        self._window_latency: Dict[str, Dict[str, LatencyHistogram]] = {}
+        self._window_counts: Dict[str, List[int]] = {}
+        self._window_started = time.time()
     
     def register_llm_call_handler(self, handler: Callable[[str], str]) -> None:
         """Register a handler function for LLM calls.
@@ -71,21 +108,35 @@ class ModelContextProvider:
         Returns:
             Dict with processing results
         """
-        if self.llm_call_handler:
-            # Use LLM-enhanced processing
-            result = await self.ai_adapter.process_user_input_with_llm(
-                user_input, 
-                self.llm_call_handler
-            )
-        else:
-            # Use pattern-based processing
-            result = self.ai_adapter.process_user_input(user_input)
+        with request_timer() as timings:
+            if self.llm_call_handler:
+                # Use LLM-enhanced processing
+                result = await self.ai_adapter.process_user_input_with_llm(
+                    user_input, 
+                    self.llm_call_handler
+                )
+            else:
+                # Use pattern-based processing
+                result = await self.ai_adapter.process_user_input_async(user_input)
         
         # Track performance
-        self._track_performance(result)
+        self._track_performance(result, user_input, timings)
         
         return result
     
+    async def process_many(self, user_inputs: List[str]) -> List[Dict[str, Any]]:
+        """Process several user inputs concurrently.
+        
+        Args:
+            user_inputs: Natural language inputs from users
+            
+        Returns:
+            List of processing results, in input order
+        """
+        return list(await asyncio.gather(
+            *(self.process_user_input(user_input) for user_input in user_inputs)
+        ))
+    
     def process_ai_output(self, ai_output: str) -> Dict[str, Any]:
         """Process AI model output to extract and execute T2P commands.
         
@@ -95,13 +146,85 @@ class ModelContextProvider:
         Returns:
             Dict with processing results
         """
-        result = self.ai_adapter.process_ai_output(ai_output)
+        with request_timer() as timings:
+            result = self.ai_adapter.process_ai_output(ai_output)
+        
+        # Track performance for AI output extraction
+        method = "ai_output_extraction"
+        self.total_attempts[method] += 1
+        if result["success"]:
+            self.success_counts[method] += 1
+        self._record_latency(method, result["success"], timings)
+        
+        return result
+    
+    def train_intent_classifier(self,
+                                labelled_examples: Optional[List[Tuple[str, str]]] = None,
+                                save_path: Optional[str] = None,
+                                **kwargs) -> IntentClassifier:
+        """Train the learned intent classifier and start using it.
+        
+        Training data is the successful entries of the command history plus
+        any labelled examples. Once installed, confident classifications are
+        executed directly and only uncertain inputs reach the LLM.
+        
+        Args:
+            labelled_examples: Additional (user_input, intent) pairs
+            save_path: If given, the trained classifier is saved there, to be
+                       loaded with `load_intent_classifier`
+            **kwargs: Options passed to `IntentClassifier.train`
+            
+        Returns:
+            The trained classifier
+        """
+        texts, labels = IntentClassifier.examples_from_history(self.command_history)
+        for text, label in labelled_examples or []:
+            texts.append(text)
+            labels.append(label)
+        
+        classifier = IntentClassifier.train(
+            texts, labels,
+            intents=list(self.t2p_integration.intent_commands),
+            **kwargs
+        )
+        if save_path:
+            classifier.save(save_path)
+        
+        self.t2p_integration.intent_classifier = classifier
+        return classifier
+    
+    def load_intent_classifier(self, path: str) -> IntentClassifier:
+        """Load a trained intent classifier and start using it.
+        
+        Args:
+            path: File saved by `train_intent_classifier` or `IntentClassifier.save`
+            
+        Returns:
+            The loaded classifier
+        """
+        classifier = IntentClassifier.load(path)
+        self.t2p_integration.intent_classifier = classifier
+        return classifier
+    
+    async def process_ai_stream(self, chunks: AsyncIterable[str]) -> Dict[str, Any]:
+        """Process streamed AI model output, executing its T2P command as
+        soon as the command has streamed in.
+        
+        Args:
+            chunks: Async iterable of output text chunks
+            
+        Returns:
+            Dict with processing results
+        """
+        with request_timer() as timings:
+            result = await self.ai_adapter.process_ai_stream(chunks)
         
         # Track performance for AI output extraction
         method = "ai_output_extraction"
         self.total_attempts[method] += 1
         if result["success"]:
             self.success_counts[method] += 1
+        self._record_latency(method, result["success"], timings)
         
         return result
     
@@ -126,13 +249,14 @@ class ModelContextProvider:
         Returns:
             List of recent command objects
         """
-        return self.command_history[:count]
+        return list(islice(self.command_history, count))
     
     def get_performance_metrics(self) -> Dict[str, Any]:
         """Get performance metrics for command processing methods.
         
         Returns:
-            Dict with performance metrics
+            Dict with performance metrics, including latency percentiles of
+            LLM time, t2p time and total time for methods that have run
         """
         metrics = {}
         
@@ -148,33 +272,113 @@ class ModelContextProvider:
                 "total_attempts": attempts,
                 "successful_attempts": self.success_counts[method]
             }
+            if method in self.latency:
+                metrics[method]["latency"] = {
+                    phase: histogram.snapshot() for phase, histogram in self.latency[method].items()
+                }
         
         return metrics
     
-    def _track_performance(self, result: Dict[str, Any]) -> None:
+    def close(self) -> None:
+        """Write the current metrics window, save the LLM response cache and
+        stop the t2p workers."""
+        self.flush_metrics()
+        self.ai_adapter.close()
+        self.t2p_integration.close()
+    
+    def flush_metrics(self) -> None:
+        """Append the current metrics window to `metrics_path` and start a
+        new window.
+        
+        Each line holds the window's start and end time and, per method, the
+        number of requests and successes, the request rate and the latency
+        percentiles of each phase. Empty windows are not written.
+        """
+        now = time.time()
+        if self.metrics_path and self._window_counts:
+            elapsed = max(now - self._window_started, 1e-9)
+            methods = {}
+            for method, (requests, successes) in self._window_counts.items():
+                methods[method] = {
+                    "requests": requests,
+                    "successes": successes,
+                    "per_second": round(requests / elapsed, 3)
+                }
+                for phase, histogram in self._window_latency[method].items():
+                    snapshot = histogram.snapshot()
+                    methods[method][phase] = {
+                        key: round(snapshot[key], 6) for key in ("mean", "p50", "p99", "max")
+                    }
+            
+            try:
+                with open(self.metrics_path, "a") as f:
+                    f.write(json.dumps({
+                        "start": round(self._window_started, 3),
+                        "end": round(now, 3),
+                        "methods": methods
+                    }, separators=(",", ":")) + "\n")
+            except OSError as e:
+                logger.error(f"Error writing metrics to {self.metrics_path}: {e}")
+        
+        self._window_latency = {}
+        self._window_counts = {}
+        self._window_started = now
+    
+    def _record_latency(self, method: str, success: bool, timings: Dict[str, float]) -> None:
+        """Record the phase times of a request, and write the metrics window
+        if it is complete.
+        
+        Args:
+            method: Method that processed the request
+            success: Whether the request succeeded
+            timings: Seconds spent in each phase, from `request_timer`
+        """
+        for histograms in (self.latency, self._window_latency):
+            if method not in histograms:
+                histograms[method] = {phase: LatencyHistogram() for phase in LATENCY_PHASES}
+            for phase, histogram in histograms[method].items():
+                histogram.record(timings.get(phase, 0.0))
+        
+        counts = self._window_counts.setdefault(method, [0, 0])
+        counts[0] += 1
+        counts[1] += int(success)
+        
+        if self.metrics_path and time.time() - self._window_started >= self.metrics_interval:
+            self.flush_metrics()
+    
+    def _track_performance(self,
+                           result: Dict[str, Any],
+                           user_input: Optional[str] = None,
+                           timings: Optional[Dict[str, float]] = None) -> None:
         """Track performance metrics for the given result.
         
         Args:
             result: Processing result dict
+            user_input: Natural language input the result was produced for
+            timings: Seconds spent in each phase of the request, from
+                     `request_timer`
         """
         # Add to command history
         if "command" in result:
             command_entry = {
                 "command": result["command"],
+                "user_input": user_input,
+                "intent": result.get("intent"),
                 "success": result.get("success", False),
                 "method": result.get("method", "unknown"),
+                "duration_seconds": timings["total"] if timings else None,
                 "timestamp": time.time()
             }
             
-            self.command_history.insert(0, command_entry)
-            
-            # Trim history if needed
-            if len(self.command_history) > self.max_history_size:
-                self.command_history = self.command_history[:self.max_history_size]
+            # The deque drops the oldest entry once full
+            self.command_history.appendleft(command_entry)
         
         # Update success counts
         method = result.get("method")
         if method in self.total_attempts:
             self.total_attempts[method] += 1
             if result.get("success", False):
-                self.success_counts[method] += 1 
\ No newline at end of file
+                self.success_counts[method] += 1
+        
+        if timings is not None:
+            self._record_latency(method or "unknown", result.get("success", False), timings) 
\ No newline at end of file
@@ -7,10 +7,21 @@ and execution based on natural language input.
 
 import os
 import json
+import time
+import shlex
+import tempfile
+import asyncio
 import subprocess
 import logging
+import threading
 from typing import Dict, List, Optional, Any, Union, Tuple
 
+from agents_system.integrations.t2p_worker import T2PWorkerPool, T2PWorkerError, T2PWorkerUnavailable
+from agents_system.integrations.t2p_batch import T2PWriteCoalescer, is_batchable
+from agents_system.integrations.intent_matcher import IntentMatcher
+from agents_system.utils.cache import LRUCache
+from agents_system.utils.metrics import add_phase_time
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -18,19 +29,85 @@ logging.basicConfig(
 )
 logger = logging.getLogger("t2p-integration")
 
+# Commands that only read the todo and note stores; any other command
+# executed through the integration is treated as a write
+READ_ONLY_COMMANDS = (
+    ("todo", "list"),
+    ("todo", "stats"),
+    ("todo", "approval", "list"),
+    ("todo", "approval", "pending"),
+    ("todo", "approval", "all"),
+    ("note", "list"),
+    ("note", "view"),
+    ("note", "stats"),
+)
+
 class T2PIntegration:
     """Integration with the t2p CLI tool for efficient AI-model interactions."""
 
-    def __init__(self, t2p_path: Optional[str] = None):
+    def __init__(self, t2p_path: Optional[str] = None, use_worker: Optional[bool] = None,
+                 worker_command: Optional[List[str]] = None, worker_pool_size: int = 2,
+                 command_timeout: float = 30.0, max_concurrent_commands: int = 8,
+                 bulk_writes: bool = False, bulk_window: float = 0.05,
+                 bulk_max_size: int = 100, result_cache_size: int = 256,
+                 result_cache_ttl: Optional[float] = 30.0):
         """Initialize the T2P integration.
         
         Args:
             t2p_path: Path to the t2p binary. If None, will try to find it in PATH.
+            use_worker: Whether to run commands on persistent t2p worker
+                        processes (see `t2p_worker`) when available. If
+                        None, workers are used only when `worker_command` is
+                        given, since the t2p CLI does not implement the
+                        worker protocol yet.
+            worker_command: Command line that starts a worker. Defaults to
+                            ``[t2p_path, "worker"]``.
+            worker_pool_size: Maximum number of worker processes.
+            command_timeout: Seconds a command may run before it is aborted.
+            max_concurrent_commands: Maximum number of commands run at once
+                                     by `execute_command_async`.
+            bulk_writes: Whether to coalesce todo add/update and note new
+                         commands into bulk imports (see `t2p_batch`).
+            bulk_window: Seconds a write waits for others to join its batch.
+            bulk_max_size: Maximum number of writes per bulk import.
+            result_cache_size: Maximum number of cached read-only command
+                               results. 0 disables caching.
+            result_cache_ttl: Seconds a cached result stays valid. Writes made
+                              through this integration invalidate the cache
+                              immediately; the TTL bounds how long edits
+                              made outside it go unnoticed.
         """
         self.t2p_path = t2p_path or self._find_t2p_binary()
         if not self.t2p_path:
             logger.warning("T2P binary not found. Some functionality may be limited.")
         
+        self.command_timeout = command_timeout
+        self.max_concurrent_commands = max_concurrent_commands
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
+        self.worker_pool = None
+        if use_worker is None:
+            use_worker = worker_command is not None
+        if use_worker and (worker_command or self.t2p_path):
+            self.worker_pool = T2PWorkerPool(
+                worker_command or [self.t2p_path, "worker"],
+                size=worker_pool_size,
+                timeout=command_timeout
+            )
+        
+        self.result_cache = LRUCache(max_size=result_cache_size, ttl=result_cache_ttl)
+        # Bumped by every write, so reads that overlap a write are not cached
+        self._cache_generation = 0
+        self._cache_lock = threading.Lock()
+        
+        self.write_coalescer = None
+        if bulk_writes:
+            self.write_coalescer = T2PWriteCoalescer(
+                self._execute_batch,
+                window=bulk_window,
+                max_batch_size=bulk_max_size
+            )
+        
         # Command templates for common operations
         self.command_templates = {
             "todo_add": "t2p todo add --title \"{title}\" --description \"{description}\" --priority {priority} --horizon {horizon} --tags \"{tags}\" --category \"{category}\"",
@@ -40,7 +117,20 @@ class T2PIntegration:
             "note_ai": "t2p note new --ai \"{prompt}\"",
         }
         
-        # Command patterns for intent detection
+        # Command templates of the detected intents
+        self.intent_commands = {
+            "create_todo": "todo_add",
+            "list_todos": "todo_list",
+            "update_todo": "todo_update",
+            "create_note": "note_new",
+            "create_ai_note": "note_ai",
+        }
+        
+        # Learned classifier (see `intent_classifier`); takes precedence over
+        # the patterns when it is confident
+        self.intent_classifier = None
+        
+        # Command patterns for intent detection, compiled into `intent_matcher`
         self.intent_patterns = {
             "create_todo": ["create task", "add todo", "new task", "create todo", "add task"],
             "list_todos": ["list tasks", "show todos", "display tasks", "get todos", "view tasks"],
@@ -49,6 +139,39 @@ class T2PIntegration:
             "create_ai_note": ["ai note", "generate note", "create ai note", "write content for me"],
         }
     
+    @property
+    def intent_patterns(self) -> Dict[str, List[str]]:
+        """Trigger phrases of each intent.
+        
+        Assigning new patterns recompiles the intent matcher. After changing
+        the patterns in place, call `refresh_intent_matcher`.
+        """
+        return self._intent_patterns
+    
+    @intent_patterns.setter
+    def intent_patterns(self, patterns: Dict[str, List[str]]) -> None:
+        self._intent_patterns = patterns
+        self.refresh_intent_matcher()
+    
+    def refresh_intent_matcher(self) -> None:
+        """Recompile the intent matcher from `intent_patterns`."""
+        self.intent_matcher = IntentMatcher(self._intent_patterns)
+    
+    def classify_intent(self, user_input: str) -> Optional[Tuple[str, float]]:
+        """Classify an input with the learned intent classifier, if any.
+        
+        Args:
+            user_input: The natural language input from the user
+            
+        Returns:
+            A tuple of (intent_name, confidence_score) if the classifier is
+            set and trusts its prediction (see `IntentClassifier.classify`),
+            None otherwise
+        """
+        if self.intent_classifier is None:
+            return None
+        return self.intent_classifier.classify([user_input])[0]
+    
     def _find_t2p_binary(self) -> Optional[str]:
         """Find the t2p binary in the system PATH."""
         try:
@@ -79,34 +202,51 @@ class T2PIntegration:
     def detect_intent(self, user_input: str) -> Tuple[Optional[str], float]:
         """Detect the user intent from natural language input.
         
+        Uses the learned `intent_classifier` when it is set and confident;
+        otherwise all intent phrases are matched in a single pass and the
+        best scoring intent wins (see `IntentMatcher` for the scoring).
+        
         Args:
             user_input: The natural language input from the user
             
         Returns:
             A tuple of (intent_name, confidence_score) or (None, 0.0) if no intent detected
         """
-        user_input = user_input.lower()
+        classified = self.classify_intent(user_input)
+        if classified is not None:
+            return classified
+        return self.intent_matcher.detect(user_input)
+    
+    def detect_intents(self, user_inputs: List[str]) -> List[Tuple[Optional[str], float]]:
+        """Detect the user intent of many natural language inputs.
         
-        # Simple pattern matching for now, can be replaced with ML-based approach later
-        for intent, patterns in self.intent_patterns.items():
-            for pattern in patterns:
-                if pattern in user_input:
-                    # Calculate a simple confidence score based on pattern length
-                    confidence = len(pattern) / len(user_input)
-                    return intent, min(confidence * 2, 0.95)  # Cap at 0.95
+        Args:
+            user_inputs: Natural language inputs
+            
+        Returns:
+            List of (intent_name, confidence_score) tuples, in input order
+        """
+        if self.intent_classifier is None:
+            return self.intent_matcher.detect_many(user_inputs)
         
-        return None, 0.0
+        # Score every input in one batch, then match phrases for the rest
+        return [
+            classified if classified is not None else self.intent_matcher.detect(user_input)
+            for user_input, classified in zip(user_inputs, self.intent_classifier.classify(user_inputs))
+        ]
     
     def generate_command(self, intent: str, parameters: Dict[str, Any]) -> Optional[str]:
         """Generate a t2p command based on intent and parameters.
         
         Args:
-            intent: The detected intent (e.g., "create_todo")
+            intent: The detected intent (e.g., "create_todo") or a command
+                    template name (e.g., "todo_add")
             parameters: Dict of parameters for the command
             
         Returns:
             The generated command string or None if generation failed
         """
+        intent = self.intent_commands.get(intent, intent)
         if intent not in self.command_templates:
             logger.warning(f"Unknown intent: {intent}")
             return None
@@ -170,51 +310,521 @@ class T2PIntegration:
             logger.error(f"Error generating command: {e}")
             return None
     
+    def _to_argv(self, command: str) -> List[str]:
+        """Split a t2p command string into arguments, without the program name.
+        
+        Args:
+            command: Command string, e.g. ``t2p todo list --json``.
+            
+        Returns:
+            List of arguments.
+        """
+        argv = shlex.split(command)
+        if argv and (argv[0] == "t2p" or argv[0] == self.t2p_path):
+            argv = argv[1:]
+        return argv
+    
+    def _parse_result(self, exit_code: int, stdout: str, stderr: str) -> Dict[str, Any]:
+        """Build the result of an executed command.
+        
+        Args:
+            exit_code: Exit code of the command.
+            stdout: Standard output.
+            stderr: Standard error.
+            
+        Returns:
+            Dict containing the command results
+        """
+        if exit_code == 0:
+            try:
+                return {
+                    "success": True,
+                    "data": json.loads(stdout),
+                    "raw": stdout
+                }
+            except json.JSONDecodeError:
+                # Not all commands return JSON
+                return {
+                    "success": True,
+                    "data": None,
+                    "raw": stdout
+                }
+        
+        return {
+            "success": False,
+            "error": stderr,
+            "exit_code": exit_code
+        }
+    
+    def _prepare_command(self, command: str) -> List[str]:
+        """Add the --json flag to a command and split it into arguments.
+        
+        Args:
+            command: The command string to execute
+            
+        Returns:
+            List of arguments, without the program name.
+        """
+        # Add --json flag to get structured output if applicable
+        if not command.endswith("--json") and not "--json" in command:
+            command += " --json"
+            
+        logger.info(f"Executing command: {command}")
+        return self._to_argv(command)
+    
     def execute_command(self, command: str) -> Dict[str, Any]:
         """Execute a t2p command and return the results.
         
+        The command runs on a persistent worker when the worker pool is
+        available, and in a new t2p process otherwise. Arguments are passed
+        to t2p directly, never through a shell. With bulk writes enabled,
+        batchable writes wait for their bulk import to complete.
+        
+        Results of read-only commands are cached (see `is_read_only_command`);
+        a cached result is returned with "cached" set to True.
+        
         Args:
             command: The command string to execute
             
+        Returns:
+            Dict containing the command results and their "duration_seconds"
+        """
+        if not self.t2p_path and self.worker_pool is None:
+            return {"success": False, "error": "T2P binary not found"}
+        
+        started = time.perf_counter()
+        try:
+            return self._with_duration(self._execute_prepared(self._prepare_command(command)), started)
+        
+        except Exception as e:
+            logger.error(f"Error executing command: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    def execute_commands(self, commands: List[str]) -> List[Dict[str, Any]]:
+        """Execute several t2p commands, e.g. the steps of a generated plan.
+        
+        With bulk writes enabled, each run of consecutive batchable writes
+        is queued before waiting on any of it, so the run is applied as bulk
+        imports rather than one by one. A run completes before the next
+        other command starts, so results match running the commands in order.
+        
+        Args:
+            commands: Command strings to execute
+            
+        Returns:
+            List of result dicts, in command order
+        """
+        if self.write_coalescer is None:
+            return [self.execute_command(command) for command in commands]
+        
+        results: List[Any] = []
+        # Indices in `results` of the queued writes of the current run
+        run: List[int] = []
+        
+        def finish_run():
+            # Do not wait out the window once the run is queued
+            if run:
+                self.write_coalescer.flush()
+            for index in run:
+                results[index] = results[index].result()
+            run.clear()
+        
+        for command in commands:
+            try:
+                argv = self._prepare_command(command)
+            except ValueError as e:
+                results.append({"success": False, "error": str(e)})
+                continue
+            
+            if not is_batchable(argv):
+                finish_run()
+                results.append(self._execute_prepared(argv))
+                continue
+            
+            try:
+                results.append(self.write_coalescer.submit(argv))
+                run.append(len(results) - 1)
+            except RuntimeError as e:
+                # The coalescer was closed
+                results.append({"success": False, "error": str(e)})
+        
+        finish_run()
+        return results
+    
+    def is_read_only_command(self, command: Union[str, List[str]]) -> bool:
+        """Check whether a command only reads t2p data.
+        
+        Args:
+            command: Command string, or its arguments without the program name
+            
+        Returns:
+            True if the command's result may be cached
+        """
+        if isinstance(command, str):
+            try:
+                command = self._to_argv(command)
+            except ValueError:
+                return False
+        
+        return any(
+            tuple(command[:len(prefix)]) == prefix for prefix in READ_ONLY_COMMANDS
+        )
+    
+    @staticmethod
+    def _cache_key(argv: List[str]) -> Tuple:
+        """Build a cache key that does not depend on the order of options.
+        
+        Args:
+            argv: Command arguments, without the program name.
+            
+        Returns:
+            Tuple of the positional arguments and the sorted options
+        """
+        positional = []
+        options = []
+        index = 0
+        while index < len(argv):
+            arg = argv[index]
+            if not arg.startswith("--"):
+                positional.append(arg)
+            elif "=" in arg:
+                options.append(tuple(arg.split("=", 1)))
+            elif index + 1 < len(argv) and not argv[index + 1].startswith("--"):
+                options.append((arg, argv[index + 1].strip()))
+                index += 1
+            else:
+                options.append((arg, None))
+            index += 1
+        
+        return tuple(positional), tuple(sorted(options, key=repr))
+    
+    def _cached_result(self, argv: List[str]) -> Optional[Dict[str, Any]]:
+        """Look up the cached result of a read-only command."""
+        if not self.result_cache.max_size:
+            return None
+        
+        cached = self.result_cache.get(self._cache_key(argv))
+        if cached is None:
+            return None
+        return {**cached, "cached": True}
+    
+    def _store_result(self, argv: List[str], generation: int, result: Dict[str, Any]) -> None:
+        """Cache the result of a read-only command.
+        
+        Args:
+            argv: Command arguments, without the program name.
+            generation: Cache generation when the command started. If a write
+                        happened since, the result may be stale and is dropped.
+            result: The command result.
+        """
+        if not result.get("success") or not self.result_cache.max_size:
+            return
+        
+        with self._cache_lock:
+            if generation == self._cache_generation:
+                self.result_cache.set(self._cache_key(argv), result)
+    
+    def invalidate_result_cache(self) -> None:
+        """Drop all cached read-only results, e.g. after editing t2p data
+        outside this integration."""
+        with self._cache_lock:
+            self._cache_generation += 1
+            self.result_cache.clear()
+    
+    def get_result_cache_stats(self) -> Dict[str, Any]:
+        """Get statistics of the read-only result cache.
+        
+        Returns:
+            Dictionary with size, hit/miss counters and hit rate
+        """
+        return self.result_cache.get_stats()
+    
+    def _execute_prepared(self, argv: List[str]) -> Dict[str, Any]:
+        """Execute one prepared command through the write coalescer or the
+        result cache.
+        
+        Args:
+            argv: Command arguments, without the program name.
+            
         Returns:
             Dict containing the command results
         """
+        if self.write_coalescer is not None and is_batchable(argv):
+            return self.write_coalescer.submit(argv).result()
+        
+        if not self.is_read_only_command(argv):
+            try:
+                return self._execute_argv(argv)
+            finally:
+                self.invalidate_result_cache()
+        
+        cached = self._cached_result(argv)
+        if cached is not None:
+            return cached
+        
+        generation = self._cache_generation
+        result = self._execute_argv(argv)
+        self._store_result(argv, generation, result)
+        return result
+    
+    def _execute_argv(self, argv: List[str]) -> Dict[str, Any]:
+        """Execute one prepared command on a worker or in a new process.
+        
+        Args:
+            argv: Command arguments, without the program name.
+            
+        Returns:
+            Dict containing the command results
+        """
+        try:
+            if self.worker_pool is not None and self.worker_pool.available:
+                try:
+                    response = self.worker_pool.execute(argv)
+                    return self._parse_result(
+                        response["exit_code"], response["stdout"], response["stderr"]
+                    )
+                except T2PWorkerUnavailable as e:
+                    logger.info(f"t2p worker unavailable, running a new process: {e}")
+                except T2PWorkerError as e:
+                    # The worker received the command, so it must not run twice
+                    return {"success": False, "error": str(e)}
+            
+            if not self.t2p_path:
+                return {"success": False, "error": "T2P binary not found"}
+            
+            result = subprocess.run(
+                [self.t2p_path] + argv,
+                capture_output=True,
+                text=True,
+                timeout=self.command_timeout
+            )
+            return self._parse_result(result.returncode, result.stdout, result.stderr)
+        
+        except Exception as e:
+            logger.error(f"Error executing command: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    def _execute_batch(self, batch: List[List[str]]) -> List[Dict[str, Any]]:
+        """Execute prepared write commands as one bulk import and invalidate
+        the result cache.
+        
+        Args:
+            batch: Arguments of each command, without the program name.
+            
+        Returns:
+            List of result dicts, in command order
+        """
+        try:
+            return self._run_batch(batch)
+        finally:
+            self.invalidate_result_cache()
+    
+    def _run_batch(self, batch: List[List[str]]) -> List[Dict[str, Any]]:
+        """Execute prepared write commands as one bulk import.
+        
+        The batch goes to a worker when the pool is available, and otherwise
+        to ``t2p batch`` through a temporary JSONL file. If t2p rejects the
+        batch without running it (no bulk import support), the commands are
+        executed one by one instead.
+        
+        Args:
+            batch: Arguments of each command, without the program name.
+            
+        Returns:
+            List of result dicts, in command order
+        """
+        logger.info(f"Executing {len(batch)} t2p writes as one bulk import")
+        
+        if self.worker_pool is not None and self.worker_pool.available:
+            try:
+                responses = self.worker_pool.execute_batch(batch)
+                if responses is not None:
+                    return [
+                        self._parse_result(response["exit_code"], response["stdout"], response["stderr"])
+                        for response in responses
+                    ]
+                logger.info("t2p worker does not support bulk imports, executing writes one by one")
+                return [self._execute_argv(argv) for argv in batch]
+            except T2PWorkerUnavailable as e:
+                logger.info(f"t2p worker unavailable, running a new process: {e}")
+            except T2PWorkerError as e:
+                # The worker received the batch, so it must not run twice
+                return [{"success": False, "error": str(e)} for _ in batch]
+        
         if not self.t2p_path:
-            return {"success": False, "error": "T2P binary not found"}
+            return [{"success": False, "error": "T2P binary not found"} for _ in batch]
         
+        fd, batch_path = tempfile.mkstemp(prefix="t2p-batch-", suffix=".jsonl")
         try:
-            # Add --json flag to get structured output if applicable
-            if not command.endswith("--json") and not "--json" in command:
-                command += " --json"
-                
-            logger.info(f"Executing command: {command}")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for argv in batch:
+                    f.write(json.dumps(argv) + "\n")
+            
             result = subprocess.run(
-                command,
-                shell=True,
+                [self.t2p_path, "batch", batch_path, "--json"],
                 capture_output=True,
-                text=True
+                text=True,
+                timeout=self.command_timeout
             )
+        except Exception as e:
+            logger.error(f"Error executing t2p batch: {e}")
+            return [{"success": False, "error": str(e)} for _ in batch]
+        finally:
+            os.unlink(batch_path)
+        
+        try:
+            responses = json.loads(result.stdout)["results"]
+        except (json.JSONDecodeError, KeyError, TypeError):
+            responses = None
+        
+        if isinstance(responses, list) and len(responses) == len(batch):
+            return [
+                self._parse_result(
+                    response.get("exit_code", 1), response.get("stdout", ""), response.get("stderr", "")
+                )
+                for response in responses
+            ]
+        
+        if result.returncode != 0:
+            logger.info("t2p does not support bulk imports, executing writes one by one")
+            return [self._execute_argv(argv) for argv in batch]
+        
+        # t2p accepted the batch, so the writes may have been applied
+        error = "t2p batch returned an invalid response"
+        return [{"success": False, "error": error, "raw": result.stdout} for _ in batch]
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Get the semaphore limiting concurrent commands on the running loop."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_commands)
+            self._semaphore_loop = loop
+        return self._semaphore
+    
+    async def execute_command_async(self, command: str,
+                                    timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Execute a t2p command without blocking the event loop.
+        
+        At most `max_concurrent_commands` commands run at once. The command
+        runs on a persistent worker when the pool is available, and otherwise
+        in a new t2p process started without a shell, which is killed if it
+        exceeds the timeout. Read-only results are cached as in
+        `execute_command`.
+        
+        Args:
+            command: The command string to execute
+            timeout: Seconds the command may run. Defaults to `command_timeout`.
             
-            if result.returncode == 0:
+        Returns:
+            Dict containing the command results and their "duration_seconds"
+        """
+        if not self.t2p_path and self.worker_pool is None:
+            return {"success": False, "error": "T2P binary not found"}
+        
+        started = time.perf_counter()
+        timeout = self.command_timeout if timeout is None else timeout
+        
+        try:
+            argv = self._prepare_command(command)
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+        
+        if self.write_coalescer is not None and is_batchable(argv):
+            # Batched writes do not hold a command slot while they wait
+            try:
+                future = self.write_coalescer.submit(argv)
+            except RuntimeError as e:
+                # The coalescer was closed
+                return {"success": False, "error": str(e)}
+            result = await asyncio.wrap_future(future)
+            return self._with_duration(result, started)
+        
+        read_only = self.is_read_only_command(argv)
+        if read_only:
+            cached = self._cached_result(argv)
+            if cached is not None:
+                return self._with_duration(cached, started)
+        
+        generation = self._cache_generation
+        async with self._get_semaphore():
+            result = await self._execute_argv_async(argv, timeout)
+        
+        if read_only:
+            self._store_result(argv, generation, result)
+        else:
+            self.invalidate_result_cache()
+        return self._with_duration(result, started)
+    
+    @staticmethod
+    def _with_duration(result: Dict[str, Any], started: float) -> Dict[str, Any]:
+        """Add the time since a command started to its result and to the t2p
+        time of the request being timed, if any.
+        
+        Args:
+            result: Command result, which is not modified since it may be cached.
+            started: `time.perf_counter()` value when the command started.
+            
+        Returns:
+            Copy of the result with "duration_seconds"
+        """
+        duration = time.perf_counter() - started
+        add_phase_time("t2p", duration)
+        return {**result, "duration_seconds": duration}
+    
+    async def _execute_argv_async(self, argv: List[str], timeout: float) -> Dict[str, Any]:
+        """Execute one prepared command on a worker or in a new process,
+        without blocking the event loop.
+        
+        Args:
+            argv: Command arguments, without the program name.
+            timeout: Seconds the command may run.
+            
+        Returns:
+            Dict containing the command results
+        """
+        try:
+            if self.worker_pool is not None and self.worker_pool.available:
                 try:
-                    return {
-                        "success": True,
-                        "data": json.loads(result.stdout),
-                        "raw": result.stdout
-                    }
-                except json.JSONDecodeError:
-                    # Not all commands return JSON
-                    return {
-                        "success": True,
-                        "data": None,
-                        "raw": result.stdout
-                    }
-            else:
+                    response = await asyncio.to_thread(self.worker_pool.execute, argv, timeout)
+                    return self._parse_result(
+                        response["exit_code"], response["stdout"], response["stderr"]
+                    )
+                except T2PWorkerUnavailable as e:
+                    logger.info(f"t2p worker unavailable, running a new process: {e}")
+                except T2PWorkerError as e:
+                    # The worker received the command, so it must not run twice
+                    return {"success": False, "error": str(e)}
+            
+            if not self.t2p_path:
+                return {"success": False, "error": "T2P binary not found"}
+            
+            process = await asyncio.create_subprocess_exec(
+                self.t2p_path, *argv,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
                 return {
                     "success": False,
-                    "error": result.stderr,
-                    "exit_code": result.returncode
+                    "error": f"Command timed out after {timeout}s",
+                    "timed_out": True
                 }
+            
+            return self._parse_result(
+                process.returncode,
+                stdout.decode("utf-8", errors="replace"),
+                stderr.decode("utf-8", errors="replace")
+            )
         
         except Exception as e:
             logger.error(f"Error executing command: {e}")
@@ -223,17 +833,33 @@ class T2PIntegration:
                 "error": str(e)
             }
     
-    def process_natural_language(self, user_input: str) -> Dict[str, Any]:
-        """Process natural language input and execute appropriate t2p command.
+    def close(self) -> None:
+        """Flush buffered writes and stop the t2p worker processes."""
+        if self.write_coalescer is not None:
+            self.write_coalescer.close()
+        if self.worker_pool is not None:
+            self.worker_pool.close()
+    
+    def plan_natural_language(self, user_input: str, use_classifier: bool = True) -> Dict[str, Any]:
+        """Detect the intent of natural language input and generate its command.
+        
+        The command is not executed.
         
         Args:
             user_input: Natural language input from the user
+            use_classifier: Whether the learned intent classifier may detect
+                            the intent; if False, only intent phrases are
+                            matched
             
         Returns:
-            Dict containing the processing results
+            Dict with intent, confidence, parameters and command, or a failure
+            result with "success" set to False
         """
         # 1. Detect intent
-        intent, confidence = self.detect_intent(user_input)
+        if use_classifier:
+            intent, confidence = self.detect_intent(user_input)
+        else:
+            intent, confidence = self.intent_matcher.detect(user_input)
         
         if not intent or confidence < 0.6:
             return {
@@ -256,19 +882,48 @@ class T2PIntegration:
                 "parameters": parameters
             }
         
-        # 4. Execute command
-        result = self.execute_command(command)
-        
-        # 5. Return comprehensive results
         return {
-            "success": result.get("success", False),
             "intent": intent,
             "confidence": confidence,
             "parameters": parameters,
-            "command": command,
-            "result": result
+            "command": command
         }
     
+    def process_natural_language(self, user_input: str) -> Dict[str, Any]:
+        """Process natural language input and execute appropriate t2p command.
+        
+        Args:
+            user_input: Natural language input from the user
+            
+        Returns:
+            Dict containing the processing results
+        """
+        plan = self.plan_natural_language(user_input)
+        if "command" not in plan:
+            return plan
+        
+        # 4. Execute command
+        result = self.execute_command(plan["command"])
+        
+        # 5. Return comprehensive results
+        return {"success": result.get("success", False), **plan, "result": result}
+    
+    async def process_natural_language_async(self, user_input: str) -> Dict[str, Any]:
+        """Process natural language input without blocking the event loop.
+        
+        Args:
+            user_input: Natural language input from the user
+            
+        Returns:
+            Dict containing the processing results
+        """
+        plan = self.plan_natural_language(user_input)
+        if "command" not in plan:
+            return plan
+        
+        result = await self.execute_command_async(plan["command"])
+        return {"success": result.get("success", False), **plan, "result": result}
+    
     def _extract_parameters(self, user_input: str, intent: str) -> Dict[str, Any]:
         """Extract parameters from natural language input based on intent.
         
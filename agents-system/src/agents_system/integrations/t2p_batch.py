@@ -0,0 +1,155 @@
+"""Coalescing of t2p write commands into bulk imports.
+
+Creating many todos or notes one command at a time costs one t2p process
+(or worker round trip) and one store write per item. `T2PWriteCoalescer`
+buffers compatible write commands for a short window and hands them to the
+integration as a single batch, which t2p applies as one bulk import:
+
+    t2p batch <file.jsonl> --json
+
+Each line of the file is the argument list of one command. t2p prints
+``{"results": [{"exit_code": 0, "stdout": "...", "stderr": ""}, ...]}`` in
+the same order. Workers accept the same batch as a ``batch`` request (see
+`t2p_worker`).
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Any, Tuple
+
+logger = logging.getLogger("t2p-batch")
+
+# Command prefixes that t2p can apply as part of a bulk import
+BATCHABLE_COMMANDS = (
+    ("todo", "add"),
+    ("todo", "update"),
+    ("note", "new"),
+)
+
+def is_batchable(argv: List[str]) -> bool:
+    """Check whether a command can be coalesced into a bulk import.
+    
+    AI notes are excluded since generating their content is slow and
+    would hold up the whole batch.
+    
+    Args:
+        argv: Command arguments, without the program name.
+    
+    Returns:
+        True if the command is a batchable write.
+    """
+    return tuple(argv[:2]) in BATCHABLE_COMMANDS and "--ai" not in argv
+
+class T2PWriteCoalescer:
+    """Buffers t2p write commands and flushes them as batches.
+    
+    A batch is flushed `window` seconds after its first command arrived, or
+    as soon as it holds `max_batch_size` commands. Batches run one at a
+    time on a background thread, so writes are applied in submission order.
+    """
+    
+    def __init__(self, execute_batch: Callable[[List[List[str]]], List[Dict[str, Any]]],
+                 window: float = 0.05, max_batch_size: int = 100):
+        """Initialize the coalescer.
+        
+        Args:
+            execute_batch: Function that executes a list of commands and
+                           returns one result per command, in order.
+            window: Seconds to wait for more commands before flushing.
+            max_batch_size: Maximum number of commands per batch.
+        """
+        self.execute_batch = execute_batch
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._pending: List[Tuple[List[str], Future]] = []
+        self._first_pending_at = 0.0
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"commands": 0, "batches": 0}
+    
+    def submit(self, argv: List[str]) -> Future:
+        """Queue a write command for the next batch.
+        
+        Args:
+            argv: Command arguments, without the program name.
+        
+        Returns:
+            Future resolving to the command's result dictionary.
+        """
+        future: Future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("T2PWriteCoalescer is closed")
+            
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="t2p-write-coalescer", daemon=True
+                )
+                self._thread.start()
+            
+            if not self._pending:
+                self._first_pending_at = time.monotonic()
+            self._pending.append((argv, future))
+            self._condition.notify()
+        return future
+    
+    def _next_batch(self) -> List[Tuple[List[str], Future]]:
+        """Wait until a batch is due and take it from the buffer."""
+        with self._condition:
+            while True:
+                if self._pending:
+                    remaining = self._first_pending_at + self.window - time.monotonic()
+                    if remaining <= 0 or len(self._pending) >= self.max_batch_size or self._closed:
+                        break
+                    self._condition.wait(remaining)
+                elif self._closed:
+                    return []
+                else:
+                    self._condition.wait()
+            
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            # Leftover commands have waited long enough already
+            self._first_pending_at = time.monotonic() - self.window
+            return batch
+    
+    def _run(self) -> None:
+        """Flush batches until the coalescer is closed."""
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            
+            self.stats["commands"] += len(batch)
+            self.stats["batches"] += 1
+            try:
+                results = self.execute_batch([argv for argv, _ in batch])
+            except Exception as e:
+                logger.error(f"Error executing t2p batch: {e}")
+                results = [{"success": False, "error": str(e)} for _ in batch]
+            
+            if len(results) != len(batch):
+                error = f"t2p batch returned {len(results)} results for {len(batch)} commands"
+                logger.error(error)
+                results = [{"success": False, "error": error} for _ in batch]
+            
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+    
+    def flush(self) -> None:
+        """Flush buffered commands without waiting for the window to end."""
+        with self._condition:
+            self._first_pending_at = time.monotonic() - self.window
+            self._condition.notify()
+    
+    def close(self) -> None:
+        """Flush buffered commands and stop the background thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,364 @@
+"""Persistent t2p worker processes.
+
+Starting a new t2p process for every command spends most of each call on
+process (and Node runtime) startup. A worker is a long-lived t2p process
+that executes many commands, one per line of a JSON-lines protocol:
+
+    ready    (stdout): {"ready": true}
+    request  (stdin):  {"id": 1, "argv": ["todo", "list", "--json"]}
+    response (stdout): {"id": 1, "exit_code": 0, "stdout": "...", "stderr": ""}
+
+Several write commands can be sent as one batch request, which the worker
+applies as a single bulk import:
+
+    request  (stdin):  {"id": 2, "batch": [["todo", "add", ...], ...]}
+    response (stdout): {"id": 2, "results": [{"exit_code": 0, ...}, ...]}
+
+The ready line is written once at startup; a process that does not send it
+(e.g. a t2p build without worker support) is treated as unavailable.
+`argv` excludes the program name. Workers are restarted when they crash and
+pooled so several commands can run at once.
+"""
+
+import json
+import logging
+import queue
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional, Any
+
+logger = logging.getLogger("t2p-worker")
+
+class T2PWorkerError(RuntimeError):
+    """A request could not be completed by a worker."""
+
+class T2PWorkerUnavailable(T2PWorkerError):
+    """No worker could be started, so the request was not sent."""
+
+class T2PWorker:
+    """A single persistent t2p worker process."""
+    
+    def __init__(self, command: List[str], timeout: float = 30.0, startup_timeout: float = 10.0):
+        """Initialize the worker. The process is started on first use.
+        
+        Args:
+            command: Command line that starts the worker process.
+            timeout: Seconds to wait for a response before the worker is
+                     considered hung and killed.
+            startup_timeout: Seconds to wait for the ready line.
+        """
+        self.command = command
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.process: Optional[subprocess.Popen] = None
+        self.restarts = 0
+        self._responses: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._next_id = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def alive(self) -> bool:
+        """Whether the worker process is running."""
+        return self.process is not None and self.process.poll() is None
+    
+    def start(self) -> None:
+        """Start the worker process if it is not running.
+        
+        Raises:
+            T2PWorkerUnavailable: If the process cannot be started.
+        """
+        if self.alive:
+            return
+        
+        if self.process is not None:
+            self.restarts += 1
+            logger.warning(f"Restarting t2p worker (exit code {self.process.returncode})")
+        
+        try:
+            self.process = subprocess.Popen(
+                self.command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                bufsize=1
+            )
+        except OSError as e:
+            self.process = None
+            raise T2PWorkerUnavailable(f"Could not start t2p worker {self.command}: {e}")
+        
+        # Responses are read on a separate thread so waits can time out
+        self._responses = queue.Queue()
+        threading.Thread(
+            target=self._read_responses,
+            args=(self.process, self._responses),
+            name="t2p-worker-reader",
+            daemon=True
+        ).start()
+        
+        try:
+            line = self._responses.get(timeout=self.startup_timeout)
+            ready = line is not None and json.loads(line).get("ready") is True
+        except (queue.Empty, json.JSONDecodeError, AttributeError):
+            ready = False
+        
+        if not ready:
+            self.process.kill()
+            self.process.wait()
+            self.process = None
+            raise T2PWorkerUnavailable(f"t2p worker {self.command} did not report ready")
+    
+    @staticmethod
+    def _read_responses(process: subprocess.Popen, responses: "queue.Queue[Optional[str]]") -> None:
+        """Forward response lines of a process to a queue; None marks EOF."""
+        for line in process.stdout:
+            responses.put(line)
+        responses.put(None)
+    
+    def request(self, argv: List[str], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Execute a command in the worker.
+        
+        A request that fails before it reaches the worker is retried once on
+        a restarted worker. A request the worker received is never retried,
+        since the command may already have taken effect.
+        
+        Args:
+            argv: Command arguments, without the program name.
+            timeout: Seconds to wait for the response. Defaults to `timeout`.
+        
+        Returns:
+            Response dictionary with exit_code, stdout and stderr.
+        
+        Raises:
+            T2PWorkerUnavailable: If the request could not be sent.
+            T2PWorkerError: If the worker crashed, hung or sent an invalid
+                            response after receiving the request.
+        """
+        return self._result(self._call({"argv": argv}, timeout))
+    
+    def request_batch(self, batch: List[List[str]]) -> Optional[List[Dict[str, Any]]]:
+        """Execute several commands in the worker as one bulk request.
+        
+        Args:
+            batch: Arguments of each command, without the program name.
+        
+        Returns:
+            Response dictionaries in request order, or None if the worker
+            rejected the batch without running it (no batch support).
+        
+        Raises:
+            T2PWorkerUnavailable: If the request could not be sent.
+            T2PWorkerError: If the worker crashed, hung or sent an invalid
+                            response after receiving the request.
+        """
+        response = self._call({"batch": batch})
+        results = response.get("results")
+        if results is None and response.get("exit_code", 1) != 0:
+            return None
+        if not isinstance(results, list) or len(results) != len(batch):
+            raise T2PWorkerError("t2p worker sent an invalid batch response")
+        return [self._result(result) for result in results]
+    
+    @staticmethod
+    def _result(response: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract the result fields of a response."""
+        return {
+            "exit_code": response.get("exit_code", 1),
+            "stdout": response.get("stdout", ""),
+            "stderr": response.get("stderr", "")
+        }
+    
+    def _call(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Send a request to the worker and wait for its response.
+        
+        Args:
+            payload: Request fields other than the id.
+            timeout: Seconds to wait for the response. Defaults to `timeout`.
+        
+        Returns:
+            The response object.
+        """
+        with self._lock:
+            self._next_id += 1
+            request_id = self._next_id
+            line = json.dumps({"id": request_id, **payload}) + "\n"
+            
+            for attempt in range(2):
+                self.start()
+                try:
+                    self.process.stdin.write(line)
+                    self.process.stdin.flush()
+                    break
+                except (BrokenPipeError, OSError) as e:
+                    self.process.kill()
+                    self.process.wait()
+                    if attempt:
+                        raise T2PWorkerUnavailable(f"Could not send request to t2p worker: {e}")
+            
+            return self._read_response(request_id, self.timeout if timeout is None else timeout)
+    
+    def _read_response(self, request_id: int, timeout: float) -> Dict[str, Any]:
+        """Wait for the response to a request."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                line = self._responses.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                self.process.kill()
+                raise T2PWorkerError(f"t2p worker did not respond within {timeout}s")
+            
+            if line is None:
+                self.process.wait()
+                raise T2PWorkerError(f"t2p worker exited with code {self.process.returncode}")
+            
+            try:
+                response = json.loads(line)
+            except json.JSONDecodeError:
+                logger.debug(f"Ignoring non-protocol output from t2p worker: {line.rstrip()}")
+                continue
+            
+            if not isinstance(response, dict) or response.get("id") != request_id:
+                # Late response to a request that already timed out
+                continue
+            
+            return response
+    
+    def close(self) -> None:
+        """Stop the worker process."""
+        with self._lock:
+            if not self.alive:
+                return
+            
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=2)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+
+class T2PWorkerPool:
+    """Pool of persistent t2p workers.
+    
+    Workers are started lazily, up to `size` of them, and each runs one
+    command at a time. When no worker can be started, or a worker keeps
+    crashing, the pool reports itself unavailable for `retry_interval`
+    seconds so callers can fall back to one-shot processes.
+    """
+    
+    def __init__(self, command: List[str], size: int = 2, timeout: float = 30.0,
+                 max_restarts: int = 5, retry_interval: float = 60.0):
+        """Initialize the pool.
+        
+        Args:
+            command: Command line that starts a worker process.
+            size: Maximum number of worker processes.
+            timeout: Per-request timeout in seconds.
+            max_restarts: Restarts of one worker after which the pool backs off.
+            retry_interval: Seconds the pool stays unavailable after a failure.
+        """
+        self.command = command
+        self.size = size
+        self.timeout = timeout
+        self.max_restarts = max_restarts
+        self.retry_interval = retry_interval
+        self._unavailable_until = 0.0
+        self._workers: List[T2PWorker] = []
+        self._idle: "queue.Queue[T2PWorker]" = queue.Queue()
+        self._lock = threading.Lock()
+    
+    @property
+    def available(self) -> bool:
+        """Whether requests should be sent to the pool."""
+        return time.monotonic() >= self._unavailable_until
+    
+    def _back_off(self, reason: str) -> None:
+        """Mark the pool unavailable for `retry_interval` seconds."""
+        logger.warning(f"{reason}; using one-shot t2p processes for {self.retry_interval}s")
+        self._unavailable_until = time.monotonic() + self.retry_interval
+    
+    def _acquire(self) -> T2PWorker:
+        """Get an idle worker, creating one if the pool is not full."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._lock:
+            if len(self._workers) < self.size:
+                worker = T2PWorker(self.command, self.timeout)
+                self._workers.append(worker)
+                return worker
+        
+        return self._idle.get()
+    
+    def execute(self, argv: List[str], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Execute a command on a pooled worker.
+        
+        Args:
+            argv: Command arguments, without the program name.
+            timeout: Seconds to wait for the response. Defaults to the
+                     pool's `timeout`.
+        
+        Returns:
+            Response dictionary with exit_code, stdout and stderr.
+        
+        Raises:
+            T2PWorkerUnavailable: If the pool is unavailable or no worker
+                                  could be started.
+            T2PWorkerError: If the worker failed after receiving the request.
+        """
+        return self._run(T2PWorker.request, argv, timeout)
+    
+    def execute_batch(self, batch: List[List[str]]) -> Optional[List[Dict[str, Any]]]:
+        """Execute several commands on a pooled worker as one bulk request.
+        
+        Args:
+            batch: Arguments of each command, without the program name.
+        
+        Returns:
+            Response dictionaries in request order, or None if the worker
+            does not support batches.
+        
+        Raises:
+            T2PWorkerUnavailable: If the pool is unavailable or no worker
+                                  could be started.
+            T2PWorkerError: If the worker failed after receiving the request.
+        """
+        return self._run(T2PWorker.request_batch, batch)
+    
+    def _run(self, method, *args):
+        """Call a worker method on an idle worker."""
+        if not self.available:
+            raise T2PWorkerUnavailable("t2p worker pool is unavailable")
+        
+        worker = self._acquire()
+        try:
+            return method(worker, *args)
+        except T2PWorkerUnavailable as e:
+            self._back_off(str(e))
+            raise
+        finally:
+            if worker.restarts > self.max_restarts:
+                worker.restarts = 0
+                self._back_off(f"t2p worker restarted more than {self.max_restarts} times")
+            self._idle.put(worker)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics.
+        
+        Returns:
+            Dictionary with pool size, running workers, restarts and availability.
+        """
+        return {
+            "size": self.size,
+            "running": sum(1 for worker in self._workers if worker.alive),
+            "restarts": sum(worker.restarts for worker in self._workers),
+            "available": self.available
+        }
+    
+    def close(self) -> None:
+        """Stop all worker processes."""
+        with self._lock:
+            for worker in self._workers:
+                worker.close()
@@ -5,17 +5,33 @@ from agents_system.utils.prompt_templates import (
     PromptTemplate,
     get_template,
     PromptPatternAnalyzer,
+    TemplateRegistry,
     TEMPLATE_REGISTRY
 )
 
 from agents_system.utils.prompt_engine import PromptEngine
 
 from agents_system.utils.context import ContextManager, AgentContext
-from agents_system.utils.planning import TaskPlanner, TaskDecomposer
+from agents_system.utils.context_assembly import ContextAssembler
+from agents_system.utils.tokens import TokenCounter
+from agents_system.utils.aho_corasick import AhoCorasick
+from agents_system.utils.semantic_cache import SemanticCache
+from agents_system.utils.metrics import LatencyHistogram
 
 __all__ = [
     "ContextManager",
     "AgentContext",
-    "TaskPlanner",
-    "TaskDecomposer"
-] 
\ No newline at end of file
+    "ContextAssembler",
+    "TokenCounter",
+    "AhoCorasick",
+    "SemanticCache",
+    "LatencyHistogram"
+]
+
+# The planning module is not part of every checkout; the other utilities
+# must stay importable without it
+try:
+    from agents_system.utils.planning import TaskPlanner, TaskDecomposer
+    __all__ += ["TaskPlanner", "TaskDecomposer"]
+except ImportError:
+    pass 
\ No newline at end of file
@@ -0,0 +1,94 @@
+"""Aho–Corasick automaton for matching many phrases in one pass."""
+
+from typing import Dict, List, Tuple, Iterator, Hashable, Iterable
+from collections import deque
+
+class AhoCorasick:
+    """Multi-pattern string matcher.
+    
+    All patterns are compiled into one deterministic automaton, so a text is
+    scanned once, character by character, regardless of how many patterns
+    there are. Every occurrence of every pattern is reported, including
+    overlapping ones.
+    """
+    
+    def __init__(self, patterns: Iterable[Tuple[str, Hashable]]):
+        """Compile the automaton.
+        
+        Args:
+            patterns: (pattern, value) pairs. The value is reported with each
+                      match; a pattern may appear with several values.
+        """
+        # Trie: goto[state] maps a character to the next state
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[Tuple[int, Hashable]]] = [[]]
+        
+        for pattern, value in patterns:
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append((len(pattern), value))
+        
+        # Breadth-first pass: compute failure links, merge the outputs of
+        # each state's failure state and complete the transition table so
+        # matching never has to follow failure links
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                target = goto[fallback].get(char, 0)
+                fail[next_state] = target if target != next_state else 0
+                outputs[next_state] = outputs[next_state] + outputs[fail[next_state]]
+            
+            for char, target in goto[fail[state]].items():
+                goto[state].setdefault(char, target)
+        
+        self._goto = goto
+        self._outputs = outputs
+        self.size = len(goto)
+    
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, Hashable]]:
+        """Find all pattern occurrences in a text.
+        
+        Args:
+            text: Text to scan.
+        
+        Yields:
+            (start, end, value) for each occurrence, ordered by end offset.
+        """
+        goto = self._goto
+        outputs = self._outputs
+        state = 0
+        
+        for index, char in enumerate(text):
+            # Characters that start no pattern lead back to the root
+            state = goto[state].get(char, 0)
+            matched = outputs[state]
+            if matched:
+                end = index + 1
+                for length, value in matched:
+                    yield end - length, end, value
+    
+    def find_all(self, text: str) -> List[Tuple[int, int, Hashable]]:
+        """Find all pattern occurrences in a text.
+        
+        Args:
+            text: Text to scan.
+        
+        Returns:
+            List of (start, end, value), ordered by end offset.
+        """
+        return list(self.iter_matches(text))
@@ -0,0 +1,139 @@
+"""Bounded in-memory caches."""
+
+from typing import Dict, Optional, Any, Callable, Hashable
+from collections import OrderedDict
+import threading
+import time
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with optional time-to-live.
+    
+    Entries are evicted when the cache grows past `max_size` (least recently
+    used first) or when they are older than `ttl` seconds. Hit, miss,
+    eviction and expiration counters are kept for monitoring.
+    """
+    
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        """Initialize the cache.
+        
+        Args:
+            max_size: Maximum number of entries.
+            ttl: Time-to-live of an entry in seconds. If None, entries only
+                 leave the cache through eviction or invalidation.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a cached value.
+        
+        Args:
+            key: Cache key.
+            default: Value to return on a miss.
+        
+        Returns:
+            The cached value, or default if missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            
+            value, stored_at = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value.
+        
+        Args:
+            key: Cache key.
+            value: Value to cache.
+        """
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove an entry.
+        
+        Args:
+            key: Cache key.
+            default: Value to return if the key is not cached.
+        
+        Returns:
+            The removed value, or default.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return entry[0] if entry is not None else default
+    
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """Remove entries whose key matches a predicate.
+        
+        Args:
+            predicate: Function called with each key. If None, every entry
+                       is removed.
+        
+        Returns:
+            Number of removed entries.
+        """
+        with self._lock:
+            if predicate is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+    
+    def clear(self) -> None:
+        """Remove every entry."""
+        self.invalidate()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        return self.ttl is None or time.monotonic() - entry[1] <= self.ttl
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics.
+        
+        Returns:
+            Dictionary with size, hit/miss counters and hit rate.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
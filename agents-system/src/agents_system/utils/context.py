@@ -1,27 +1,389 @@
 """Context management for agents."""
 
-from typing import Dict, List, Optional, Any, Set
+from typing import Dict, List, Optional, Any, Set, Deque, Tuple, Callable, Iterable, Iterator, Union
+from collections import OrderedDict, deque
 from datetime import datetime
+import asyncio
+import atexit
 import json
+import mmap
 import os
+import threading
+from array import array
 from pathlib import Path
 
+from agents_system.utils.event_log import EventLogWriter, EventLogReader
+from agents_system.utils.context_assembly import ContextAssembler
+
+# Number of raw history entries kept in memory per history kind
+DEFAULT_HISTORY_LIMIT = 1000
+
+# Number of hourly rollup windows kept per context (one week)
+DEFAULT_ROLLUP_WINDOWS = 168
+
+# Number of evicted entries buffered before they are appended to the archive
+ARCHIVE_BATCH_SIZE = 100
+
+# Number of locks ContextManager spreads agent IDs over
+DEFAULT_LOCK_SHARDS = 32
+
+class ExecutionStats:
+    """Running aggregate of task executions."""
+    
+    __slots__ = ("count", "successes", "total_duration", "min_duration", "max_duration")
+    
+    def __init__(self):
+        """Initialize empty execution statistics."""
+        self.count = 0
+        self.successes = 0
+        self.total_duration = 0.0
+        self.min_duration: Optional[float] = None
+        self.max_duration: Optional[float] = None
+    
+    def add(self, success: bool, duration_seconds: float) -> None:
+        """Add an execution to the aggregate.
+        
+        Args:
+            success: Whether execution was successful.
+            duration_seconds: Duration of execution in seconds.
+        """
+        self.count += 1
+        if success:
+            self.successes += 1
+        self.total_duration += duration_seconds
+        if self.min_duration is None or duration_seconds < self.min_duration:
+            self.min_duration = duration_seconds
+        if self.max_duration is None or duration_seconds > self.max_duration:
+            self.max_duration = duration_seconds
+    
+    @property
+    def success_rate(self) -> float:
+        """Fraction of successful executions."""
+        return self.successes / self.count if self.count else 0.0
+    
+    @property
+    def mean_duration(self) -> float:
+        """Mean execution duration in seconds."""
+        return self.total_duration / self.count if self.count else 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert statistics to dictionary.
+        
+        Returns:
+            Dictionary representation of the statistics.
+        """
+        return {
+            "count": self.count,
+            "successes": self.successes,
+            "success_rate": self.success_rate,
+            "total_duration": self.total_duration,
+            "mean_duration": self.mean_duration,
+            "min_duration": self.min_duration,
+            "max_duration": self.max_duration
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ExecutionStats':
+        """Create statistics from a dictionary.
+        
+        Args:
+            data: Dictionary produced by `to_dict`.
+            
+        Returns:
+            Loaded statistics.
+        """
+        stats = cls()
+        stats.count = data.get("count", 0)
+        stats.successes = data.get("successes", 0)
+        stats.total_duration = data.get("total_duration", 0.0)
+        stats.min_duration = data.get("min_duration")
+        stats.max_duration = data.get("max_duration")
+        return stats
+
+class HistoryStore:
+    """Offset-indexed, memory-mapped storage for a context's raw history.
+    
+    Entries are stored one JSON document per line in ``<base>.history.jsonl``,
+    interactions first and executions after them. A sidecar
+    ``<base>.history.idx`` holds the byte offset of every line, so a single
+    entry can be read without parsing the rest of the file.
+    """
+    
+    KINDS = ("interaction", "execution")
+    
+    def __init__(self, base_path: str, counts: Dict[str, int]):
+        """Initialize the history store.
+        
+        Args:
+            base_path: Context file path without its ``.json`` extension.
+            counts: Number of stored entries per history kind.
+        """
+        self.path = base_path + ".history.jsonl"
+        self.index_path = base_path + ".history.idx"
+        self.counts = {kind: counts.get(kind, 0) for kind in self.KINDS}
+        self._offsets: Optional[array] = None
+    
+    @staticmethod
+    def write(base_path: str, histories: Dict[str, Iterable[Dict[str, Any]]]) -> Dict[str, int]:
+        """Write history entries and their offset index.
+        
+        Args:
+            base_path: Context file path without its ``.json`` extension.
+            histories: Entries per history kind.
+            
+        Returns:
+            Number of written entries per history kind.
+        """
+        path = base_path + ".history.jsonl"
+        index_path = base_path + ".history.idx"
+        offsets = array('Q')
+        counts = {}
+        position = 0
+        
+        with open(path + ".tmp", 'wb') as f:
+            for kind in HistoryStore.KINDS:
+                counts[kind] = 0
+                for entry in histories.get(kind, ()):
+                    line = (json.dumps(entry) + "\n").encode("utf-8")
+                    offsets.append(position)
+                    f.write(line)
+                    position += len(line)
+                    counts[kind] += 1
+        offsets.append(position)
+        
+        with open(index_path + ".tmp", 'wb') as f:
+            offsets.tofile(f)
+        
+        # The index is replaced last; readers rebuild an index that does
+        # not match the data file (see `_load_offsets`)
+        os.replace(path + ".tmp", path)
+        os.replace(index_path + ".tmp", index_path)
+        return counts
+    
+    def _load_offsets(self) -> array:
+        """Load the offset index on first use.
+        
+        An index that does not end at the data file's size, e.g. one left
+        over from a crash between replacing the two files, is rebuilt from
+        the data file.
+        """
+        if self._offsets is None:
+            offsets = array('Q')
+            try:
+                with open(self.index_path, 'rb') as f:
+                    offsets.frombytes(f.read())
+            except (FileNotFoundError, ValueError):
+                offsets = array('Q')
+            
+            if not offsets or offsets[0] != 0 or offsets[-1] != os.path.getsize(self.path):
+                offsets = self._scan_offsets()
+            self._offsets = offsets
+        return self._offsets
+    
+    def _scan_offsets(self) -> array:
+        """Build the offset index by scanning the data file."""
+        offsets = array('Q')
+        position = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                offsets.append(position)
+                position += len(line)
+        offsets.append(position)
+        return offsets
+    
+    def _line_range(self, kind: str, index: int) -> Tuple[int, int]:
+        """Translate a per-kind entry index into a line number range."""
+        count = self.counts[kind]
+        if index < 0:
+            index += count
+        if index < 0 or index >= count:
+            raise IndexError(f"{kind} history index out of range")
+        
+        first = 0 if kind == "interaction" else self.counts["interaction"]
+        return first + index, first + index + 1
+    
+    def read_entry(self, kind: str, index: int) -> Dict[str, Any]:
+        """Read a single history entry.
+        
+        Args:
+            kind: History kind ("interaction" or "execution").
+            index: Index of the entry, negative indices count from the end.
+            
+        Returns:
+            The history entry.
+        """
+        start, end = self._line_range(kind, index)
+        return self._read_lines(start, end)[0]
+    
+    def read_all(self, kind: str) -> List[Dict[str, Any]]:
+        """Read every entry of a history kind.
+        
+        Args:
+            kind: History kind ("interaction" or "execution").
+            
+        Returns:
+            The history entries, oldest first.
+        """
+        if not self.counts[kind]:
+            return []
+        
+        first = 0 if kind == "interaction" else self.counts["interaction"]
+        return self._read_lines(first, first + self.counts[kind])
+    
+    def _read_lines(self, start: int, end: int) -> List[Dict[str, Any]]:
+        """Parse the lines in ``[start, end)`` through a memory map."""
+        offsets = self._load_offsets()
+        
+        with open(self.path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return [
+                    json.loads(mapped[offsets[i]:offsets[i + 1]])
+                    for i in range(start, end)
+                ]
+
 class AgentContext:
-    """Context for an agent, containing local information and history."""
+    """Context for an agent, containing local information and history.
+    
+    History is tiered: the most recent raw entries live in fixed-size ring
+    buffers, while lifetime totals and hourly rollups are kept as aggregates.
+    Raw entries evicted from the ring buffers are appended to an archive on
+    disk when `archive_dir` is set, and dropped otherwise.
+    
+    All methods are thread-safe. Saving works on a snapshot taken under the
+    context lock (``local_data`` is shared copy-on-write), so serialization
+    and disk I/O never block writers.
+    """
     
-    def __init__(self, agent_id: str):
+    def __init__(self, agent_id: str, history_limit: int = DEFAULT_HISTORY_LIMIT,
+                 archive_dir: Optional[str] = None,
+                 max_rollup_windows: int = DEFAULT_ROLLUP_WINDOWS):
         """Initialize agent context.
         
         Args:
             agent_id: ID of the agent this context belongs to.
+            history_limit: Number of raw entries kept in memory per history kind.
+            archive_dir: Directory to archive evicted history entries to. If None,
+                         evicted entries are discarded.
+            max_rollup_windows: Number of hourly rollup windows to keep.
         """
         self.agent_id = agent_id
         self.start_time = datetime.now()
         self.local_data: Dict[str, Any] = {}
-        self.interaction_history: List[Dict[str, Any]] = []
-        self.execution_history: List[Dict[str, Any]] = []
+        self.history_limit = history_limit
+        self.archive_dir = archive_dir
+        self.max_rollup_windows = max_rollup_windows
+        self._interaction_history: Deque[Dict[str, Any]] = deque(maxlen=history_limit)
+        self._execution_history: Deque[Dict[str, Any]] = deque(maxlen=history_limit)
         self.focus_stack: List[str] = []  # Stack of task IDs the agent is focusing on
         self.tags: Set[str] = set()
+        
+        # Aggregates over the whole lifetime of the context
+        self.interaction_count = 0
+        self.execution_count = 0
+        self.interaction_type_counts: Dict[str, int] = {}
+        self.execution_stats: Dict[str, ExecutionStats] = {}
+        self.last_execution: Optional[Dict[str, Any]] = None
+        
+        # Hourly rollups, oldest first: window -> {"interactions": n, "tasks": {type: stats}}
+        self.rollups: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        
+        # Evicted entries waiting to be written to the archive, and batches
+        # taken from them that are being written, oldest first
+        self._pending_archive: List[Tuple[str, Dict[str, Any]]] = []
+        self._archive_batches: Deque[List[Tuple[str, Dict[str, Any]]]] = deque()
+        self._atexit_registered = False
+        
+        # Called with (agent_id, tag, added) whenever the tag set changes
+        self.tag_listener: Optional[Callable[[str, str, bool], None]] = None
+        
+        # Called with (agent_id, kind, entry) whenever a history entry is recorded
+        self.history_listener: Optional[Callable[[str, str, Dict[str, Any]], None]] = None
+        
+        # Raw history of a loaded context stays on disk until it is accessed
+        self._history_store: Optional[HistoryStore] = None
+        
+        # _lock guards state; _save_lock serializes writers of the context files
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        self._archive_lock = threading.Lock()
+        self._local_data_shared = False
+        self._version = 0
+        self._saved_version = -1
+    
+    @property
+    def interaction_history(self) -> Deque[Dict[str, Any]]:
+        """Recent raw interactions, loaded from disk on first access."""
+        self._ensure_history_loaded()
+        return self._interaction_history
+    
+    @interaction_history.setter
+    def interaction_history(self, entries: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._ensure_history_loaded()
+            self._interaction_history = deque(entries, maxlen=self.history_limit)
+            self._version += 1
+    
+    @property
+    def execution_history(self) -> Deque[Dict[str, Any]]:
+        """Recent raw executions, loaded from disk on first access."""
+        self._ensure_history_loaded()
+        return self._execution_history
+    
+    @execution_history.setter
+    def execution_history(self, entries: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._ensure_history_loaded()
+            self._execution_history = deque(entries, maxlen=self.history_limit)
+            self._version += 1
+    
+    @property
+    def dirty(self) -> bool:
+        """Whether the context changed since it was last saved or loaded."""
+        return self._version != self._saved_version
+    
+    @property
+    def history_loaded(self) -> bool:
+        """Whether the raw history is held in memory."""
+        return self._history_store is None
+    
+    def _ensure_history_loaded(self) -> None:
+        """Load the raw history from its store if it is still on disk."""
+        if self._history_store is None:
+            return
+        
+        with self._lock:
+            store = self._history_store
+            if store is None:
+                return
+            
+            self._history_store = None
+            if os.path.exists(store.path):
+                # Entries beyond a reduced history limit go to the archive
+                for entry in store.read_all("interaction"):
+                    self._append_history("interaction", self._interaction_history, entry)
+                for entry in store.read_all("execution"):
+                    self._append_history("execution", self._execution_history, entry)
+    
+    def get_history_entry(self, kind: str, index: int) -> Dict[str, Any]:
+        """Get a single raw history entry without loading the whole history.
+        
+        Args:
+            kind: History kind ("interaction" or "execution").
+            index: Index into the in-memory history, negative indices count
+                   from the most recent entry.
+            
+        Returns:
+            The history entry.
+        """
+        with self._lock:
+            if kind not in HistoryStore.KINDS:
+                raise ValueError(f"Unknown history kind: {kind}")
+            
+            if self._history_store is not None:
+                return self._history_store.read_entry(kind, index)
+            
+            history = self._interaction_history if kind == "interaction" else self._execution_history
+            return history[index]
     
     def update_local_data(self, key: str, value: Any) -> None:
         """Update local data.
@@ -30,7 +392,13 @@ class AgentContext:
             key: Data key.
             value: Data value.
         """
-        self.local_data[key] = value
+        with self._lock:
+            if self._local_data_shared:
+                # A snapshot still references the current dict
+                self.local_data = dict(self.local_data)
+                self._local_data_shared = False
+            self.local_data[key] = value
+            self._version += 1
     
     def get_local_data(self, key: str, default: Any = None) -> Any:
         """Get local data.
@@ -53,12 +421,22 @@ class AgentContext:
             content: Content of the interaction.
             metadata: Additional metadata.
         """
-        self.interaction_history.append({
-            "timestamp": datetime.now().isoformat(),
-            "type": interaction_type,
-            "content": str(content),
-            "metadata": metadata or {}
-        })
+        with self._lock:
+            now = datetime.now()
+            self._append_history("interaction", self.interaction_history, {
+                "timestamp": now.isoformat(),
+                "type": interaction_type,
+                "content": str(content),
+                "metadata": metadata or {}
+            })
+            
+            self.interaction_count += 1
+            self.interaction_type_counts[interaction_type] = \
+                self.interaction_type_counts.get(interaction_type, 0) + 1
+            self._get_rollup_window(now)["interactions"] += 1
+            self._version += 1
+        
+        self._flush_archive_if_full()
     
     def record_execution(self, task_id: str, success: bool, 
                         details: str, duration_seconds: float,
@@ -72,14 +450,163 @@ class AgentContext:
             duration_seconds: Duration of execution in seconds.
             metadata: Additional metadata.
         """
-        self.execution_history.append({
-            "timestamp": datetime.now().isoformat(),
-            "task_id": task_id,
-            "success": success,
-            "details": details,
-            "duration_seconds": duration_seconds,
-            "metadata": metadata or {}
-        })
+        with self._lock:
+            now = datetime.now()
+            entry = {
+                "timestamp": now.isoformat(),
+                "task_id": task_id,
+                "success": success,
+                "details": details,
+                "duration_seconds": duration_seconds,
+                "metadata": metadata or {}
+            }
+            self._append_history("execution", self.execution_history, entry)
+            self._aggregate_execution(entry, self._get_rollup_window(now))
+            self._version += 1
+        
+        self._flush_archive_if_full()
+    
+    def _append_history(self, kind: str, history: Deque[Dict[str, Any]],
+                        entry: Dict[str, Any]) -> None:
+        """Append an entry to a ring buffer, archiving the entry it evicts.
+        
+        Args:
+            kind: History kind ("interaction" or "execution").
+            history: Ring buffer to append to.
+            entry: Entry to append.
+        """
+        if len(history) == history.maxlen and self.archive_dir:
+            self._pending_archive.append((kind, history[0]))
+            if not self._atexit_registered:
+                atexit.register(self.flush_archive)
+                self._atexit_registered = True
+        
+        history.append(entry)
+        
+        if self.history_listener:
+            self.history_listener(self.agent_id, kind, entry)
+    
+    def _aggregate_execution(self, entry: Dict[str, Any],
+                             window: Dict[str, Any]) -> None:
+        """Fold an execution entry into the lifetime and window aggregates.
+        
+        Args:
+            entry: Execution history entry.
+            window: Rollup window the entry belongs to.
+        """
+        task_type = entry["metadata"].get("task_type", "general")
+        
+        if task_type not in self.execution_stats:
+            self.execution_stats[task_type] = ExecutionStats()
+        self.execution_stats[task_type].add(entry["success"], entry["duration_seconds"])
+        
+        if task_type not in window["tasks"]:
+            window["tasks"][task_type] = ExecutionStats()
+        window["tasks"][task_type].add(entry["success"], entry["duration_seconds"])
+        
+        self.execution_count += 1
+        self.last_execution = entry
+    
+    def _get_rollup_window(self, timestamp: datetime) -> Dict[str, Any]:
+        """Get the hourly rollup window for a timestamp, creating it if needed.
+        
+        Args:
+            timestamp: Time of the entry being recorded.
+            
+        Returns:
+            The rollup window.
+        """
+        key = timestamp.strftime("%Y-%m-%dT%H:00")
+        window = self.rollups.get(key)
+        
+        if window is None:
+            window = {"interactions": 0, "tasks": {}}
+            self.rollups[key] = window
+            while len(self.rollups) > self.max_rollup_windows:
+                self.rollups.popitem(last=False)
+        
+        return window
+    
+    def _flush_archive_if_full(self) -> None:
+        """Flush the archive once a batch of evicted entries has built up.
+        
+        Called after releasing the context lock, so recording never waits
+        for the archive files.
+        """
+        if len(self._pending_archive) >= ARCHIVE_BATCH_SIZE:
+            self.flush_archive()
+    
+    def flush_archive(self) -> None:
+        """Append evicted history entries to the archive files.
+        
+        The pending entries are taken under the context lock and written
+        after releasing it. Batches are queued in the order they were taken,
+        so concurrent flushes append them in eviction order.
+        """
+        with self._lock:
+            if self._pending_archive:
+                self._archive_batches.append(self._pending_archive)
+                self._pending_archive = []
+        
+        with self._archive_lock:
+            by_kind: Dict[str, List[str]] = {}
+            while self._archive_batches:
+                for kind, entry in self._archive_batches.popleft():
+                    by_kind.setdefault(kind, []).append(json.dumps(entry) + "\n")
+            if not by_kind or not self.archive_dir:
+                return
+            
+            os.makedirs(self.archive_dir, exist_ok=True)
+            for kind, lines in by_kind.items():
+                archive_file = os.path.join(self.archive_dir, f"{self.agent_id}.{kind}.jsonl")
+                with open(archive_file, 'a') as f:
+                    f.writelines(lines)
+    
+    def get_success_rate(self, task_type: Optional[str] = None) -> float:
+        """Get the execution success rate.
+        
+        Args:
+            task_type: Task type to get the success rate for. If None, the
+                      rate over all task types is returned.
+            
+        Returns:
+            Fraction of successful executions.
+        """
+        with self._lock:
+            if task_type is not None:
+                stats = self.execution_stats.get(task_type)
+                return stats.success_rate if stats else 0.0
+            
+            if not self.execution_count:
+                return 0.0
+            
+            successes = sum(stats.successes for stats in self.execution_stats.values())
+            return successes / self.execution_count
+    
+    def get_rollups(self, since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Get hourly rollups of history, oldest first.
+        
+        Args:
+            since: Only include windows starting at or after this time.
+            
+        Returns:
+            List of rollup windows.
+        """
+        with self._lock:
+            since_key = since.strftime("%Y-%m-%dT%H:00") if since else None
+            
+            return [
+                {
+                    "window": key,
+                    "interactions": window["interactions"],
+                    "tasks": {
+                        task_type: stats.to_dict()
+                        for task_type, stats in window["tasks"].items()
+                    }
+                }
+                for key, window in self.rollups.items()
+                if since_key is None or key >= since_key
+            ]
     
     def push_focus(self, task_id: str) -> None:
         """Push a task onto the focus stack.
@@ -87,7 +614,9 @@ class AgentContext:
         Args:
             task_id: ID of the task to focus on.
         """
-        self.focus_stack.append(task_id)
+        with self._lock:
+            self.focus_stack.append(task_id)
+            self._version += 1
     
     def pop_focus(self) -> Optional[str]:
         """Pop the top task from the focus stack.
@@ -95,10 +624,12 @@ class AgentContext:
         Returns:
             ID of the popped task, or None if stack is empty.
         """
-        if not self.focus_stack:
-            return None
-        
-        return self.focus_stack.pop()
+        with self._lock:
+            if not self.focus_stack:
+                return None
+            
+            self._version += 1
+            return self.focus_stack.pop()
     
     def get_current_focus(self) -> Optional[str]:
         """Get the current focus.
@@ -117,7 +648,14 @@ class AgentContext:
         Args:
             tag: Tag to add.
         """
-        self.tags.add(tag)
+        with self._lock:
+            if tag in self.tags:
+                return
+            
+            self.tags.add(tag)
+            self._version += 1
+            if self.tag_listener:
+                self.tag_listener(self.agent_id, tag, True)
     
     def remove_tag(self, tag: str) -> None:
         """Remove a tag from the context.
@@ -125,7 +663,14 @@ class AgentContext:
         Args:
             tag: Tag to remove.
         """
-        self.tags.discard(tag)
+        with self._lock:
+            if tag not in self.tags:
+                return
+            
+            self.tags.discard(tag)
+            self._version += 1
+            if self.tag_listener:
+                self.tag_listener(self.agent_id, tag, False)
     
     def has_tag(self, tag: str) -> bool:
         """Check if context has a tag.
@@ -138,37 +683,98 @@ class AgentContext:
         """
         return tag in self.tags
     
-    def to_dict(self) -> Dict[str, Any]:
+    def to_dict(self, include_history: bool = True) -> Dict[str, Any]:
         """Convert context to dictionary.
         
+        Args:
+            include_history: Whether to include the raw history entries.
+        
         Returns:
             Dictionary representation of the context.
         """
-        return {
-            "agent_id": self.agent_id,
-            "start_time": self.start_time.isoformat(),
-            "local_data": self.local_data,
-            "interaction_history": self.interaction_history,
-            "execution_history": self.execution_history,
-            "focus_stack": self.focus_stack,
-            "tags": list(self.tags)
-        }
+        with self._lock:
+            # local_data is handed out copy-on-write: the next update copies it
+            self._local_data_shared = True
+            data = {
+                "agent_id": self.agent_id,
+                "start_time": self.start_time.isoformat(),
+                "local_data": self.local_data,
+                "focus_stack": list(self.focus_stack),
+                "tags": list(self.tags),
+                "history_limit": self.history_limit,
+                "interaction_count": self.interaction_count,
+                "execution_count": self.execution_count,
+                "interaction_type_counts": dict(self.interaction_type_counts),
+                "execution_stats": {
+                    task_type: stats.to_dict()
+                    for task_type, stats in self.execution_stats.items()
+                },
+                "last_execution": self.last_execution,
+                "rollups": {
+                    key: {
+                        "interactions": window["interactions"],
+                        "tasks": {
+                            task_type: stats.to_dict()
+                            for task_type, stats in window["tasks"].items()
+                        }
+                    }
+                    for key, window in self.rollups.items()
+                }
+            }
+            
+            if include_history:
+                data["interaction_history"] = list(self.interaction_history)
+                data["execution_history"] = list(self.execution_history)
+            
+            return data
     
     def save_to_file(self, filepath: str) -> None:
         """Save context to a file.
         
+        Header state is written to ``filepath`` and raw history to an
+        offset-indexed sidecar (see `HistoryStore`). History that was never
+        loaded is left untouched on disk.
+        
         Args:
             filepath: Path to save the context to.
         """
-        with open(filepath, 'w') as f:
-            json.dump(self.to_dict(), f, indent=2)
+        base_path = os.path.splitext(filepath)[0]
+        
+        with self._save_lock:
+            # Take a snapshot under the state lock; everything below runs without it
+            with self._lock:
+                version = self._version
+                store = self._history_store
+                reuse_store = store is not None and store.path == base_path + ".history.jsonl"
+                histories = None if reuse_store else {
+                    "interaction": list(self.interaction_history),
+                    "execution": list(self.execution_history)
+                }
+                header = self.to_dict(include_history=False)
+            
+            self.flush_archive()
+            
+            if reuse_store:
+                counts = store.counts
+            else:
+                counts = HistoryStore.write(base_path, histories)
+            header["history_counts"] = counts
+            
+            with open(filepath + ".tmp", 'w') as f:
+                json.dump(header, f, indent=2)
+            os.replace(filepath + ".tmp", filepath)
+            
+            self._saved_version = version
     
     @classmethod
-    def load_from_file(cls, filepath: str) -> 'AgentContext':
+    def load_from_file(cls, filepath: str, archive_dir: Optional[str] = None,
+                       history_limit: Optional[int] = None) -> 'AgentContext':
         """Load context from a file.
         
         Args:
             filepath: Path to load the context from.
+            archive_dir: Directory to archive evicted history entries to.
+            history_limit: Ring buffer size. If None, the stored size is used.
             
         Returns:
             Loaded context.
@@ -176,30 +782,362 @@ class AgentContext:
         with open(filepath, 'r') as f:
             data = json.load(f)
         
-        context = cls(data["agent_id"])
+        context = cls(
+            data["agent_id"],
+            history_limit=history_limit or data.get("history_limit", DEFAULT_HISTORY_LIMIT),
+            archive_dir=archive_dir
+        )
         context.start_time = datetime.fromisoformat(data["start_time"])
         context.local_data = data["local_data"]
-        context.interaction_history = data["interaction_history"]
-        context.execution_history = data["execution_history"]
         context.focus_stack = data["focus_stack"]
         context.tags = set(data["tags"])
         
+        if "execution_stats" not in data:
+            # Files written before history was tiered only hold raw entries
+            for entry in data["interaction_history"]:
+                context.record_interaction_entry(entry)
+            for entry in data["execution_history"]:
+                context.record_execution_entry(entry)
+            return context
+        
+        if "history_counts" in data:
+            context._history_store = HistoryStore(
+                os.path.splitext(filepath)[0], data["history_counts"]
+            )
+        else:
+            context.interaction_history.extend(data["interaction_history"])
+            context.execution_history.extend(data["execution_history"])
+        
+        context.interaction_count = data["interaction_count"]
+        context.execution_count = data["execution_count"]
+        context.interaction_type_counts = data["interaction_type_counts"]
+        context.execution_stats = {
+            task_type: ExecutionStats.from_dict(stats)
+            for task_type, stats in data["execution_stats"].items()
+        }
+        context.last_execution = data.get("last_execution")
+        
+        for key, window in data.get("rollups", {}).items():
+            context.rollups[key] = {
+                "interactions": window["interactions"],
+                "tasks": {
+                    task_type: ExecutionStats.from_dict(stats)
+                    for task_type, stats in window["tasks"].items()
+                }
+            }
+        
+        context._saved_version = context._version
         return context
+    
+    def record_interaction_entry(self, entry: Dict[str, Any]) -> None:
+        """Record a previously serialized interaction entry.
+        
+        Args:
+            entry: Interaction entry with its original timestamp.
+        """
+        with self._lock:
+            self._append_history("interaction", self.interaction_history, entry)
+            self.interaction_count += 1
+            self.interaction_type_counts[entry["type"]] = \
+                self.interaction_type_counts.get(entry["type"], 0) + 1
+            self._get_rollup_window(datetime.fromisoformat(entry["timestamp"]))["interactions"] += 1
+        
+        self._flush_archive_if_full()
+    
+    def record_execution_entry(self, entry: Dict[str, Any]) -> None:
+        """Record a previously serialized execution entry.
+        
+        Args:
+            entry: Execution entry with its original timestamp.
+        """
+        with self._lock:
+            self._append_history("execution", self.execution_history, entry)
+            self._aggregate_execution(
+                entry, self._get_rollup_window(datetime.fromisoformat(entry["timestamp"]))
+            )
+        
+        self._flush_archive_if_full()
+    
+    def get_summary(self) -> Dict[str, Any]:
+        """Get a summary of the context computed from aggregates.
+        
+        Returns:
+            Summary of the context.
+        """
+        with self._lock:
+            return {
+                "agent_id": self.agent_id,
+                "uptime_seconds": (datetime.now() - self.start_time).total_seconds(),
+                "interaction_count": self.interaction_count,
+                "execution_count": self.execution_count,
+                "success_rate": self.get_success_rate(),
+                "current_focus": self.get_current_focus(),
+                "tags": list(self.tags),
+                "last_execution": self.last_execution
+            }
+
+class TagIndex:
+    """Persistent inverted index from tags to agent IDs.
+    
+    Supports boolean queries such as ``"planning AND (h1 OR h2) AND NOT blocked"``
+    without loading the contexts themselves. Adjacent terms without an
+    operator are combined with AND.
+    """
+    
+    def __init__(self, index_path: Optional[str] = None):
+        """Initialize the tag index.
+        
+        Args:
+            index_path: Path to persist the index to. If None, the index
+                        is kept in memory only.
+        """
+        self.index_path = index_path
+        self.postings: Dict[str, Set[str]] = {}
+        self.agents: Set[str] = set()
+        self.dirty = False
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        
+        if index_path and os.path.exists(index_path):
+            self.load()
+    
+    def add_agent(self, agent_id: str) -> None:
+        """Register an agent so it takes part in NOT queries.
+        
+        Args:
+            agent_id: ID of the agent.
+        """
+        with self._lock:
+            if agent_id not in self.agents:
+                self.agents.add(agent_id)
+                self.dirty = True
+    
+    def add(self, tag: str, agent_id: str) -> None:
+        """Record that an agent's context has a tag.
+        
+        Args:
+            tag: Tag that was added.
+            agent_id: ID of the agent.
+        """
+        with self._lock:
+            self.add_agent(agent_id)
+            agent_ids = self.postings.setdefault(tag, set())
+            if agent_id not in agent_ids:
+                agent_ids.add(agent_id)
+                self.dirty = True
+    
+    def remove(self, tag: str, agent_id: str) -> None:
+        """Record that an agent's context no longer has a tag.
+        
+        Args:
+            tag: Tag that was removed.
+            agent_id: ID of the agent.
+        """
+        with self._lock:
+            agent_ids = self.postings.get(tag)
+            if not agent_ids or agent_id not in agent_ids:
+                return
+            
+            agent_ids.discard(agent_id)
+            if not agent_ids:
+                del self.postings[tag]
+            self.dirty = True
+    
+    def set_tags(self, agent_id: str, tags: Iterable[str]) -> None:
+        """Replace the indexed tags of an agent.
+        
+        Args:
+            agent_id: ID of the agent.
+            tags: Complete set of tags the agent's context has.
+        """
+        with self._lock:
+            tags = set(tags)
+            for tag in [t for t, ids in self.postings.items() if agent_id in ids and t not in tags]:
+                self.remove(tag, agent_id)
+            
+            self.add_agent(agent_id)
+            for tag in tags:
+                self.add(tag, agent_id)
+    
+    def lookup(self, tag: str) -> Set[str]:
+        """Get the agents whose contexts have a tag.
+        
+        Args:
+            tag: Tag to look up.
+            
+        Returns:
+            Set of agent IDs.
+        """
+        with self._lock:
+            return set(self.postings.get(tag, ()))
+    
+    def query(self, expression: str) -> Set[str]:
+        """Evaluate a boolean tag query.
+        
+        Args:
+            expression: Query using tags, AND, OR, NOT and parentheses.
+                        Tags containing spaces or parentheses can be quoted.
+            
+        Returns:
+            Set of matching agent IDs.
+            
+        Raises:
+            ValueError: If the expression is malformed.
+        """
+        with self._lock:
+            tokens = self._tokenize(expression)
+            if not tokens:
+                return set()
+            
+            result, position = self._parse_or(tokens, 0)
+            if position != len(tokens):
+                raise ValueError(f"Unexpected token '{tokens[position]}' in tag query")
+            
+            return result
+    
+    @staticmethod
+    def _tokenize(expression: str) -> List[str]:
+        """Split a query expression into tokens."""
+        tokens = []
+        i = 0
+        while i < len(expression):
+            char = expression[i]
+            if char.isspace():
+                i += 1
+            elif char in "()":
+                tokens.append(char)
+                i += 1
+            elif char == '"':
+                end = expression.find('"', i + 1)
+                if end == -1:
+                    raise ValueError("Unterminated quote in tag query")
+                # Prefix quoted tags so they are never mistaken for operators
+                tokens.append("=" + expression[i + 1:end])
+                i = end + 1
+            else:
+                start = i
+                while i < len(expression) and not expression[i].isspace() and expression[i] not in '()"':
+                    i += 1
+                tokens.append(expression[start:i])
+        return tokens
+    
+    def _parse_or(self, tokens: List[str], position: int) -> Tuple[Set[str], int]:
+        """Parse a sequence of AND-expressions joined by OR."""
+        result, position = self._parse_and(tokens, position)
+        while position < len(tokens) and tokens[position] == "OR":
+            right, position = self._parse_and(tokens, position + 1)
+            result = result | right
+        return result, position
+    
+    def _parse_and(self, tokens: List[str], position: int) -> Tuple[Set[str], int]:
+        """Parse a sequence of NOT-expressions joined by AND."""
+        result, position = self._parse_not(tokens, position)
+        while position < len(tokens) and tokens[position] not in ("OR", ")"):
+            if tokens[position] == "AND":
+                position += 1
+            right, position = self._parse_not(tokens, position)
+            result = result & right
+        return result, position
+    
+    def _parse_not(self, tokens: List[str], position: int) -> Tuple[Set[str], int]:
+        """Parse an optionally negated atom."""
+        if position < len(tokens) and tokens[position] == "NOT":
+            operand, position = self._parse_not(tokens, position + 1)
+            return self.agents - operand, position
+        return self._parse_atom(tokens, position)
+    
+    def _parse_atom(self, tokens: List[str], position: int) -> Tuple[Set[str], int]:
+        """Parse a tag or a parenthesised expression."""
+        if position >= len(tokens):
+            raise ValueError("Unexpected end of tag query")
+        
+        token = tokens[position]
+        if token == "(":
+            result, position = self._parse_or(tokens, position + 1)
+            if position >= len(tokens) or tokens[position] != ")":
+                raise ValueError("Missing closing parenthesis in tag query")
+            return result, position + 1
+        
+        if token in ("AND", "OR", ")"):
+            raise ValueError(f"Unexpected token '{token}' in tag query")
+        
+        tag = token[1:] if token.startswith("=") else token
+        return self.lookup(tag), position + 1
+    
+    def save(self) -> None:
+        """Persist the index if it changed since the last save."""
+        if not self.index_path:
+            return
+        
+        with self._save_lock:
+            with self._lock:
+                if not self.dirty:
+                    return
+                data = {
+                    "agents": sorted(self.agents),
+                    "tags": {tag: sorted(ids) for tag, ids in self.postings.items()}
+                }
+                self.dirty = False
+            
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.index_path)
+    
+    def load(self) -> None:
+        """Load the index from disk."""
+        with self._lock:
+            with open(self.index_path, 'r') as f:
+                data = json.load(f)
+            
+            self.agents = set(data.get("agents", []))
+            self.postings = {tag: set(ids) for tag, ids in data.get("tags", {}).items()}
+            self.dirty = False
 
 class ContextManager:
-    """Manager for agent contexts."""
+    """Manager for agent contexts.
     
-    def __init__(self, storage_dir: Optional[str] = None):
+    The manager is safe to share between threads. Loading and saving are
+    serialized per agent through a fixed set of sharded locks, so agents in
+    different shards never wait for each other. Locks are never held across
+    an ``await``, so the synchronous methods are also safe to call from
+    coroutines; the ``*_async`` variants move disk I/O off the event loop.
+    """
+    
+    def __init__(self, storage_dir: Optional[str] = None,
+                 history_limit: int = DEFAULT_HISTORY_LIMIT,
+                 event_log_options: Optional[Dict[str, Any]] = None,
+                 lock_shards: int = DEFAULT_LOCK_SHARDS):
         """Initialize the context manager.
         
         Args:
             storage_dir: Directory to store contexts. If None, contexts won't be persisted.
+            history_limit: Number of raw history entries each context keeps in memory.
+            event_log_options: Keyword arguments for the global event log writer
+                               (see `EventLogWriter`).
+            lock_shards: Number of locks agent IDs are spread over.
         """
         self.contexts: Dict[str, AgentContext] = {}
+        self._shard_locks = [threading.Lock() for _ in range(lock_shards)]
         self.storage_dir = storage_dir
+        self.history_limit = history_limit
+        self.archive_dir = os.path.join(storage_dir, "archive") if storage_dir else None
+        self.event_writer: Optional[EventLogWriter] = None
         
         if storage_dir:
             os.makedirs(storage_dir, exist_ok=True)
+            self.event_writer = EventLogWriter(
+                os.path.join(storage_dir, "global_events.jsonl"),
+                **(event_log_options or {})
+            )
+        
+        index_path = os.path.join(storage_dir, "tag_index.json") if storage_dir else None
+        rebuild_index = bool(index_path) and not os.path.exists(index_path)
+        self.tag_index = TagIndex(index_path)
+        if rebuild_index:
+            self._rebuild_tag_index()
+        
+        self.assembler = ContextAssembler()
     
     def get_context(self, agent_id: str) -> AgentContext:
         """Get context for an agent.
@@ -210,18 +1148,123 @@ class ContextManager:
         Returns:
             Context for the agent.
         """
-        if agent_id not in self.contexts:
+        context = self.contexts.get(agent_id)
+        if context is not None:
+            return context
+        
+        with self._shard_lock(agent_id):
+            # Another thread may have loaded it while we waited
+            context = self.contexts.get(agent_id)
+            if context is not None:
+                return context
+            
             # Try to load from storage
             if self.storage_dir:
                 filepath = os.path.join(self.storage_dir, f"{agent_id}.json")
                 if os.path.exists(filepath):
-                    self.contexts[agent_id] = AgentContext.load_from_file(filepath)
+                    context = AgentContext.load_from_file(
+                        filepath,
+                        archive_dir=self.archive_dir,
+                        history_limit=self.history_limit
+                    )
                 else:
-                    self.contexts[agent_id] = AgentContext(agent_id)
+                    context = AgentContext(
+                        agent_id,
+                        history_limit=self.history_limit,
+                        archive_dir=self.archive_dir
+                    )
             else:
-                self.contexts[agent_id] = AgentContext(agent_id)
+                context = AgentContext(agent_id, history_limit=self.history_limit)
+            
+            self.tag_index.set_tags(agent_id, context.tags)
+            context.tag_listener = self._on_tag_changed
+            self.contexts[agent_id] = context
         
-        return self.contexts[agent_id]
+        return context
+    
+    def build_prompt_context(self, agent_id: str, query: str,
+                             token_budget: int = 512) -> str:
+        """Build the ``${context}`` section of a prompt from agent history.
+        
+        The agent's history entries are ranked by relevance to the query and
+        the best ones that fit the token budget are returned, oldest first.
+        
+        Args:
+            agent_id: ID of the agent whose history to use.
+            query: Text the context should be relevant to, e.g. the objective.
+            token_budget: Maximum number of tokens to return.
+            
+        Returns:
+            Relevant history, one entry per line.
+        """
+        context = self.get_context(agent_id)
+        
+        if not self.assembler.is_indexed(agent_id):
+            with context._lock:
+                if not self.assembler.is_indexed(agent_id):
+                    # Index what is already recorded, e.g. after a load from disk
+                    self.assembler.index_history(
+                        agent_id,
+                        list(context.interaction_history),
+                        list(context.execution_history)
+                    )
+                context.history_listener = self.assembler.observe
+        
+        return self.assembler.assemble(agent_id, query, token_budget)
+    
+    async def get_context_async(self, agent_id: str) -> AgentContext:
+        """Get context for an agent without blocking the event loop.
+        
+        Args:
+            agent_id: ID of the agent to get context for.
+            
+        Returns:
+            Context for the agent.
+        """
+        context = self.contexts.get(agent_id)
+        if context is not None:
+            return context
+        
+        return await asyncio.to_thread(self.get_context, agent_id)
+    
+    def _shard_lock(self, agent_id: str) -> threading.Lock:
+        """Get the lock guarding an agent's context files.
+        
+        Args:
+            agent_id: ID of the agent.
+            
+        Returns:
+            The shard lock for the agent.
+        """
+        return self._shard_locks[hash(agent_id) % len(self._shard_locks)]
+    
+    def _on_tag_changed(self, agent_id: str, tag: str, added: bool) -> None:
+        """Keep the tag index in sync with a context's tags.
+        
+        Args:
+            agent_id: ID of the agent whose tags changed.
+            tag: Tag that changed.
+            added: True if the tag was added, False if it was removed.
+        """
+        if added:
+            self.tag_index.add(tag, agent_id)
+        else:
+            self.tag_index.remove(tag, agent_id)
+    
+    def _rebuild_tag_index(self) -> None:
+        """Build the tag index from the contexts in the storage directory."""
+        for filename in os.listdir(self.storage_dir):
+            if not filename.endswith(".json") or filename == "tag_index.json":
+                continue
+            
+            try:
+                with open(os.path.join(self.storage_dir, filename), 'r') as f:
+                    data = json.load(f)
+                self.tag_index.set_tags(data["agent_id"], data.get("tags", []))
+            except (json.JSONDecodeError, KeyError):
+                continue
+        
+        self.tag_index.save()
     
     def save_context(self, agent_id: str) -> None:
         """Save context for an agent.
@@ -235,16 +1278,48 @@ class ContextManager:
         if agent_id not in self.contexts:
             return
         
+        self._save_context(agent_id)
+        self.tag_index.save()
+    
+    def _save_context(self, agent_id: str) -> None:
+        """Write a context to storage if it changed since it was last saved.
+        
+        Args:
+            agent_id: ID of the agent to save context for.
+        """
+        context = self.contexts.get(agent_id)
+        if context is None:
+            return
+        
         filepath = os.path.join(self.storage_dir, f"{agent_id}.json")
-        self.contexts[agent_id].save_to_file(filepath)
+        if not context.dirty and os.path.exists(filepath):
+            return
+        
+        with self._shard_lock(agent_id):
+            context.save_to_file(filepath)
     
     def save_all_contexts(self) -> None:
         """Save all contexts."""
         if not self.storage_dir:
             return
         
-        for agent_id in self.contexts:
-            self.save_context(agent_id)
+        # Copy the keys so contexts can be added while we save
+        for agent_id in list(self.contexts):
+            self._save_context(agent_id)
+        
+        self.tag_index.save()
+    
+    async def save_context_async(self, agent_id: str) -> None:
+        """Save context for an agent without blocking the event loop.
+        
+        Args:
+            agent_id: ID of the agent to save context for.
+        """
+        await asyncio.to_thread(self.save_context, agent_id)
+    
+    async def save_all_contexts_async(self) -> None:
+        """Save all contexts without blocking the event loop."""
+        await asyncio.to_thread(self.save_all_contexts)
     
     def record_global_event(self, event_type: str, description: str, 
                            metadata: Optional[Dict[str, Any]] = None) -> None:
@@ -255,34 +1330,98 @@ class ContextManager:
             description: Description of the event.
             metadata: Additional metadata.
         """
-        if not self.storage_dir:
+        if not self.event_writer:
             return
         
-        events_file = os.path.join(self.storage_dir, "global_events.jsonl")
-        
-        event = {
+        self.event_writer.write({
             "timestamp": datetime.now().isoformat(),
             "type": event_type,
             "description": description,
             "metadata": metadata or {}
-        }
+        })
+    
+    def flush_events(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all recorded global events have been written.
+        
+        Args:
+            timeout: Maximum time to wait in seconds.
+            
+        Returns:
+            True if all events were written, False on timeout.
+        """
+        if not self.event_writer:
+            return True
+        
+        return self.event_writer.flush(timeout)
+    
+    def query_global_events(self,
+                            start: Optional[Union[datetime, str]] = None,
+                            end: Optional[Union[datetime, str]] = None,
+                            event_types: Optional[Iterable[str]] = None,
+                            metadata_key: Optional[str] = None,
+                            metadata_value: Any = None,
+                            limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Query recorded global events.
+        
+        Events still queued for writing are flushed first. Results stream out
+        lazily, so large logs can be consumed incrementally.
+        
+        Args:
+            start: Only include events at or after this time.
+            end: Only include events before this time.
+            event_types: Only include events of these types.
+            metadata_key: Only include events whose metadata has this key.
+            metadata_value: With `metadata_key`, only include events whose
+                            metadata value for the key equals this value.
+            limit: Maximum number of events to return.
+            
+        Returns:
+            Iterator over matching events, oldest first.
+        """
+        if not self.event_writer:
+            return iter(())
         
-        with open(events_file, 'a') as f:
-            f.write(json.dumps(event) + "\n")
+        self.flush_events()
+        return EventLogReader(self.event_writer.path).query(
+            start=start,
+            end=end,
+            event_types=event_types,
+            metadata_key=metadata_key,
+            metadata_value=metadata_value,
+            limit=limit
+        )
+    
+    def close(self) -> None:
+        """Flush pending global events and evicted history entries, and stop
+        the background writer."""
+        for context in list(self.contexts.values()):
+            context.flush_archive()
+        if self.event_writer:
+            self.event_writer.close()
     
     def query_contexts_by_tag(self, tag: str) -> List[str]:
         """Query contexts by tag.
         
+        Both loaded and persisted contexts are searched, via the tag index.
+        
         Args:
             tag: Tag to query for.
             
         Returns:
             List of agent IDs whose contexts have the tag.
         """
-        return [
-            agent_id for agent_id, context in self.contexts.items()
-            if context.has_tag(tag)
-        ]
+        return sorted(self.tag_index.lookup(tag))
+    
+    def query_contexts_by_tags(self, expression: str) -> List[str]:
+        """Query contexts with a boolean tag expression.
+        
+        Args:
+            expression: Query such as ``"planning AND NOT (blocked OR archived)"``.
+            
+        Returns:
+            List of agent IDs whose contexts match the expression.
+        """
+        return sorted(self.tag_index.query(expression))
     
     def get_context_summary(self, agent_id: str) -> Dict[str, Any]:
         """Get a summary of an agent's context.
@@ -296,14 +1435,5 @@ class ContextManager:
         if agent_id not in self.contexts:
             return {}
         
-        context = self.contexts[agent_id]
-        
-        return {
-            "agent_id": agent_id,
-            "uptime_seconds": (datetime.now() - context.start_time).total_seconds(),
-            "interaction_count": len(context.interaction_history),
-            "execution_count": len(context.execution_history),
-            "current_focus": context.get_current_focus(),
-            "tags": list(context.tags),
-            "last_execution": context.execution_history[-1] if context.execution_history else None
-        } 
\ No newline at end of file
+        return self.contexts[agent_id].get_summary()
+ 
\ No newline at end of file
@@ -0,0 +1,260 @@
+"""Relevance-ranked, token-budgeted assembly of agent history for prompts."""
+
+from typing import Dict, List, Optional, Any, Tuple
+from collections import OrderedDict
+import heapq
+import math
+import re
+import threading
+
+from agents_system.utils.tokens import TokenCounter
+
+# Maximum number of history entries indexed per agent
+DEFAULT_MAX_INDEXED_ENTRIES = 5000
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9_]+")
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase index terms.
+    
+    Args:
+        text: Text to tokenize.
+    
+    Returns:
+        List of terms.
+    """
+    return _TOKEN_PATTERN.findall(text.lower())
+
+def format_history_entry(kind: str, entry: Dict[str, Any]) -> str:
+    """Render a history entry as a single line of prompt context.
+    
+    Args:
+        kind: History kind ("interaction" or "execution").
+        entry: History entry.
+    
+    Returns:
+        Formatted entry.
+    """
+    if kind == "execution":
+        outcome = "succeeded" if entry.get("success") else "failed"
+        return (
+            f"[{entry.get('timestamp', '')}] Task {entry.get('task_id')} {outcome} "
+            f"in {entry.get('duration_seconds', 0):.2f}s: {entry.get('details', '')}"
+        )
+    
+    return f"[{entry.get('timestamp', '')}] {entry.get('type')}: {entry.get('content', '')}"
+
+class HistoryIndex:
+    """Incrementally maintained BM25 index over one agent's history.
+    
+    Scoring only touches the postings of the query terms, so the cost of a
+    query depends on how many entries mention those terms rather than on the
+    size of the history. The oldest entries are dropped once `max_entries`
+    is reached.
+    """
+    
+    def __init__(self, max_entries: int = DEFAULT_MAX_INDEXED_ENTRIES):
+        """Initialize the history index.
+        
+        Args:
+            max_entries: Maximum number of entries kept in the index.
+        """
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[int, Tuple[str, int]]" = OrderedDict()
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.total_length = 0
+        self._next_id = 0
+        self._lock = threading.Lock()
+    
+    def add(self, text: str) -> int:
+        """Add an entry to the index.
+        
+        Args:
+            text: Formatted entry text.
+        
+        Returns:
+            ID of the indexed entry.
+        """
+        terms = tokenize(text)
+        
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            
+            self.entries[entry_id] = (text, len(terms))
+            self.total_length += len(terms)
+            
+            frequencies: Dict[str, int] = {}
+            for term in terms:
+                frequencies[term] = frequencies.get(term, 0) + 1
+            for term, frequency in frequencies.items():
+                self.postings.setdefault(term, {})[entry_id] = frequency
+            
+            while len(self.entries) > self.max_entries:
+                self._remove_oldest()
+        
+        return entry_id
+    
+    def _remove_oldest(self) -> None:
+        """Drop the oldest entry from the index."""
+        entry_id, (text, length) = self.entries.popitem(last=False)
+        self.total_length -= length
+        
+        for term in set(tokenize(text)):
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(entry_id, None)
+            if not postings:
+                del self.postings[term]
+    
+    def search(self, query: str, limit: int) -> List[Tuple[float, int, str]]:
+        """Find the entries most relevant to a query.
+        
+        Args:
+            query: Query text.
+            limit: Maximum number of results.
+        
+        Returns:
+            List of (score, entry_id, text), best first.
+        """
+        terms = set(tokenize(query))
+        
+        with self._lock:
+            count = len(self.entries)
+            if not count or not terms:
+                return []
+            
+            average_length = self.total_length / count or 1.0
+            scores: Dict[int, float] = {}
+            
+            for term in terms:
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                
+                frequency_in_entries = len(postings)
+                idf = math.log(1 + (count - frequency_in_entries + 0.5) / (frequency_in_entries + 0.5))
+                
+                for entry_id, frequency in postings.items():
+                    length = self.entries[entry_id][1]
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                    scores[entry_id] = scores.get(entry_id, 0.0) + \
+                        idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+            
+            best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            return [(score, entry_id, self.entries[entry_id][0]) for entry_id, score in best]
+
+class ContextAssembler:
+    """Builds prompt context from the most relevant parts of agent history.
+    
+    Entries are indexed as they are recorded (see `observe`). `assemble`
+    ranks them against a query with BM25 and packs the best ones into a
+    token budget, keeping them in chronological order.
+    """
+    
+    def __init__(self, max_entries_per_agent: int = DEFAULT_MAX_INDEXED_ENTRIES,
+                 token_counter: Optional[TokenCounter] = None):
+        """Initialize the context assembler.
+        
+        Args:
+            max_entries_per_agent: Maximum number of entries indexed per agent.
+            token_counter: Token counter for the budget. If None, a default
+                           `TokenCounter` is created.
+        """
+        self.max_entries_per_agent = max_entries_per_agent
+        self.token_counter = token_counter or TokenCounter()
+        self.indexes: Dict[str, HistoryIndex] = {}
+        self._lock = threading.Lock()
+    
+    def is_indexed(self, agent_id: str) -> bool:
+        """Check whether an agent's history has been indexed.
+        
+        Args:
+            agent_id: ID of the agent.
+        
+        Returns:
+            True if the agent has an index.
+        """
+        return agent_id in self.indexes
+    
+    def _get_index(self, agent_id: str) -> HistoryIndex:
+        """Get or create the index for an agent."""
+        index = self.indexes.get(agent_id)
+        if index is None:
+            with self._lock:
+                index = self.indexes.setdefault(
+                    agent_id, HistoryIndex(self.max_entries_per_agent)
+                )
+        return index
+    
+    def observe(self, agent_id: str, kind: str, entry: Dict[str, Any]) -> None:
+        """Index a newly recorded history entry.
+        
+        Args:
+            agent_id: ID of the agent the entry belongs to.
+            kind: History kind ("interaction" or "execution").
+            entry: History entry.
+        """
+        self._get_index(agent_id).add(format_history_entry(kind, entry))
+    
+    def index_history(self, agent_id: str, interactions: List[Dict[str, Any]],
+                      executions: List[Dict[str, Any]]) -> None:
+        """Index existing history, e.g. of a context loaded from disk.
+        
+        Args:
+            agent_id: ID of the agent.
+            interactions: Interaction entries.
+            executions: Execution entries.
+        """
+        index = self._get_index(agent_id)
+        entries = [("interaction", entry) for entry in interactions] + \
+                  [("execution", entry) for entry in executions]
+        entries.sort(key=lambda item: item[1].get("timestamp", ""))
+        
+        for kind, entry in entries:
+            index.add(format_history_entry(kind, entry))
+    
+    def forget(self, agent_id: str) -> None:
+        """Drop an agent's index.
+        
+        Args:
+            agent_id: ID of the agent.
+        """
+        with self._lock:
+            self.indexes.pop(agent_id, None)
+    
+    def assemble(self, agent_id: str, query: str, token_budget: int,
+                 max_candidates: int = 50) -> str:
+        """Assemble prompt context relevant to a query within a token budget.
+        
+        Args:
+            agent_id: ID of the agent whose history to use.
+            query: Text the context should be relevant to, e.g. the objective.
+            token_budget: Maximum number of tokens in the result.
+            max_candidates: Number of top-ranked entries considered for packing.
+        
+        Returns:
+            Selected history entries, one per line, oldest first.
+        """
+        index = self.indexes.get(agent_id)
+        if index is None or token_budget <= 0:
+            return ""
+        
+        selected: List[Tuple[int, str]] = []
+        remaining = token_budget
+        
+        for _, entry_id, text in index.search(query, max_candidates):
+            # Account for the newline joining entries
+            cost = self.token_counter.count(text) + 1
+            if cost > remaining:
+                continue
+            selected.append((entry_id, text))
+            remaining -= cost
+        
+        selected.sort()
+        return "\n".join(text for _, text in selected)
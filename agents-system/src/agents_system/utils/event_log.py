@@ -0,0 +1,572 @@
+"""Append-only event log with batched background writes, rotation and queries."""
+
+from typing import Dict, List, Optional, Any, Callable, Iterator, Iterable, Tuple, Union
+from datetime import datetime
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# fsync policies: after every batch, at most once per interval, or never
+FSYNC_POLICIES = ("batch", "interval", "never")
+
+# Number of events covered by one entry of a segment's sparse index
+DEFAULT_INDEX_INTERVAL = 1000
+
+def index_path_for(segment: str) -> str:
+    """Get the sparse index path for a log segment.
+    
+    Compressed and uncompressed forms of a segment share one index.
+    
+    Args:
+        segment: Path of the log segment.
+    
+    Returns:
+        Path of the segment's index file.
+    """
+    if segment.endswith(".gz"):
+        segment = segment[:-3]
+    return segment + ".idx"
+
+class _FlushRequest:
+    """Marker placed on the queue to wait for everything before it."""
+    
+    def __init__(self, stop: bool = False):
+        """Initialize the flush request.
+        
+        Args:
+            stop: Whether the writer thread should exit after flushing.
+        """
+        self.stop = stop
+        self.done = threading.Event()
+
+class EventLogWriter:
+    """Background writer for a JSON-lines event log.
+    
+    Callers only enqueue events; serialization, writing, fsync, rotation and
+    compression of rotated segments all happen on a background thread.
+    Rotated segments are renamed to ``<name>.<timestamp>.jsonl`` and gzipped.
+    
+    Every segment gets a sparse ``.idx`` sidecar with one JSON line per block
+    of events, recording the block's byte range, first and last timestamp and
+    event types, which `EventLogReader` uses to skip irrelevant blocks.
+    """
+    
+    def __init__(self, path: str,
+                 batch_size: int = 256,
+                 flush_interval: float = 0.5,
+                 fsync: str = "interval",
+                 fsync_interval: float = 5.0,
+                 max_bytes: Optional[int] = 64 * 1024 * 1024,
+                 max_age_seconds: Optional[float] = None,
+                 compress: bool = True,
+                 index_interval: int = DEFAULT_INDEX_INTERVAL):
+        """Initialize the event log writer.
+        
+        Args:
+            path: Path of the active log file.
+            batch_size: Maximum number of events written per batch.
+            flush_interval: Maximum time in seconds an event waits before being written.
+            fsync: fsync policy, one of "batch", "interval" or "never".
+            fsync_interval: Seconds between fsyncs with the "interval" policy.
+            max_bytes: Rotate the active file once it reaches this size. None disables.
+            max_age_seconds: Rotate the active file once it is this old. None disables.
+            compress: Whether to gzip rotated segments.
+            index_interval: Number of events per sparse index entry.
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.compress = compress
+        self.index_interval = index_interval
+        
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._compressors: List[threading.Thread] = []
+        self._file = None
+        self._index_file = None
+        self._block: Optional[Dict[str, Any]] = None
+        self._opened_at = 0.0
+        self._last_fsync = 0.0
+        self._atexit_registered = False
+    
+    def write(self, event: Dict[str, Any]) -> None:
+        """Enqueue an event for writing.
+        
+        Args:
+            event: JSON-serializable event.
+        """
+        if self._thread is None:
+            self._start()
+        self._queue.put(event)
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every event enqueued so far has been written.
+        
+        Args:
+            timeout: Maximum time to wait in seconds.
+        
+        Returns:
+            True if the flush completed, False on timeout.
+        """
+        if self._thread is None:
+            return True
+        
+        request = _FlushRequest()
+        self._queue.put(request)
+        return request.done.wait(timeout)
+    
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Flush pending events and stop the background thread.
+        
+        The writer can still be used afterwards; it restarts on the next write.
+        
+        Args:
+            timeout: Maximum time to wait in seconds.
+        """
+        with self._start_lock:
+            thread = self._thread
+            if thread is None:
+                return
+            
+            request = _FlushRequest(stop=True)
+            self._queue.put(request)
+            request.done.wait(timeout)
+            thread.join(timeout)
+            self._thread = None
+        
+        for compressor in self._compressors:
+            compressor.join(timeout)
+        self._compressors = []
+    
+    def _start(self) -> None:
+        """Start the background thread if it is not running."""
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            
+            self._thread = threading.Thread(
+                target=self._run, name="event-log-writer", daemon=True
+            )
+            self._thread.start()
+            
+            if not self._atexit_registered:
+                atexit.register(self.close)
+                self._atexit_registered = True
+    
+    def _run(self) -> None:
+        """Background loop: collect batches and write them."""
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._maybe_fsync()
+                continue
+            
+            batch: List[Dict[str, Any]] = []
+            requests: List[_FlushRequest] = []
+            deadline = time.monotonic() + self.flush_interval
+            
+            while True:
+                if isinstance(item, _FlushRequest):
+                    requests.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            
+            try:
+                if batch:
+                    self._write_batch(batch)
+                if requests:
+                    self._sync()
+            except Exception as e:
+                logger.error(f"Error writing event log {self.path}: {e}")
+            
+            stop = any(request.stop for request in requests)
+            if stop:
+                self._close_file()
+            for request in requests:
+                request.done.set()
+            if stop:
+                return
+    
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        """Write a batch of events and rotate the file if needed.
+        
+        Args:
+            batch: Events to write.
+        """
+        if self._file is None:
+            self._open_file()
+        
+        lines = []
+        position = self._file.tell()
+        for event in batch:
+            line = (json.dumps(event, default=str) + "\n").encode("utf-8")
+            lines.append(line)
+            self._index_event(event, position, len(line))
+            position += len(line)
+        self._file.write(b"".join(lines))
+        
+        if self.fsync == "batch":
+            self._sync()
+        else:
+            self._maybe_fsync()
+        
+        if self._should_rotate():
+            self._rotate()
+    
+    def _open_file(self) -> None:
+        """Open the active log file for appending."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, 'ab')
+        self._index_file = open(index_path_for(self.path), 'a')
+        self._opened_at = time.time()
+    
+    def _index_event(self, event: Dict[str, Any], offset: int, size: int) -> None:
+        """Add an event to the current index block.
+        
+        Args:
+            event: Event being written.
+            offset: Byte offset of the event's line in the segment.
+            size: Size of the event's encoded line in bytes.
+        """
+        block = self._block
+        timestamp = str(event.get("timestamp", ""))
+        
+        if block is None:
+            block = self._block = {
+                "offset": offset,
+                "length": 0,
+                "count": 0,
+                "first": timestamp,
+                "last": timestamp,
+                "types": set()
+            }
+        
+        block["length"] += size
+        block["count"] += 1
+        block["first"] = min(block["first"], timestamp)
+        block["last"] = max(block["last"], timestamp)
+        block["types"].add(str(event.get("type")))
+        
+        if block["count"] >= self.index_interval:
+            self._close_block()
+    
+    def _close_block(self) -> None:
+        """Write the current index block to the segment's index."""
+        block = self._block
+        if block is None or self._index_file is None:
+            return
+        
+        block["types"] = sorted(block["types"])
+        self._index_file.write(json.dumps(block) + "\n")
+        self._block = None
+    
+    def _close_file(self) -> None:
+        """Flush and close the active log file and its index."""
+        if self._file is not None:
+            self._close_block()
+            self._sync()
+            self._file.close()
+            self._index_file.close()
+            self._file = None
+            self._index_file = None
+    
+    def _sync(self) -> None:
+        """Flush buffers and fsync according to the policy."""
+        if self._file is None:
+            return
+        
+        self._file.flush()
+        self._index_file.flush()
+        if self.fsync != "never":
+            os.fsync(self._file.fileno())
+            self._last_fsync = time.monotonic()
+    
+    def _maybe_fsync(self) -> None:
+        """fsync if the interval policy is due."""
+        if self._file is None:
+            return
+        
+        if self.fsync == "interval" and time.monotonic() - self._last_fsync >= self.fsync_interval:
+            self._sync()
+    
+    def _should_rotate(self) -> bool:
+        """Check whether the active file reached its size or age limit."""
+        if self.max_bytes is not None and self._file.tell() >= self.max_bytes:
+            return True
+        if self.max_age_seconds is not None and time.time() - self._opened_at >= self.max_age_seconds:
+            return True
+        return False
+    
+    def _rotate(self) -> None:
+        """Move the active file aside and start a new one."""
+        self._close_file()
+        
+        base, ext = os.path.splitext(self.path)
+        segment = f"{base}.{datetime.now().strftime('%Y%m%dT%H%M%S%f')}{ext}"
+        os.replace(self.path, segment)
+        os.replace(index_path_for(self.path), index_path_for(segment))
+        
+        if self.compress:
+            compressor = threading.Thread(
+                target=self._compress_segment, args=(segment,),
+                name="event-log-compressor", daemon=True
+            )
+            compressor.start()
+            self._compressors = [c for c in self._compressors if c.is_alive()]
+            self._compressors.append(compressor)
+    
+    @staticmethod
+    def _compress_segment(segment: str) -> None:
+        """Gzip a rotated segment and remove the uncompressed file.
+        
+        Args:
+            segment: Path of the rotated segment.
+        """
+        try:
+            with open(segment, 'rb') as src, gzip.open(segment + ".gz.tmp", 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.replace(segment + ".gz.tmp", segment + ".gz")
+            os.remove(segment)
+        except OSError as e:
+            logger.error(f"Error compressing event log segment {segment}: {e}")
+
+class EventLogReader:
+    """Query engine over an event log written by `EventLogWriter`.
+    
+    Segments are visited oldest first. Index blocks whose time range or event
+    types cannot match are skipped without parsing them; regions of a segment
+    not covered by its index are scanned line by line. Gzipped segments are
+    still decompressed up to the last block read, since gzip streams cannot
+    be entered mid-way.
+    """
+    
+    def __init__(self, path: str):
+        """Initialize the event log reader.
+        
+        Args:
+            path: Path of the active log file.
+        """
+        self.path = path
+    
+    def segments(self) -> List[str]:
+        """List the log segments, oldest first.
+        
+        Returns:
+            Paths of rotated segments followed by the active file.
+        """
+        directory = os.path.dirname(self.path) or "."
+        base, ext = os.path.splitext(os.path.basename(self.path))
+        prefix = base + "."
+        
+        rotated: Dict[str, str] = {}
+        if os.path.isdir(directory):
+            for filename in os.listdir(directory):
+                if not filename.startswith(prefix) or filename == os.path.basename(self.path):
+                    continue
+                if filename.endswith(ext):
+                    rotated[filename] = os.path.join(directory, filename)
+                elif filename.endswith(ext + ".gz"):
+                    # Segments still being compressed are read uncompressed
+                    rotated.setdefault(filename[:-3], os.path.join(directory, filename))
+        
+        segments = [rotated[name] for name in sorted(rotated)]
+        if os.path.exists(self.path):
+            segments.append(self.path)
+        return segments
+    
+    def query(self,
+              start: Optional[Union[datetime, str]] = None,
+              end: Optional[Union[datetime, str]] = None,
+              event_types: Optional[Iterable[str]] = None,
+              metadata_key: Optional[str] = None,
+              metadata_value: Any = None,
+              limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Stream events matching the given filters.
+        
+        Args:
+            start: Only include events at or after this time.
+            end: Only include events before this time.
+            event_types: Only include events of these types.
+            metadata_key: Only include events whose metadata has this key.
+            metadata_value: With `metadata_key`, only include events whose
+                            metadata value for the key equals this value.
+            limit: Maximum number of events to return.
+        
+        Yields:
+            Matching events, in log order.
+        """
+        start_ts = start.isoformat() if isinstance(start, datetime) else start
+        end_ts = end.isoformat() if isinstance(end, datetime) else end
+        types = set(event_types) if event_types is not None else None
+        
+        # Cheap byte-level check before parsing a line as JSON
+        type_markers = [
+            b'"type": ' + json.dumps(event_type).encode("utf-8") for event_type in types
+        ] if types is not None else None
+        
+        def matches(line: bytes) -> Optional[Dict[str, Any]]:
+            if type_markers is not None and not any(marker in line for marker in type_markers):
+                return None
+            try:
+                event = json.loads(line)
+            except ValueError:
+                return None
+            
+            timestamp = event.get("timestamp", "")
+            if start_ts is not None and timestamp < start_ts:
+                return None
+            if end_ts is not None and timestamp >= end_ts:
+                return None
+            if types is not None and event.get("type") not in types:
+                return None
+            if metadata_key is not None:
+                metadata = event.get("metadata") or {}
+                if metadata_key not in metadata:
+                    return None
+                if metadata_value is not None and metadata[metadata_key] != metadata_value:
+                    return None
+            return event
+        
+        def block_may_match(block: Dict[str, Any]) -> bool:
+            if start_ts is not None and block["last"] < start_ts:
+                return False
+            if end_ts is not None and block["first"] >= end_ts:
+                return False
+            if types is not None and not types.intersection(block["types"]):
+                return False
+            return True
+        
+        returned = 0
+        for segment in self.segments():
+            for line in self._read_ranges(segment, self._ranges_to_read(segment, block_may_match)):
+                event = matches(line)
+                if event is None:
+                    continue
+                yield event
+                returned += 1
+                if limit is not None and returned >= limit:
+                    return
+    
+    def _load_index(self, segment: str) -> List[Dict[str, Any]]:
+        """Load a segment's index blocks, ordered by offset.
+        
+        Args:
+            segment: Path of the log segment.
+        
+        Returns:
+            Index blocks, or an empty list if the segment has no index.
+        """
+        blocks = []
+        try:
+            with open(index_path_for(segment), 'r') as f:
+                for line in f:
+                    try:
+                        blocks.append(json.loads(line))
+                    except ValueError:
+                        # A torn final line from a crash; the region gets scanned
+                        break
+        except FileNotFoundError:
+            return []
+        
+        blocks.sort(key=lambda block: block["offset"])
+        return blocks
+    
+    def _ranges_to_read(self, segment: str,
+                        block_may_match: Callable[[Dict[str, Any]], bool]
+                        ) -> List[Tuple[int, Optional[int]]]:
+        """Work out which byte ranges of a segment need to be read.
+        
+        Args:
+            segment: Path of the log segment.
+            block_may_match: Predicate deciding whether an index block can
+                             contain matching events.
+        
+        Returns:
+            List of (start, end) byte ranges; an end of None means end of file.
+        """
+        ranges: List[Tuple[int, Optional[int]]] = []
+        position = 0
+        
+        for block in self._load_index(segment):
+            if block["offset"] > position:
+                # Unindexed gap, e.g. events written before a crash
+                ranges.append((position, block["offset"]))
+            if block_may_match(block):
+                ranges.append((block["offset"], block["offset"] + block["length"]))
+            position = max(position, block["offset"] + block["length"])
+        
+        ranges.append((position, None))
+        
+        # Merge adjacent ranges so consecutive blocks are read in one pass
+        merged: List[Tuple[int, Optional[int]]] = []
+        for range_start, range_end in ranges:
+            if merged and merged[-1][1] == range_start:
+                merged[-1] = (merged[-1][0], range_end)
+            else:
+                merged.append((range_start, range_end))
+        return merged
+    
+    @staticmethod
+    def _read_ranges(segment: str, ranges: List[Tuple[int, Optional[int]]]) -> Iterator[bytes]:
+        """Read complete lines from byte ranges of a segment.
+        
+        The ranges are read in order through a single open file. Seeking in a
+        gzipped segment decompresses everything before the target, from the
+        start of the stream if the file were reopened, so one forward pass
+        keeps the cost of a compressed segment at one decompression.
+        
+        Args:
+            segment: Path of the log segment.
+            ranges: (start, end) ranges in uncompressed bytes, in ascending
+                    order; an end of None means end of file.
+        
+        Yields:
+            Raw lines.
+        """
+        opener = gzip.open if segment.endswith(".gz") else open
+        try:
+            f = opener(segment, 'rb')
+        except FileNotFoundError:
+            # Segment was compressed while we were reading the index
+            if not segment.endswith(".gz"):
+                yield from EventLogReader._read_ranges(segment + ".gz", ranges)
+            return
+        
+        with f:
+            for start, end in ranges:
+                f.seek(start)
+                position = start
+                while end is None or position < end:
+                    line = f.readline()
+                    if not line:
+                        break
+                    position += len(line)
+                    if line.endswith(b"\n"):
+                        yield line
@@ -0,0 +1,177 @@
+"""Latency histograms and per-request phase timing."""
+
+from typing import Dict, Iterator, Optional, Any
+from contextlib import contextmanager
+from contextvars import ContextVar
+import math
+import time
+
+class _RequestTiming:
+    """Phase times of one request."""
+    
+    def __init__(self):
+        """Initialize the timing."""
+        self.timings: Dict[str, float] = {}
+        # Number of open `phase_timer` blocks per phase, and when the
+        # phase became active
+        self.active: Dict[str, int] = {}
+        self.active_since: Dict[str, float] = {}
+        self.finished = False
+
+# Timing of the request being processed in the current context, or None
+# outside of `request_timer`
+_REQUEST_TIMING: ContextVar[Optional[_RequestTiming]] = ContextVar("request_timing", default=None)
+
+class LatencyHistogram:
+    """Histogram of durations in logarithmic buckets.
+    
+    Each power of two is split into `buckets_per_octave` buckets, so
+    percentiles are accurate to within about 4% (8 buckets per octave) at
+    any scale, while recording costs one logarithm and the memory stays
+    fixed. Durations outside [min_value, max_value] are counted in the
+    first or last bucket.
+    """
+    
+    def __init__(self, min_value: float = 1e-6, max_value: float = 1e3, buckets_per_octave: int = 8):
+        """Initialize the histogram.
+        
+        Args:
+            min_value: Smallest distinguished duration in seconds.
+            max_value: Largest distinguished duration in seconds.
+            buckets_per_octave: Buckets per doubling of the duration.
+        """
+        self.min_value = min_value
+        self.buckets_per_octave = buckets_per_octave
+        self.counts = [0] * (math.ceil(math.log2(max_value / min_value) * buckets_per_octave) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+    
+    def record(self, seconds: float) -> None:
+        """Record a duration.
+        
+        Args:
+            seconds: Duration in seconds.
+        """
+        if seconds > self.min_value:
+            index = min(int(math.log2(seconds / self.min_value) * self.buckets_per_octave), len(self.counts) - 1)
+        else:
+            index = 0
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+    
+    def percentile(self, percent: float) -> float:
+        """Estimate a percentile of the recorded durations.
+        
+        Args:
+            percent: Percentile between 0 and 100.
+        
+        Returns:
+            Geometric midpoint of the bucket holding the percentile, clamped
+            to the smallest and largest recorded duration. Percentiles in the
+            first bucket are the smallest recorded duration; 0.0 if empty.
+        """
+        if not self.count:
+            return 0.0
+        
+        rank = max(1, math.ceil(percent / 100 * self.count))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                break
+        if index == 0:
+            return self.min
+        midpoint = self.min_value * 2 ** ((index + 0.5) / self.buckets_per_octave)
+        return min(max(midpoint, self.min), self.max)
+    
+    def reset(self) -> None:
+        """Remove every recorded duration."""
+        self.counts = [0] * len(self.counts)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Summarize the recorded durations.
+        
+        Returns:
+            Dictionary with count, mean, p50, p90, p99 and max in seconds.
+        """
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max
+        }
+
+@contextmanager
+def request_timer() -> Iterator[Dict[str, float]]:
+    """Time a request and collect the time spent in its phases.
+    
+    Code running in the same context, including asyncio tasks created
+    inside the block, reports phase durations with `phase_timer` or
+    `add_phase_time`.
+    
+    Yields:
+        Dict mapping phase names to seconds. "total" is set to the duration
+        of the block when it exits. Phases still active then, e.g. in
+        cancelled tasks that have not unwound yet, count until that point.
+    """
+    timing = _RequestTiming()
+    token = _REQUEST_TIMING.set(timing)
+    started = time.perf_counter()
+    try:
+        yield timing.timings
+    finally:
+        now = time.perf_counter()
+        for phase, active in timing.active.items():
+            if active:
+                timing.timings[phase] = timing.timings.get(phase, 0.0) + now - timing.active_since[phase]
+        timing.timings["total"] = now - started
+        timing.finished = True
+        _REQUEST_TIMING.reset(token)
+
+@contextmanager
+def phase_timer(phase: str) -> Iterator[None]:
+    """Time a block as part of a phase of the current request, if it is timed.
+    
+    Overlapping blocks of the same phase, e.g. concurrent LLM calls, count
+    once: the phase time is the wall time during which any of them ran.
+    
+    Args:
+        phase: Phase name, e.g. "llm".
+    """
+    timing = _REQUEST_TIMING.get()
+    if timing is None:
+        yield
+        return
+    
+    if not timing.active.get(phase):
+        timing.active_since[phase] = time.perf_counter()
+    timing.active[phase] = timing.active.get(phase, 0) + 1
+    try:
+        yield
+    finally:
+        timing.active[phase] -= 1
+        if not timing.active[phase]:
+            add_phase_time(phase, time.perf_counter() - timing.active_since[phase])
+
+def add_phase_time(phase: str, seconds: float) -> None:
+    """Add time spent in a phase to the current request, if it is timed
+    and has not finished.
+    
+    Args:
+        phase: Phase name, e.g. "llm" or "t2p".
+        seconds: Duration in seconds.
+    """
+    timing = _REQUEST_TIMING.get()
+    if timing is not None and not timing.finished:
+        timing.timings[phase] = timing.timings.get(phase, 0.0) + seconds
@@ -0,0 +1,189 @@
+"""MinHash signatures and LSH banding for near-duplicate text detection."""
+
+from typing import Dict, List, Hashable, Set, Tuple
+import hashlib
+
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 32
+
+# Shingle hashes are 64-bit
+_HASH_RANGE = 1 << 64
+
+def shingles(text: str, size: int = 2) -> Set[str]:
+    """Get the word shingles of a text.
+    
+    Args:
+        text: Text to shingle.
+        size: Number of consecutive words per shingle.
+    
+    Returns:
+        Set of shingles. Texts shorter than `size` words yield a single
+        shingle of all their words.
+    """
+    words = text.split()
+    if len(words) <= size:
+        return {" ".join(words)}
+    
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def estimate_similarity(first: List[int], second: List[int]) -> float:
+    """Estimate the Jaccard similarity of two MinHash signatures.
+    
+    Args:
+        first: First signature.
+        second: Second signature of the same length.
+    
+    Returns:
+        Fraction of matching signature positions.
+    """
+    if not first:
+        return 0.0
+    return sum(1 for a, b in zip(first, second) if a == b) / len(first)
+
+class MinHasher:
+    """Computes MinHash signatures of texts.
+    
+    Uses one-permutation hashing: every shingle is hashed once and the hash
+    space is split into `num_perm` bins, each keeping its minimum. Empty bins
+    borrow the value of the next non-empty bin (rotation densification), so
+    signatures of short texts stay comparable. This costs one hash per
+    shingle instead of one per shingle and permutation.
+    
+    Signatures are deterministic for a given seed, so they can be persisted
+    and compared across runs.
+    """
+    
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, shingle_size: int = 2, seed: int = 1):
+        """Initialize the hasher.
+        
+        Args:
+            num_perm: Signature length (number of bins).
+            shingle_size: Number of consecutive words per shingle.
+            seed: Seed of the shingle hash function.
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._key = str(seed).encode("utf-8")
+        # Added per bin of distance when borrowing, so borrowed values never
+        # collide with values that belong to the bin
+        self._offset = _HASH_RANGE // num_perm + 1
+    
+    def signature(self, text: str) -> List[int]:
+        """Compute the MinHash signature of a text.
+        
+        Args:
+            text: Text to hash.
+        
+        Returns:
+            Signature of `num_perm` integers.
+        """
+        num_perm = self.num_perm
+        key = self._key
+        bins: List[int] = [-1] * num_perm
+        
+        for shingle in shingles(text, self.shingle_size):
+            value = int.from_bytes(
+                hashlib.blake2b(shingle.encode("utf-8"), digest_size=8, key=key).digest(), "big"
+            )
+            index, value = value % num_perm, value // num_perm
+            if bins[index] < 0 or value < bins[index]:
+                bins[index] = value
+        
+        signature = list(bins)
+        for index in range(num_perm):
+            if bins[index] >= 0:
+                continue
+            for distance in range(1, num_perm):
+                borrowed = bins[(index + distance) % num_perm]
+                if borrowed >= 0:
+                    signature[index] = borrowed + distance * self._offset
+                    break
+        return signature
+
+class LSHIndex:
+    """Locality-sensitive hashing index over MinHash signatures.
+    
+    Signatures are split into bands; two keys become candidates when any band
+    matches exactly. With `b` bands of `r` rows the similarity at which a pair
+    becomes a candidate with probability 1/2 is roughly ``(1/b) ** (1/r)``.
+    The default of 32 bands of 2 rows puts that point near 0.18, favouring
+    recall: a pair with similarity 0.5 is missed with probability below
+    0.01%. Candidates are expected to be verified with `estimate_similarity`.
+    """
+    
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, bands: int = DEFAULT_BANDS):
+        """Initialize the index.
+        
+        Args:
+            num_perm: Length of the indexed signatures.
+            bands: Number of bands. Must divide `num_perm`.
+        
+        Raises:
+            ValueError: If `bands` does not divide `num_perm`.
+        """
+        if bands <= 0 or num_perm % bands:
+            raise ValueError(f"Number of bands ({bands}) must divide the signature length ({num_perm})")
+        
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets: List[Dict[Tuple[int, ...], Set[Hashable]]] = [{} for _ in range(bands)]
+        self._keys: Dict[Hashable, List[Tuple[int, ...]]] = {}
+    
+    def _band_keys(self, signature: List[int]) -> List[Tuple[int, ...]]:
+        """Split a signature into its band keys."""
+        rows = self.rows
+        return [tuple(signature[i * rows:(i + 1) * rows]) for i in range(self.bands)]
+    
+    def insert(self, key: Hashable, signature: List[int]) -> None:
+        """Index a signature under a key, replacing any previous signature.
+        
+        Args:
+            key: Key to index.
+            signature: MinHash signature of length `num_perm`.
+        """
+        self.remove(key)
+        band_keys = self._band_keys(signature)
+        for buckets, band_key in zip(self._buckets, band_keys):
+            buckets.setdefault(band_key, set()).add(key)
+        self._keys[key] = band_keys
+    
+    def remove(self, key: Hashable) -> None:
+        """Remove a key from the index.
+        
+        Args:
+            key: Key to remove. Unknown keys are ignored.
+        """
+        band_keys = self._keys.pop(key, None)
+        if band_keys is None:
+            return
+        
+        for buckets, band_key in zip(self._buckets, band_keys):
+            bucket = buckets.get(band_key)
+            if bucket is None:
+                continue
+            bucket.discard(key)
+            if not bucket:
+                del buckets[band_key]
+    
+    def query(self, signature: List[int]) -> Set[Hashable]:
+        """Find keys whose signatures share at least one band with a signature.
+        
+        Args:
+            signature: MinHash signature of length `num_perm`.
+        
+        Returns:
+            Set of candidate keys.
+        """
+        candidates: Set[Hashable] = set()
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            bucket = buckets.get(band_key)
+            if bucket:
+                candidates |= bucket
+        return candidates
+    
+    def __len__(self) -> int:
+        return len(self._keys)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._keys
@@ -1,11 +1,13 @@
 """Prompt engine for generating and analyzing prompts."""
 
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Union, Iterable, Iterator, Set
 import json
 import os
 from datetime import datetime
 from pathlib import Path
 
+from agents_system.utils.cache import LRUCache
+from agents_system.utils.tokens import TokenCounter, TRUNCATE_HEAD, TRUNCATE_ERROR
 from agents_system.utils.prompt_templates import (
     PromptTemplate, 
     get_template,
@@ -13,19 +15,43 @@ from agents_system.utils.prompt_templates import (
     TEMPLATE_REGISTRY
 )
 
+# Types whose values are keyed directly in the rendered-prompt cache
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+
 class PromptEngine:
     """Engine for generating and analyzing prompts."""
     
-    def __init__(self, pattern_storage_path: Optional[str] = None):
+    def __init__(self, pattern_storage_path: Optional[str] = None,
+                 cache_size: int = 1024, cache_ttl: Optional[float] = 3600,
+                 templates_dir: Optional[str] = None,
+                 token_counter: Optional[TokenCounter] = None):
         """Initialize the prompt engine.
         
         Args:
             pattern_storage_path: Path to store prompt patterns. If None, 
                                  patterns will not be persisted.
+            cache_size: Maximum number of rendered prompts to cache. 0 disables caching.
+            cache_ttl: Seconds a rendered prompt stays cached. If None, prompts
+                       are only evicted by size or template changes.
+            templates_dir: Directory of ``<name>.json`` template files to add
+                           to the template registry. Templates are compiled
+                           on first use and reloaded when their file changes.
+            token_counter: Token counter used for prompt budgets. If None, a
+                           default `TokenCounter` is created.
         """
         self.analyzer = PromptPatternAnalyzer()
         self.pattern_storage_path = pattern_storage_path
-        self.cache: Dict[str, Any] = {}
+        
+        # Rendered prompts keyed by (template name, key of variables)
+        self.cache = LRUCache(max_size=cache_size, ttl=cache_ttl)
+        self.token_counter = token_counter or TokenCounter()
+        
+        # Rendered master player MDC sections, and categories changed since
+        self._mdc_sections: Dict[str, str] = {}
+        self._dirty_categories: Set[str] = set()
+        
+        if templates_dir:
+            TEMPLATE_REGISTRY.add_directory(templates_dir)
         
         # Load existing patterns if storage path exists
         if pattern_storage_path and os.path.exists(pattern_storage_path):
@@ -42,7 +68,147 @@ class PromptEngine:
             The generated prompt.
         """
         template = get_template(template_name)
-        return template.render(**kwargs)
+        if not self.cache.max_size:
+            return template.render(**kwargs)
+        
+        key = (template_name, self._hash_variables(kwargs))
+        cached = self.cache.get(key)
+        # The template check catches registry changes made outside this engine
+        if cached is not None and cached[0] is template:
+            return cached[1]
+        
+        prompt = template.render(**kwargs)
+        self.cache.set(key, (template, prompt))
+        return prompt
+    
+    def generate_prompt_with_budget(self, template_name: str, max_tokens: Optional[int] = None,
+                                    variable_budgets: Optional[Dict[str, int]] = None,
+                                    truncation: str = TRUNCATE_HEAD, **kwargs) -> Dict[str, Any]:
+        """Generate a prompt within token budgets and report its token counts.
+        
+        Variables listed in `variable_budgets` are first truncated to their
+        own budget. If the rendered prompt still exceeds `max_tokens`, the
+        budget left after the template text is shared among the variables:
+        variables smaller than an equal share keep their size and the rest
+        are truncated to what remains.
+        
+        Args:
+            template_name: Name of the template to use.
+            max_tokens: Maximum number of tokens in the prompt. If None, only
+                        the per-variable budgets apply.
+            variable_budgets: Maximum number of tokens per variable.
+            truncation: Truncation strategy: "head", "tail", "middle" or
+                        "error" (see `TokenCounter.truncate`).
+            **kwargs: Variables to substitute in the template.
+            
+        Returns:
+            Dictionary with the prompt, its token count, the budget, the token
+            count of each variable and the names of truncated variables.
+            
+        Raises:
+            ValueError: If a budget is exceeded with the "error" strategy, or
+                        the template text alone exceeds `max_tokens`.
+        """
+        counter = self.token_counter
+        template = get_template(template_name)
+        variables = {name: str(value) for name, value in kwargs.items()}
+        truncated = set()
+        
+        for name, budget in (variable_budgets or {}).items():
+            if name in variables:
+                value = counter.truncate(variables[name], budget, truncation)
+                if value != variables[name]:
+                    variables[name] = value
+                    truncated.add(name)
+        
+        prompt = self.generate_prompt(template_name, **variables)
+        tokens = counter.count(prompt)
+        
+        if max_tokens is not None and tokens > max_tokens:
+            if truncation == TRUNCATE_ERROR:
+                raise ValueError(
+                    f"Prompt '{template_name}' has {tokens} tokens, exceeding the budget of {max_tokens}"
+                )
+            
+            slot_tokens = {name: counter.count(variables[name]) for name in template.slots}
+            available = max_tokens - (tokens - sum(slot_tokens.values()))
+            if available < 0:
+                raise ValueError(
+                    f"Template '{template_name}' alone exceeds the budget of {max_tokens} tokens"
+                )
+            
+            # Token estimates are not exactly additive, so shrink until it fits
+            for _ in range(3):
+                remaining = available
+                ordered = sorted(slot_tokens.items(), key=lambda item: item[1])
+                for index, (name, size) in enumerate(ordered):
+                    allocation = min(size, remaining // (len(ordered) - index))
+                    remaining -= allocation
+                    if allocation < size:
+                        variables[name] = counter.truncate(variables[name], allocation, truncation)
+                        slot_tokens[name] = counter.count(variables[name])
+                        truncated.add(name)
+                
+                prompt = self.generate_prompt(template_name, **variables)
+                tokens = counter.count(prompt)
+                if tokens <= max_tokens:
+                    break
+                available -= tokens - max_tokens
+            else:
+                prompt = counter.truncate(prompt, max_tokens, truncation)
+                tokens = counter.count(prompt)
+        
+        return {
+            "prompt": prompt,
+            "tokens": tokens,
+            "max_tokens": max_tokens,
+            "variable_tokens": {name: counter.count(value) for name, value in variables.items()},
+            "truncated": sorted(truncated)
+        }
+    
+    @staticmethod
+    def _hash_variables(variables: Dict[str, Any]) -> Any:
+        """Compute an order-independent key for template variables.
+        
+        Plain scalars are keyed directly, which is cheaper than rendering,
+        and with their type, since equal values such as 1, 1.0 and True hash
+        alike but render differently. Any other value is keyed on its string
+        form, the text the template renders, so containers that differ only
+        in key order or tuple versus list, and objects mutated between
+        calls, get their own key.
+        
+        Args:
+            variables: Template variables.
+            
+        Returns:
+            Hashable key identifying the variables.
+        """
+        return frozenset(
+            (name, type(value), value if type(value) in _SCALAR_TYPES else str(value))
+            for name, value in variables.items()
+        )
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get statistics of the rendered-prompt cache.
+        
+        Returns:
+            Dictionary with size, hit/miss counters and hit rate.
+        """
+        return self.cache.get_stats()
+    
+    def generate_prompts(self, template_name: str,
+                         variable_sets: Iterable[Dict[str, Any]]) -> Iterator[str]:
+        """Generate prompts for many sets of variables with one template.
+        
+        Args:
+            template_name: Name of the template to use.
+            variable_sets: Iterable of variable dictionaries.
+            
+        Returns:
+            Iterator over the generated prompts, in input order.
+        """
+        template = get_template(template_name)
+        return template.render_many(variable_sets)
     
     def record_success(self, template_name: str, prompt: str, result: Any, 
                       metadata: Optional[Dict[str, Any]] = None) -> None:
@@ -60,6 +226,7 @@ class PromptEngine:
         
         # Record in analyzer
         self.analyzer.analyze_success(prompt, result, template_name, full_metadata)
+        self._dirty_categories.add(template_name)
         
         # Persist patterns if storage path is set
         if self.pattern_storage_path:
@@ -173,63 +340,97 @@ class PromptEngine:
         """
         return self.analyzer.generate_template_suggestion(template_name)
     
+    def suggest_cluster_templates(self, template_name: str, min_count: int = 3) -> List[Dict[str, Any]]:
+        """Generate template suggestions for each cluster of near-duplicate prompts.
+        
+        Args:
+            template_name: Template name to generate suggestions for.
+            min_count: Minimum number of prompts in a cluster.
+            
+        Returns:
+            List of cluster suggestions, largest cluster first.
+        """
+        return self.analyzer.generate_cluster_suggestions(template_name, min_count)
+    
     def export_patterns_to_master_player(self, filepath: str) -> None:
         """Export patterns to the master player MDC file.
         
+        Category sections are cached and only re-rendered for categories
+        that recorded successes since the last export. The file is streamed
+        to a temporary file and atomically replaced.
+        
         Args:
             filepath: Path to the master player MDC file.
         """
         # Get all patterns
         patterns = self.analyzer.get_success_patterns()
         
-        # Create MDC content
-        content = f"# Master Player - Prompt Patterns\n\n"
-        content += f"Updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-        
-        # Add pattern statistics
-        content += "## Pattern Statistics\n\n"
-        content += "| Category | Count | Success Rate |\n"
-        content += "|----------|-------|-------------|\n"
-        
+        for category in list(self._mdc_sections):
+            if category not in patterns:
+                del self._mdc_sections[category]
         for category, pattern in patterns.items():
-            count = pattern["count"]
-            success_rate = "N/A"  # In a real system, you'd calculate this
-            content += f"| {category} | {count} | {success_rate} |\n"
+            if category in self._dirty_categories or category not in self._mdc_sections:
+                self._mdc_sections[category] = self._render_mdc_section(category, pattern)
+        self._dirty_categories.clear()
         
-        # Add pattern details for each category
-        for category, pattern in patterns.items():
-            content += f"\n## {category.replace('_', ' ').title()}\n\n"
+        tmp_path = filepath + ".tmp"
+        with open(tmp_path, 'w') as f:
+            f.write("# Master Player - Prompt Patterns\n\n")
+            f.write(f"Updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+            
+            # Add pattern statistics
+            f.write("## Pattern Statistics\n\n")
+            f.write("| Category | Count | Success Rate |\n")
+            f.write("|----------|-------|-------------|\n")
             
-            # Add common elements
-            if pattern["common_elements"]:
-                content += "### Common Elements\n\n"
-                content += "```\n"
-                for element in sorted(pattern["common_elements"]):
-                    content += f"{element}\n"
-                content += "```\n\n"
+            for category, pattern in patterns.items():
+                success_rate = "N/A"  # In a real system, you'd calculate this
+                f.write(f"| {category} | {pattern['count']} | {success_rate} |\n")
             
-            # Add examples
-            if pattern["examples"]:
-                content += "### Examples\n\n"
-                for i, example in enumerate(pattern["examples"][-3:]):  # Show last 3 examples
-                    content += f"#### Example {i+1}\n\n"
-                    content += "```\n"
-                    content += example["prompt"][:500] + "..." if len(example["prompt"]) > 500 else example["prompt"]
-                    content += "\n```\n\n"
-                    content += f"Result: {example['result_summary']}\n\n"
-                    content += f"Timestamp: {example['timestamp']}\n\n"
+            # Add pattern details for each category
+            for category in patterns:
+                f.write(self._mdc_sections[category])
+        
+        os.replace(tmp_path, filepath)
+    
+    def _render_mdc_section(self, category: str, pattern: Dict[str, Any]) -> str:
+        """Render the master player MDC section of one category.
+        
+        Args:
+            category: Pattern category.
+            pattern: Pattern record of the category.
             
-            # Add template suggestion
-            suggestion = self.analyzer.generate_template_suggestion(category)
-            if suggestion:
-                content += "### Suggested Template\n\n"
-                content += "```\n"
-                content += suggestion
-                content += "\n```\n\n"
-        
-        # Write to file
-        with open(filepath, 'w') as f:
-            f.write(content)
+        Returns:
+            Markdown section.
+        """
+        parts = [f"\n## {category.replace('_', ' ').title()}\n\n"]
+        
+        # Add common elements
+        if pattern["common_elements"]:
+            parts.append("### Common Elements\n\n```\n")
+            for element in sorted(pattern["common_elements"]):
+                parts.append(f"{element}\n")
+            parts.append("```\n\n")
+        
+        # Add examples
+        if pattern["examples"]:
+            parts.append("### Examples\n\n")
+            for i, example in enumerate(pattern["examples"][-3:]):  # Show last 3 examples
+                prompt = example["prompt"]
+                parts.append(f"#### Example {i+1}\n\n```\n")
+                parts.append(prompt[:500] + "..." if len(prompt) > 500 else prompt)
+                parts.append("\n```\n\n")
+                parts.append(f"Result: {example['result_summary']}\n\n")
+                parts.append(f"Timestamp: {example['timestamp']}\n\n")
+        
+        # Add template suggestion
+        suggestion = self.analyzer.generate_template_suggestion(category)
+        if suggestion:
+            parts.append("### Suggested Template\n\n```\n")
+            parts.append(suggestion)
+            parts.append("\n```\n\n")
+        
+        return "".join(parts)
     
     def _load_patterns(self) -> None:
         """Load patterns from storage."""
@@ -239,11 +440,8 @@ class PromptEngine:
             
             # Convert to internal format
             for category, pattern_data in data.items():
-                if "common_elements" in pattern_data:
-                    pattern_data["common_elements"] = set(pattern_data["common_elements"])
-                
                 if category not in self.analyzer.patterns:
-                    self.analyzer.patterns[category] = pattern_data
+                    self.analyzer.load_pattern(category, pattern_data)
         except (json.JSONDecodeError, FileNotFoundError):
             # Initialize empty patterns if file doesn't exist or is invalid
             pass
@@ -266,4 +464,7 @@ class PromptEngine:
             variables: List of variables required by the template.
         """
         template = PromptTemplate(template_string, variables)
-        TEMPLATE_REGISTRY[name] = template 
\ No newline at end of file
+        TEMPLATE_REGISTRY[name] = template
+        
+        # Prompts rendered from a replaced template are stale
+        self.cache.invalidate(lambda key: key[0] == name) 
\ No newline at end of file
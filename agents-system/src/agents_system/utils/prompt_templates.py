@@ -1,11 +1,27 @@
 """Prompt templates for standardized agent interactions."""
 
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Union, Iterable, Iterator, Mapping, Tuple
+from collections.abc import MutableMapping
 from string import Template
 from datetime import datetime
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+from agents_system.utils.minhash import MinHasher, LSHIndex, estimate_similarity
+
+logger = logging.getLogger(__name__)
 
 class PromptTemplate:
-    """Template for structured prompts."""
+    """Template for structured prompts.
+    
+    The ``$name``/``${name}`` template is compiled once, at construction, into
+    a ``str.format`` string of literal and slot segments. Rendering is then a
+    single C-level ``format_map`` call instead of a regex scan per render.
+    """
     
     def __init__(self, template_string: str, template_variables: List[str]):
         """Initialize the prompt template.
@@ -13,9 +29,61 @@ class PromptTemplate:
         Args:
             template_string: The template string with placeholders.
             template_variables: List of variables required by the template.
+            
+        Raises:
+            ValueError: If the template has an invalid placeholder or uses a
+                        variable that is not in `template_variables`.
         """
         self.template = Template(template_string)
         self.variables = template_variables
+        self._required = frozenset(template_variables)
+        self._format_string, self.slots = self._compile(template_string)
+        
+        undeclared = [slot for slot in self.slots if slot not in self._required]
+        if undeclared:
+            raise ValueError(
+                f"Prompt template uses undeclared variable '{undeclared[0]}'"
+            )
+    
+    @staticmethod
+    def _compile(template_string: str) -> Tuple[str, List[str]]:
+        """Compile a ``string.Template`` string into a format string.
+        
+        Args:
+            template_string: The template string with placeholders.
+            
+        Returns:
+            Tuple of (format string, slot names in order of first use).
+        """
+        segments: List[str] = []
+        slots: List[str] = []
+        position = 0
+        
+        for match in Template.pattern.finditer(template_string):
+            segments.append(
+                template_string[position:match.start()].replace("{", "{{").replace("}", "}}")
+            )
+            position = match.end()
+            
+            if match.group("escaped") is not None:
+                segments.append("$")
+                continue
+            
+            name = match.group("named") or match.group("braced")
+            if name is None:
+                line = template_string.count("\n", 0, match.start("invalid")) + 1
+                raise ValueError(f"Invalid placeholder in prompt template on line {line}")
+            
+            segments.append("{" + name + "}")
+            if name not in slots:
+                slots.append(name)
+        
+        segments.append(template_string[position:].replace("{", "{{").replace("}", "}}"))
+        return "".join(segments), slots
+    
+    def _missing_variable(self, variables: Mapping[str, Any]) -> str:
+        """Find the first required variable missing from a mapping."""
+        return next(var for var in self.variables if var not in variables)
     
     def render(self, **kwargs) -> str:
         """Render the template with the provided variables.
@@ -27,14 +95,227 @@ class PromptTemplate:
             The rendered template.
         """
         # Validate that all required variables are provided
-        for var in self.variables:
-            if var not in kwargs:
-                raise ValueError(f"Missing required variable '{var}' for prompt template")
+        if not self._required.issubset(kwargs):
+            raise ValueError(
+                f"Missing required variable '{self._missing_variable(kwargs)}' for prompt template"
+            )
+        
+        return self._format_string.format_map(kwargs)
+    
+    def render_many(self, variable_sets: Iterable[Mapping[str, Any]]) -> Iterator[str]:
+        """Render the template once per set of variables.
         
-        return self.template.substitute(**kwargs)
+        Args:
+            variable_sets: Iterable of variable mappings.
+            
+        Yields:
+            The rendered templates, in input order.
+        """
+        required = self._required
+        format_map = self._format_string.format_map
+        
+        for variables in variable_sets:
+            if not required.issubset(variables):
+                raise ValueError(
+                    f"Missing required variable '{self._missing_variable(variables)}' for prompt template"
+                )
+            yield format_map(variables)
+
+class _TemplateEntry:
+    """Registry entry: where a template comes from and its compiled form."""
+    
+    __slots__ = ("source", "variables", "path", "mtime", "checked_at", "template")
+    
+    def __init__(self, source: Optional[str] = None, variables: Optional[List[str]] = None,
+                 path: Optional[str] = None, template: Optional[PromptTemplate] = None):
+        self.source = source
+        self.variables = variables
+        self.path = path
+        self.mtime: Optional[float] = None
+        self.checked_at = 0.0
+        self.template = template
+
+class TemplateRegistry(MutableMapping):
+    """Registry of prompt templates, compiled lazily on first use.
+    
+    Templates come from three kinds of sources:
+    
+    - template strings registered with `register_source` (the built-ins),
+    - JSON files in directories added with `add_directory`, one template per
+      ``<name>.json`` file of the form ``{"template": "...", "variables": [...]}``,
+    - `PromptTemplate` objects assigned directly, e.g. ``registry[name] = template``.
+    
+    Nothing is compiled until a template is first looked up. File templates
+    remember the mtime they were compiled from and are recompiled when the
+    file changes, checked at most every `check_interval` seconds. A reloaded
+    template is a new object, so caches keyed on template identity go stale
+    on their own.
+    """
+    
+    def __init__(self, check_interval: float = 1.0):
+        """Initialize the registry.
+        
+        Args:
+            check_interval: Minimum number of seconds between checks of a
+                            template file for changes.
+        """
+        self.check_interval = check_interval
+        self.directories: List[str] = []
+        self._entries: Dict[str, _TemplateEntry] = {}
+        self._lock = threading.Lock()
+    
+    def register_source(self, name: str, template_string: str, variables: List[str]) -> None:
+        """Register a template string to be compiled on first use.
+        
+        Args:
+            name: Template name.
+            template_string: The template string with placeholders.
+            variables: List of variables required by the template.
+        """
+        with self._lock:
+            self._entries[name] = _TemplateEntry(source=template_string, variables=variables)
+    
+    def add_directory(self, path: str) -> int:
+        """Discover template files in a directory.
+        
+        Files are only listed here; they are read and compiled on first use.
+        A file template replaces a registered template of the same name.
+        Files added to the directory later are found on lookup or by
+        calling `refresh`.
+        
+        Args:
+            path: Directory containing ``<name>.json`` template files. It
+                  does not need to exist yet.
+        
+        Returns:
+            Number of templates discovered.
+        """
+        path = os.path.abspath(path)
+        if path not in self.directories:
+            self.directories.append(path)
+        return self._scan_directory(path)
+    
+    def refresh(self) -> int:
+        """Rescan the template directories for new files.
+        
+        Returns:
+            Number of templates discovered.
+        """
+        return sum(self._scan_directory(path) for path in self.directories)
+    
+    def _scan_directory(self, path: str) -> int:
+        """Register the template files of one directory."""
+        try:
+            with os.scandir(path) as entries:
+                files = [
+                    entry.path for entry in entries
+                    if entry.name.endswith(".json") and entry.is_file()
+                ]
+        except FileNotFoundError:
+            return 0
+        
+        with self._lock:
+            for file_path in files:
+                name = os.path.basename(file_path)[:-len(".json")]
+                entry = self._entries.get(name)
+                if entry is None or entry.path != file_path:
+                    self._entries[name] = _TemplateEntry(path=file_path)
+        return len(files)
+    
+    def _find_file(self, name: str) -> Optional[_TemplateEntry]:
+        """Look for a template file added to a directory after it was scanned."""
+        for directory in self.directories:
+            file_path = os.path.join(directory, name + ".json")
+            if os.path.isfile(file_path):
+                with self._lock:
+                    return self._entries.setdefault(name, _TemplateEntry(path=file_path))
+        return None
+    
+    def _load_file(self, entry: _TemplateEntry, mtime: float) -> PromptTemplate:
+        """Read and compile a template file.
+        
+        Raises:
+            ValueError: If the file is not a valid template definition.
+        """
+        try:
+            with open(entry.path, 'r') as f:
+                data = json.load(f)
+            template_string = data["template"]
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            raise ValueError(f"Invalid prompt template file {entry.path}: {e}")
+        
+        variables = data.get("variables")
+        if variables is None:
+            variables = PromptTemplate._compile(template_string)[1]
+        
+        template = PromptTemplate(template_string, variables)
+        entry.mtime = mtime
+        logger.debug(f"Compiled prompt template from {entry.path}")
+        return template
+    
+    def _resolve(self, entry: _TemplateEntry) -> PromptTemplate:
+        """Get the compiled template of an entry, compiling or reloading it if needed."""
+        template = entry.template
+        if template is not None and entry.path is None:
+            return template
+        
+        now = time.monotonic()
+        if template is not None and now - entry.checked_at < self.check_interval:
+            return template
+        
+        with self._lock:
+            if entry.template is None and entry.path is None:
+                entry.template = PromptTemplate(entry.source, entry.variables)
+                entry.source = None
+                return entry.template
+            
+            if entry.template is not None and now - entry.checked_at < self.check_interval:
+                return entry.template
+            
+            try:
+                mtime = os.stat(entry.path).st_mtime
+            except FileNotFoundError:
+                if entry.template is None:
+                    raise KeyError(entry.path)
+                logger.warning(f"Prompt template file {entry.path} was removed, keeping the loaded version")
+                mtime = entry.mtime
+            
+            if entry.template is None or mtime != entry.mtime:
+                entry.template = self._load_file(entry, mtime)
+            entry.checked_at = now
+            return entry.template
+    
+    def __getitem__(self, name: str) -> PromptTemplate:
+        entry = self._entries.get(name)
+        if entry is None:
+            entry = self._find_file(name)
+            if entry is None:
+                raise KeyError(name)
+        return self._resolve(entry)
+    
+    def __setitem__(self, name: str, template: PromptTemplate) -> None:
+        with self._lock:
+            self._entries[name] = _TemplateEntry(template=template)
+    
+    def __delitem__(self, name: str) -> None:
+        with self._lock:
+            del self._entries[name]
+    
+    def __contains__(self, name: object) -> bool:
+        return name in self._entries
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._entries))
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+# Template Registry
+TEMPLATE_REGISTRY = TemplateRegistry()
 
 # Task Planning Templates
-TASK_PLANNING_TEMPLATE = PromptTemplate(
+TEMPLATE_REGISTRY.register_source(
+    "task_planning",
     """
     # Task Planning Request
     
@@ -63,7 +344,8 @@ TASK_PLANNING_TEMPLATE = PromptTemplate(
 )
 
 # Code Generation Templates
-CODE_GENERATION_TEMPLATE = PromptTemplate(
+TEMPLATE_REGISTRY.register_source(
+    "code_generation",
     """
     # Code Generation Request
     
@@ -91,7 +373,8 @@ CODE_GENERATION_TEMPLATE = PromptTemplate(
 )
 
 # Advanced Task Decomposition Template
-TASK_DECOMPOSITION_TEMPLATE = PromptTemplate(
+TEMPLATE_REGISTRY.register_source(
+    "task_decomposition",
     """
     # Task Decomposition Request
     
@@ -118,7 +401,8 @@ TASK_DECOMPOSITION_TEMPLATE = PromptTemplate(
 )
 
 # File Operation Template
-FILE_OPERATION_TEMPLATE = PromptTemplate(
+TEMPLATE_REGISTRY.register_source(
+    "file_operation",
     """
     # File Operation Request
     
@@ -147,7 +431,8 @@ FILE_OPERATION_TEMPLATE = PromptTemplate(
 )
 
 # Agent Decision Template
-AGENT_DECISION_TEMPLATE = PromptTemplate(
+TEMPLATE_REGISTRY.register_source(
+    "agent_decision",
     """
     # Agent Decision Request
     
@@ -173,7 +458,8 @@ AGENT_DECISION_TEMPLATE = PromptTemplate(
 )
 
 # Performance Optimization Template
-PERFORMANCE_OPTIMIZATION_TEMPLATE = PromptTemplate(
+TEMPLATE_REGISTRY.register_source(
+    "performance_optimization",
     """
     # Performance Optimization Request
     
@@ -199,16 +485,6 @@ PERFORMANCE_OPTIMIZATION_TEMPLATE = PromptTemplate(
     ["current_performance", "performance_target", "system_context", "resource_constraints"]
 )
 
-# Template Registry
-TEMPLATE_REGISTRY = {
-    "task_planning": TASK_PLANNING_TEMPLATE,
-    "code_generation": CODE_GENERATION_TEMPLATE,
-    "task_decomposition": TASK_DECOMPOSITION_TEMPLATE,
-    "file_operation": FILE_OPERATION_TEMPLATE,
-    "agent_decision": AGENT_DECISION_TEMPLATE,
-    "performance_optimization": PERFORMANCE_OPTIMIZATION_TEMPLATE
-}
-
 def get_template(template_name: str) -> PromptTemplate:
     """Get a prompt template by name.
     
@@ -218,18 +494,242 @@ def get_template(template_name: str) -> PromptTemplate:
     Returns:
         The requested prompt template.
     """
-    if template_name not in TEMPLATE_REGISTRY:
+    try:
+        return TEMPLATE_REGISTRY[template_name]
+    except KeyError:
         raise ValueError(f"Unknown template name: {template_name}")
-    
-    return TEMPLATE_REGISTRY[template_name]
 
 # Success Pattern Analysis
 class PromptPatternAnalyzer:
-    """Analyzer for identifying successful prompt patterns."""
+    """Analyzer for identifying successful prompt patterns.
+    
+    Memory per category is bounded: only the most recent examples and a
+    fixed-size uniform sample of all examples (reservoir sampling) are kept,
+    while the success count and metadata histograms stay exact.
     
-    def __init__(self):
-        """Initialize the prompt pattern analyzer."""
+    The lines shared by every example (common elements) and their positional
+    statistics are maintained incrementally, so building a template
+    suggestion never rescans examples.
+    
+    Within a category, near-duplicate prompts are grouped into clusters with
+    MinHash signatures and an LSH index. Each cluster stores a single
+    representative example and its own common lines, so prompts that vary
+    slightly still yield per-cluster template suggestions.
+    """
+    
+    def __init__(self, max_recent_examples: int = 20, reservoir_size: int = 50,
+                 seed: Optional[int] = None, cluster_threshold: float = 0.5,
+                 max_clusters: int = 100):
+        """Initialize the prompt pattern analyzer.
+        
+        Args:
+            max_recent_examples: Number of most recent examples kept per category.
+            reservoir_size: Number of uniformly sampled examples kept per category.
+            seed: Seed for the reservoir sampler, for reproducible samples.
+            cluster_threshold: Minimum estimated Jaccard similarity between a
+                               prompt and a cluster representative to join it.
+            max_clusters: Maximum number of clusters per category. When
+                          exceeded, the smallest cluster is dropped.
+        """
         self.patterns: Dict[str, Dict[str, Any]] = {}
+        self.max_recent_examples = max_recent_examples
+        self.reservoir_size = reservoir_size
+        self._random = random.Random(seed)
+        
+        self.cluster_threshold = cluster_threshold
+        self.max_clusters = max_clusters
+        self.hasher = MinHasher()
+        self._lsh_indexes: Dict[str, LSHIndex] = {}
+    
+    def _new_pattern(self) -> Dict[str, Any]:
+        """Create an empty pattern record."""
+        return {
+            "count": 0,
+            "examples": [],
+            "reservoir": [],
+            "common_elements": set(),
+            "line_stats": {},
+            "clusters": {},
+            "next_cluster_id": 0,
+            "metadata": {}
+        }
+    
+    def load_pattern(self, category: str, pattern_data: Dict[str, Any]) -> None:
+        """Load a persisted pattern record, e.g. from `export_patterns` output.
+        
+        Records written before sampling was introduced have no reservoir; their
+        stored examples seed it.
+        
+        Args:
+            category: Category of the pattern.
+            pattern_data: Pattern record.
+        """
+        pattern = self._new_pattern()
+        pattern["count"] = pattern_data.get("count", 0)
+        pattern["metadata"] = pattern_data.get("metadata", {})
+        pattern["common_elements"] = set(pattern_data.get("common_elements", []))
+        
+        examples = pattern_data.get("examples", [])
+        pattern["examples"] = examples[-self.max_recent_examples:]
+        reservoir = pattern_data.get("reservoir")
+        if reservoir is None:
+            reservoir = examples
+        pattern["reservoir"] = reservoir[-self.reservoir_size:]
+        
+        line_stats = pattern_data.get("line_stats")
+        if line_stats is None:
+            # Older records have no statistics; rebuild them from the stored examples
+            line_stats = {}
+            for example in pattern["reservoir"] + pattern["examples"]:
+                for line, relative_position in self._line_positions(example.get("prompt", "")).items():
+                    if line in pattern["common_elements"]:
+                        self._update_line_stats(line_stats, line, relative_position)
+        pattern["line_stats"] = {
+            line: list(stats) for line, stats in line_stats.items()
+            if line in pattern["common_elements"]
+        }
+        
+        index = self._lsh_indexes[category] = LSHIndex(self.hasher.num_perm)
+        for cluster_data in pattern_data.get("clusters", []):
+            cluster = {
+                "id": cluster_data["id"],
+                "count": cluster_data.get("count", 1),
+                "representative": cluster_data["representative"],
+                "signature": cluster_data.get("signature") or [],
+                "common_elements": set(cluster_data.get("common_elements", [])),
+                "line_stats": cluster_data.get("line_stats", {})
+            }
+            if len(cluster["signature"]) != self.hasher.num_perm:
+                cluster["signature"] = self.hasher.signature(cluster["representative"]["prompt"])
+            pattern["clusters"][cluster["id"]] = cluster
+            index.insert(cluster["id"], cluster["signature"])
+        pattern["next_cluster_id"] = max(pattern["clusters"], default=-1) + 1
+        
+        self.patterns[category] = pattern
+    
+    def get_success_patterns(self) -> Dict[str, Dict[str, Any]]:
+        """Get the recorded patterns.
+        
+        Returns:
+            Dictionary mapping categories to pattern records.
+        """
+        return self.patterns
+    
+    def _sample_example(self, pattern: Dict[str, Any], example: Dict[str, Any]) -> None:
+        """Offer an example to a pattern's reservoir (Algorithm R).
+        
+        Args:
+            pattern: Pattern record whose count already includes the example.
+            example: Example to offer.
+        """
+        reservoir = pattern["reservoir"]
+        if len(reservoir) < self.reservoir_size:
+            reservoir.append(example)
+            return
+        
+        slot = self._random.randrange(pattern["count"])
+        if slot < self.reservoir_size:
+            reservoir[slot] = example
+    
+    @staticmethod
+    def _line_positions(prompt: str) -> Dict[str, float]:
+        """Get the relative position of each distinct line in a prompt.
+        
+        Args:
+            prompt: Prompt text.
+        
+        Returns:
+            Dictionary mapping each line to the offset of its first occurrence
+            divided by the prompt length.
+        """
+        text = prompt.strip()
+        length = len(text) or 1
+        positions: Dict[str, float] = {}
+        offset = 0
+        for line in text.split("\n"):
+            if line not in positions:
+                positions[line] = offset / length
+            offset += len(line) + 1
+        return positions
+    
+    @staticmethod
+    def _update_line_stats(line_stats: Dict[str, List[float]], line: str,
+                           relative_position: float) -> None:
+        """Add one occurrence of a line to its [early count, position sum] stats."""
+        stats = line_stats.get(line)
+        if stats is None:
+            stats = line_stats[line] = [0, 0.0]
+        if relative_position < 0.5:
+            stats[0] += 1
+        stats[1] += relative_position
+    
+    def _track_common_lines(self, record: Dict[str, Any], positions: Dict[str, float]) -> None:
+        """Narrow a record's common lines to a new example and update their stats.
+        
+        Args:
+            record: Pattern or cluster record whose count already includes the example.
+            positions: Line positions of the example, from `_line_positions`.
+        """
+        line_stats = record["line_stats"]
+        if record["count"] == 1:
+            record["common_elements"] = set(positions)
+        else:
+            common_elements = record["common_elements"]
+            dropped = common_elements.difference(positions)
+            common_elements -= dropped
+            for line in dropped:
+                line_stats.pop(line, None)
+        
+        for line in record["common_elements"]:
+            self._update_line_stats(line_stats, line, positions[line])
+    
+    def _assign_cluster(self, category: str, pattern: Dict[str, Any],
+                        example: Dict[str, Any]) -> Dict[str, Any]:
+        """Find the cluster of near-duplicates an example belongs to.
+        
+        A new cluster, with the example as its representative, is created when
+        no existing cluster is similar enough.
+        
+        Args:
+            category: Category of the example.
+            pattern: Pattern record of the category.
+            example: The example.
+        
+        Returns:
+            Cluster record, with the example not yet counted.
+        """
+        index = self._lsh_indexes.get(category)
+        if index is None:
+            index = self._lsh_indexes[category] = LSHIndex(self.hasher.num_perm)
+        
+        clusters = pattern["clusters"]
+        signature = self.hasher.signature(example["prompt"])
+        best, best_similarity = None, self.cluster_threshold
+        for cluster_id in index.query(signature):
+            similarity = estimate_similarity(signature, clusters[cluster_id]["signature"])
+            if similarity >= best_similarity:
+                best, best_similarity = clusters[cluster_id], similarity
+        if best is not None:
+            return best
+        
+        cluster = {
+            "id": pattern["next_cluster_id"],
+            "count": 0,
+            "representative": example,
+            "signature": signature,
+            "common_elements": set(),
+            "line_stats": {}
+        }
+        pattern["next_cluster_id"] += 1
+        
+        if len(clusters) >= self.max_clusters:
+            smallest = min(clusters.values(), key=lambda item: (item["count"], item["id"]))
+            del clusters[smallest["id"]]
+            index.remove(smallest["id"])
+        
+        clusters[cluster["id"]] = cluster
+        index.insert(cluster["id"], signature)
+        return cluster
     
     def analyze_success(self, prompt: str, result: Any, category: str, metadata: Optional[Dict[str, Any]] = None) -> None:
         """Record a successful prompt pattern.
@@ -241,23 +741,23 @@ class PromptPatternAnalyzer:
             metadata: Additional metadata about the pattern.
         """
         if category not in self.patterns:
-            self.patterns[category] = {
-                "count": 0,
-                "examples": [],
-                "common_elements": set(),
-                "metadata": {}
-            }
+            self.patterns[category] = self._new_pattern()
         
         pattern = self.patterns[category]
         pattern["count"] += 1
         
         # Add example
-        pattern["examples"].append({
+        example = {
             "prompt": prompt,
             "result_summary": str(result)[:200],  # Truncate long results
             "timestamp": datetime.now().isoformat(),
             "metadata": metadata or {}
-        })
+        }
+        examples = pattern["examples"]
+        examples.append(example)
+        if len(examples) > self.max_recent_examples:
+            del examples[:len(examples) - self.max_recent_examples]
+        self._sample_example(pattern, example)
         
         # Update metadata
         if metadata:
@@ -271,15 +771,14 @@ class PromptPatternAnalyzer:
                     pattern["metadata"][key][str_value] = 0
                 pattern["metadata"][key][str_value] += 1
         
-        # Analyze common elements when we have multiple examples
-        if len(pattern["examples"]) > 1:
-            # This is a simple approach - in a real system you'd use more sophisticated NLP
-            # to identify common patterns
-            lines = prompt.strip().split("\n")
-            if not pattern["common_elements"]:
-                pattern["common_elements"] = set(lines)
-            else:
-                pattern["common_elements"] &= set(lines)
+        # Track the lines shared by every example, with their positions,
+        # for the category and for the example's near-duplicate cluster
+        positions = self._line_positions(prompt)
+        self._track_common_lines(pattern, positions)
+        
+        cluster = self._assign_cluster(category, pattern, example)
+        cluster["count"] += 1
+        self._track_common_lines(cluster, positions)
     
     def export_patterns(self, filepath: str) -> None:
         """Export identified patterns to a file.
@@ -295,7 +794,20 @@ class PromptPatternAnalyzer:
             export_data[category] = {
                 "count": pattern["count"],
                 "examples": pattern["examples"][-5:],  # Just include the last 5 examples
+                "reservoir": pattern["reservoir"],
                 "common_elements": list(pattern["common_elements"]),
+                "line_stats": pattern["line_stats"],
+                "clusters": [
+                    {
+                        "id": cluster["id"],
+                        "count": cluster["count"],
+                        "representative": cluster["representative"],
+                        "signature": cluster["signature"],
+                        "common_elements": list(cluster["common_elements"]),
+                        "line_stats": cluster["line_stats"]
+                    }
+                    for cluster in pattern["clusters"].values()
+                ],
                 "metadata": pattern["metadata"]
             }
         
@@ -314,23 +826,65 @@ class PromptPatternAnalyzer:
         if category not in self.patterns or self.patterns[category]["count"] < 3:
             return None  # Not enough data to generate a meaningful template
         
-        pattern = self.patterns[category]
+        return self._suggest_from(self.patterns[category])
+    
+    def generate_cluster_suggestions(self, category: str, min_count: int = 3) -> List[Dict[str, Any]]:
+        """Generate a template suggestion for each cluster of a category.
         
+        Args:
+            category: Category to generate templates for.
+            min_count: Minimum number of examples in a cluster.
+            
+        Returns:
+            List of dictionaries with the cluster ID, example count,
+            representative prompt and suggested template, largest cluster first.
+        """
+        if category not in self.patterns:
+            return []
+        
+        clusters = [
+            cluster for cluster in self.patterns[category]["clusters"].values()
+            if cluster["count"] >= min_count
+        ]
+        clusters.sort(key=lambda cluster: cluster["count"], reverse=True)
+        
+        return [
+            {
+                "cluster_id": cluster["id"],
+                "count": cluster["count"],
+                "representative": cluster["representative"]["prompt"],
+                "suggestion": self._suggest_from(cluster)
+            }
+            for cluster in clusters
+        ]
+    
+    def _suggest_from(self, record: Dict[str, Any]) -> str:
+        """Build a template from the common lines of a pattern or cluster record.
+        
+        Args:
+            record: Pattern or cluster record.
+            
+        Returns:
+            Suggested template string.
+        """
         # Start with common elements as the base template
-        template_lines = list(pattern["common_elements"])
+        template_lines = list(record["common_elements"])
         
         # Sort by probable order (assuming common elements are whole lines)
         # A more sophisticated implementation would use NLP to understand structure
-        template_lines.sort(key=lambda line: sum(
-            1 for example in pattern["examples"] 
-            if line in example["prompt"] and 
-            example["prompt"].index(line) < len(example["prompt"]) / 2
-        ), reverse=True)
+        # Lines usually in the first half come first, ties broken by mean position
+        line_stats = record["line_stats"]
+        default_stats = (0, float("inf"))
+        template_lines.sort(key=lambda line: (
+            -line_stats.get(line, default_stats)[0],
+            line_stats.get(line, default_stats)[1]
+        ))
         
         return "\n".join(template_lines)
 
 # Chain of Thought Templates
-CHAIN_OF_THOUGHT_TEMPLATE = PromptTemplate(
+TEMPLATE_REGISTRY.register_source(
+    "chain_of_thought",
     """
     # Chain of Thought Analysis
     
@@ -368,4 +922,19 @@ CHAIN_OF_THOUGHT_TEMPLATE = PromptTemplate(
      "edge_cases", "verification", "final_answer"]
 )
 
-TEMPLATE_REGISTRY["chain_of_thought"] = CHAIN_OF_THOUGHT_TEMPLATE 
\ No newline at end of file
+# Built-in templates used to be module-level PromptTemplate constants
+_BUILTIN_TEMPLATE_CONSTANTS = {
+    "TASK_PLANNING_TEMPLATE": "task_planning",
+    "CODE_GENERATION_TEMPLATE": "code_generation",
+    "TASK_DECOMPOSITION_TEMPLATE": "task_decomposition",
+    "FILE_OPERATION_TEMPLATE": "file_operation",
+    "AGENT_DECISION_TEMPLATE": "agent_decision",
+    "PERFORMANCE_OPTIMIZATION_TEMPLATE": "performance_optimization",
+    "CHAIN_OF_THOUGHT_TEMPLATE": "chain_of_thought"
+}
+
+def __getattr__(name: str) -> Any:
+    """Resolve the former template constants through the registry."""
+    if name in _BUILTIN_TEMPLATE_CONSTANTS:
+        return TEMPLATE_REGISTRY[_BUILTIN_TEMPLATE_CONSTANTS[name]]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,288 @@
+"""Two-level response cache keyed on natural language text.
+
+The first level matches normalised text exactly. The second embeds text as
+a hashed bag of words and character trigrams and returns the cached value
+of the most similar stored text, if its cosine similarity reaches a
+threshold. Hashed embeddings are computed locally and capture lexical near
+duplicates (reordered words, plurals, filler words), not synonyms.
+
+Texts that differ in a token containing a digit (an id, a priority, a
+horizon such as H1) never match semantically, since those tokens usually
+change the meaning of a request while barely moving its embedding. Other
+differing words can be just as significant (a tag, a search term), so
+callers pass `lookup` a predicate that rejects cached values which do not
+fit the new text.
+
+Entries are evicted least recently used first and can be persisted to a
+JSON-lines file. The semantic level requires NumPy; without it only exact
+matches are served.
+"""
+
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+from collections import OrderedDict
+import json
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger("semantic-cache")
+
+_WORD_PATTERN = re.compile(r"[a-z0-9#]+")
+
+def normalize_text(text: str) -> str:
+    """Normalise text for exact matching.
+    
+    Args:
+        text: Input text.
+    
+    Returns:
+        Lowercase words joined by single spaces, without punctuation
+    """
+    return " ".join(_WORD_PATTERN.findall(text.lower().replace("'", "")))
+
+def _anchors(normalized: str) -> FrozenSet[str]:
+    """Get the tokens of a normalised text that contain a digit."""
+    return frozenset(word for word in normalized.split() if any(char.isdigit() for char in word))
+
+def embed_text(normalized: str, dim: int) -> "np.ndarray":
+    """Embed a normalised text as a unit-length hashed feature vector.
+    
+    Args:
+        normalized: Text returned by `normalize_text`.
+        dim: Embedding dimension.
+    
+    Returns:
+        Float32 vector of length `dim`; all zeros for empty text
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    for word in normalized.split():
+        padded = f" {word} "
+        grams = [f"w:{word}"] + [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+        for gram in grams:
+            code = zlib.crc32(gram.encode("utf-8"))
+            # The top bit gives the sign, so colliding features tend to cancel
+            vector[code % dim] += 1.0 if code & 0x80000000 else -1.0
+    
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector
+
+class SemanticCache:
+    """Bounded cache with exact and embedding-similarity lookup."""
+    
+    def __init__(self, path: Optional[str] = None, max_entries: int = 1024,
+                 similarity_threshold: float = 0.85, dim: int = 512,
+                 save_interval: float = 30.0):
+        """Initialize the cache.
+        
+        Args:
+            path: JSON-lines file the cache is loaded from and saved to.
+                  If None, the cache is kept in memory only.
+            max_entries: Maximum number of entries.
+            similarity_threshold: Minimum cosine similarity of a semantic match.
+            dim: Embedding dimension.
+            save_interval: Minimum seconds between automatic saves after a
+                           change. Changes are also saved by `close`.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.dim = dim
+        self.save_interval = save_interval
+        self.semantic = np is not None
+        
+        # (namespace, normalized text) -> entry, in least recently used order
+        self._entries: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        
+        # Embeddings of semantically reusable entries, one row per slot.
+        # Free slots hold zero vectors, which never reach the threshold
+        if self.semantic:
+            self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+            self._slot_keys: List[Optional[Tuple[str, str]]] = [None] * max_entries
+            self._free_slots = list(range(max_entries - 1, -1, -1))
+        else:
+            logger.info("numpy not installed; semantic matching disabled")
+        
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        if path and os.path.exists(path):
+            self._load()
+    
+    def lookup(self, namespace: str, text: str,
+               accept: Optional[Callable[[Any], bool]] = None) -> Optional[Tuple[Any, str]]:
+        """Look up the cached value for a text.
+        
+        Args:
+            namespace: Namespace of the lookup; entries never match across
+                       namespaces.
+            text: Natural language text.
+            accept: Called with the value of each semantic match, best
+                    first; values it returns False for are skipped. If None,
+                    every semantic match is accepted.
+        
+        Returns:
+            Tuple of (value, "exact" or "semantic"), or None on a miss
+        """
+        normalized = normalize_text(text)
+        key = (namespace, normalized)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry["value"], "exact"
+            
+            if self.semantic and self._entries:
+                match = self._nearest(namespace, normalized, accept)
+                if match is not None:
+                    self._entries.move_to_end(match)
+                    self.semantic_hits += 1
+                    return self._entries[match]["value"], "semantic"
+            
+            self.misses += 1
+            return None
+    
+    def _nearest(self, namespace: str, normalized: str,
+                 accept: Optional[Callable[[Any], bool]]) -> Optional[Tuple[str, str]]:
+        """Find the key of the most similar accepted reusable entry above the
+        threshold."""
+        similarities = self._vectors @ embed_text(normalized, self.dim)
+        anchors = _anchors(normalized)
+        candidates = np.flatnonzero(similarities >= self.similarity_threshold)
+        # Best match first
+        for slot in candidates[np.argsort(-similarities[candidates])]:
+            key = self._slot_keys[slot]
+            if key is None or key[0] != namespace:
+                continue
+            entry = self._entries[key]
+            if entry["anchors"] == anchors and (accept is None or accept(entry["value"])):
+                return key
+        return None
+    
+    def set(self, namespace: str, text: str, value: Any, reusable: bool = True) -> None:
+        """Store the value for a text.
+        
+        Args:
+            namespace: Namespace of the entry.
+            text: Natural language text.
+            value: Value to cache. Must be JSON-serializable if the cache is
+                   persisted.
+            reusable: Whether the value may be served for similar texts.
+                      If False, only the exact text matches it.
+        """
+        with self._lock:
+            self._store(namespace, normalize_text(text), value, reusable)
+            self._dirty = True
+            if self.path and time.monotonic() - self._saved_at >= self.save_interval:
+                self._save()
+    
+    def _store(self, namespace: str, normalized: str, value: Any, reusable: bool) -> None:
+        """Insert an entry, evicting the least recently used beyond capacity."""
+        key = (namespace, normalized)
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._release(old)
+        
+        if self.max_entries <= 0:
+            return
+        while len(self._entries) >= self.max_entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._release(evicted)
+            self.evictions += 1
+        
+        entry = {"value": value, "anchors": _anchors(normalized), "slot": None}
+        self._entries[key] = entry
+        
+        if reusable and self.semantic and normalized:
+            entry["slot"] = self._free_slots.pop()
+            self._vectors[entry["slot"]] = embed_text(normalized, self.dim)
+            self._slot_keys[entry["slot"]] = key
+    
+    def _release(self, entry: Dict[str, Any]) -> None:
+        """Free the embedding slot of a removed entry."""
+        slot = entry["slot"]
+        if slot is not None:
+            self._vectors[slot] = 0.0
+            self._slot_keys[slot] = None
+            self._free_slots.append(slot)
+    
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock:
+            for entry in self._entries.values():
+                self._release(entry)
+            self._entries.clear()
+            self._dirty = True
+    
+    def save(self) -> None:
+        """Write the cache to its file, if it has one and has changed."""
+        with self._lock:
+            if self.path and self._dirty:
+                self._save()
+    
+    def _save(self) -> None:
+        """Write every entry, least recently used first, and swap the file in."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            for (namespace, normalized), entry in self._entries.items():
+                f.write(json.dumps({
+                    "namespace": namespace,
+                    "text": normalized,
+                    "value": entry["value"],
+                    "reusable": entry["slot"] is not None
+                }) + "\n")
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+        self._saved_at = time.monotonic()
+    
+    def _load(self) -> None:
+        """Load the entries saved in the cache file."""
+        try:
+            with open(self.path) as f:
+                records = [json.loads(line) for line in f if line.strip()]
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load cache file {self.path}: {e}")
+            return
+        
+        for record in records[-self.max_entries:]:
+            self._store(record["namespace"], record["text"], record["value"], record["reusable"])
+    
+    def close(self) -> None:
+        """Save unsaved changes."""
+        self.save()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics.
+        
+        Returns:
+            Dictionary with size, hit/miss counters and hit rate.
+        """
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "semantic": self.semantic,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0
+        }
@@ -0,0 +1,167 @@
+"""Token counting and token-budget truncation for prompts."""
+
+from typing import List, Optional, Tuple
+import logging
+import re
+
+from agents_system.utils.cache import LRUCache
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Truncation strategies
+TRUNCATE_HEAD = "head"      # Keep the beginning, drop the end
+TRUNCATE_TAIL = "tail"      # Keep the end, drop the beginning
+TRUNCATE_MIDDLE = "middle"  # Keep both ends, drop the middle
+TRUNCATE_ERROR = "error"    # Raise instead of truncating
+TRUNCATION_STRATEGIES = (TRUNCATE_HEAD, TRUNCATE_TAIL, TRUNCATE_MIDDLE, TRUNCATE_ERROR)
+
+# Marker inserted where the middle of a text was dropped
+TRUNCATION_MARKER = "\n[...]\n"
+
+# Word runs, short digit groups and single punctuation characters. Roughly
+# follows how BPE tokenizers pre-split text; long words cost extra tokens.
+_TOKEN_PIECE_PATTERN = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+_CHARS_PER_WORD_TOKEN = 6
+
+def _piece_cost(piece: str) -> int:
+    """Estimated number of tokens of one pre-split piece."""
+    return 1 + (len(piece) - 1) // _CHARS_PER_WORD_TOKEN
+
+class TokenCounter:
+    """Counts and truncates text in LLM tokens.
+    
+    Uses the tiktoken encoding `encoding` when tiktoken is installed, and a
+    fast regex-based estimate otherwise. Counts of strings of at least
+    `min_cached_length` characters are cached by string hash, so repeated
+    template variables and history entries are only counted once.
+    """
+    
+    def __init__(self, encoding: Optional[str] = "cl100k_base", cache_size: int = 4096,
+                 min_cached_length: int = 256):
+        """Initialize the token counter.
+        
+        Args:
+            encoding: tiktoken encoding name. If None, or tiktoken is not
+                      installed, tokens are estimated locally.
+            cache_size: Maximum number of cached counts. 0 disables caching.
+            min_cached_length: Shortest string whose count is cached; shorter
+                               strings are cheaper to count than to look up.
+        """
+        self.encoding = None
+        if encoding and tiktoken is not None:
+            try:
+                self.encoding = tiktoken.get_encoding(encoding)
+            except Exception as e:
+                logger.warning(f"Could not load tiktoken encoding {encoding}, estimating tokens: {e}")
+        
+        self.cache = LRUCache(max_size=cache_size) if cache_size else None
+        self.min_cached_length = min_cached_length
+    
+    def _count(self, text: str) -> int:
+        """Count the tokens of a text without the cache."""
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return sum(_piece_cost(piece) for piece in _TOKEN_PIECE_PATTERN.findall(text))
+    
+    def count(self, text: str) -> int:
+        """Count the tokens of a text.
+        
+        Args:
+            text: Text to count.
+        
+        Returns:
+            Number of tokens.
+        """
+        if self.cache is None or len(text) < self.min_cached_length:
+            return self._count(text)
+        
+        # Keyed by hash and length so cached texts are not kept alive
+        key = (hash(text), len(text))
+        tokens = self.cache.get(key)
+        if tokens is None:
+            tokens = self._count(text)
+            self.cache.set(key, tokens)
+        return tokens
+    
+    def _boundaries(self, text: str) -> List[Tuple[int, int]]:
+        """Split a text into (end offset, estimated tokens) pieces for cutting it."""
+        return [
+            (match.end(), _piece_cost(match.group()))
+            for match in _TOKEN_PIECE_PATTERN.finditer(text)
+        ]
+    
+    def _head(self, text: str, max_tokens: int) -> str:
+        """Get the longest prefix of a text within a token budget."""
+        if self.encoding is not None:
+            return self.encoding.decode(self.encoding.encode(text, disallowed_special=())[:max_tokens])
+        
+        end = 0
+        used = 0
+        for offset, cost in self._boundaries(text):
+            if used + cost > max_tokens:
+                break
+            used += cost
+            end = offset
+        return text[:end]
+    
+    def _tail(self, text: str, max_tokens: int) -> str:
+        """Get the longest suffix of a text within a token budget."""
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text, disallowed_special=())
+            return self.encoding.decode(tokens[len(tokens) - max_tokens:])
+        
+        boundaries = self._boundaries(text)
+        start = len(text)
+        used = 0
+        for index in range(len(boundaries) - 1, -1, -1):
+            cost = boundaries[index][1]
+            if used + cost > max_tokens:
+                break
+            used += cost
+            start = boundaries[index - 1][0] if index else 0
+        return text[start:]
+    
+    def truncate(self, text: str, max_tokens: int, strategy: str = TRUNCATE_HEAD) -> str:
+        """Truncate a text to a token budget.
+        
+        Args:
+            text: Text to truncate.
+            max_tokens: Maximum number of tokens in the result.
+            strategy: One of "head" (keep the beginning), "tail" (keep the
+                      end), "middle" (keep both ends around a marker) or
+                      "error".
+        
+        Returns:
+            The text, unchanged if it fits the budget.
+        
+        Raises:
+            ValueError: If the text does not fit and the strategy is "error",
+                        or the strategy is unknown.
+        """
+        if strategy not in TRUNCATION_STRATEGIES:
+            raise ValueError(f"Unknown truncation strategy: {strategy}")
+        
+        tokens = self.count(text)
+        if tokens <= max_tokens:
+            return text
+        
+        if strategy == TRUNCATE_ERROR:
+            raise ValueError(f"Text has {tokens} tokens, exceeding the budget of {max_tokens}")
+        if max_tokens <= 0:
+            return ""
+        if strategy == TRUNCATE_HEAD:
+            return self._head(text, max_tokens)
+        if strategy == TRUNCATE_TAIL:
+            return self._tail(text, max_tokens)
+        
+        available = max_tokens - self.count(TRUNCATION_MARKER)
+        if available <= 1:
+            return self._head(text, max_tokens)
+        head = self._head(text, (available + 1) // 2)
+        tail = self._tail(text[len(head):], available // 2)
+        return head + TRUNCATION_MARKER + tail
@@ -0,0 +1,55 @@
+"""Tests for semantic reuse of cached LLM responses."""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from agents_system.integrations.ai_t2p_adapter import AIT2PAdapter
+from agents_system.integrations.t2p import T2PIntegration
+from agents_system.utils.semantic_cache import SemanticCache
+
+def make_adapter():
+    """Build an adapter that never starts t2p processes."""
+    return AIT2PAdapter(T2PIntegration(use_worker=False), response_cache=SemanticCache())
+
+def make_llm(calls):
+    """Build an LLM call that tags the command with the tag in the prompt."""
+    async def call(prompt):
+        calls.append(prompt)
+        tag = "home" if "tagged home" in prompt else "work"
+        return f't2p todo list --priority 1 --tags "{tag}"'
+    return call
+
+def generate(adapter, user_input, llm):
+    return asyncio.run(adapter.generate_command_from_llm(user_input, llm))
+
+def test_similar_input_with_different_argument_value_calls_llm():
+    adapter, calls = make_adapter(), []
+    llm = make_llm(calls)
+
+    generate(adapter, "show high priority 1 todos tagged work", llm)
+    result = generate(adapter, "show high priority 1 todos tagged home", llm)
+
+    assert result["command"] == 't2p todo list --priority 1 --tags "home"'
+    assert result["cache"] is None
+    assert len(calls) == 2
+
+def test_similar_input_with_same_argument_values_reuses_response():
+    adapter, calls = make_adapter(), []
+    llm = make_llm(calls)
+
+    generate(adapter, "show high priority 1 todos tagged work", llm)
+    result = generate(adapter, "please show me high priority 1 todos tagged work", llm)
+
+    assert result["command"] == 't2p todo list --priority 1 --tags "work"'
+    assert result["cache"] == "semantic"
+    assert len(calls) == 1
+
+def test_lookup_skips_rejected_matches():
+    cache = SemanticCache()
+    cache.set("commands", "show todos tagged work", "work")
+
+    assert cache.lookup("commands", "show me todos tagged work", accept=lambda value: False) is None
+    assert cache.lookup("commands", "show me todos tagged work") == ("work", "semantic")
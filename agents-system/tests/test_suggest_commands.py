@@ -0,0 +1,18 @@
+"""Tests for command suggestions."""
+
+import subprocess
+
+from agents_system.integrations.ai_t2p_adapter import AIT2PAdapter
+from agents_system.integrations.t2p import T2PIntegration
+
+def test_suggest_commands_does_not_execute(monkeypatch):
+    started = []
+    monkeypatch.setattr(subprocess, "Popen", lambda *args, **kwargs: started.append(args))
+    monkeypatch.setattr(subprocess, "run", lambda *args, **kwargs: started.append(args))
+    adapter = AIT2PAdapter(T2PIntegration(t2p_path="t2p", use_worker=False))
+
+    suggestions = adapter.suggest_commands("create todo buy milk")
+
+    assert suggestions[0]["intent"] == "create_todo"
+    assert suggestions[0]["command"].startswith("t2p todo add")
+    assert started == []